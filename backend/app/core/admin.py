@@ -0,0 +1,13 @@
+import secrets
+from fastapi import Header, HTTPException
+from app.core.config import get_settings
+
+config = get_settings()
+
+
+def require_admin(x_admin_key: str | None = Header(None)):
+    """Dependency for admin-only endpoints: X-Admin-Key must equal ADMIN_API_KEY."""
+    if not config.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_KEY is not set).")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, config.ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key.")
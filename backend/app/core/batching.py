@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item calls for up to `max_wait_seconds` (or until
+    `max_batch_size` items are queued) and hands them to `handler(group, items)` as
+    one batch. Items with different `group` keys are never mixed. The handler must
+    return one result per item, in order; an exception fails every caller in the batch.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Hashable, list[Any]], Awaitable[list[Any]]],
+        max_batch_size: int,
+        max_wait_seconds: float,
+    ):
+        self._handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: dict[Hashable, list[tuple[Any, asyncio.Future]]] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    async def submit(self, group: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(group, [])
+        batch.append((item, future))
+        if len(batch) >= self.max_batch_size or self.max_wait_seconds <= 0:
+            self._flush(group)
+        elif len(batch) == 1:
+            self._timers[group] = loop.call_later(self.max_wait_seconds, self._flush, group)
+        return await future
+
+    def _flush(self, group: Hashable):
+        timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(group, None)
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        task = asyncio.create_task(self._run(group, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, group: Hashable, batch: list[tuple[Any, asyncio.Future]]):
+        try:
+            results = await self._handler(group, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():  # The caller may have been cancelled meanwhile
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
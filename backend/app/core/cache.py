@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """
+    Small in-process LRU cache with optional TTL and byte budget.
+    Not thread-safe: meant to be used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 1024,
+        ttl_seconds: float | None = None,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and not self._expired(entry)
+
+    def _expired(self, entry: tuple[float, int, Any]) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - entry[0] > self.ttl_seconds
+
+    def _drop(self, key: Hashable):
+        _, size, _ = self._data.pop(key)
+        self.total_bytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None or self._expired(entry):
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, key: Hashable, value: Any):
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # Never cache a single value larger than the whole budget
+        if key in self._data:
+            self._drop(key)
+        self._data[key] = (time.monotonic(), size, value)
+        self.total_bytes += size
+        while len(self._data) > self.max_items or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        value = self._data[key][2]
+        self._drop(key)
+        return value
+
+    def items(self):
+        """Yields (key, value) for live entries, oldest first."""
+        for key, entry in list(self._data.items()):
+            if not self._expired(entry):
+                yield key, entry[2]
+
+    def clear(self):
+        self._data.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self._data),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,7 +1,12 @@
 import os
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 
+# Sizes with a column and match functions in supabase/migrations
+SUPPORTED_EMBEDDING_DIMENSIONS = (768, 3072)
+
+
 class Settings(BaseSettings):
     APP_NAME: str = "GramGyan Backend"
     API_V1_STR: str = "/api/v1"
@@ -19,6 +24,104 @@ class Settings(BaseSettings):
     N8N_NEWS_WEBHOOK_URL: str | None = None
     N8N_REPORT_WEBHOOK_URL: str | None = None
     DEBUG: bool = False
+    ADMIN_API_KEY: str | None = None  # Sent as X-Admin-Key to admin endpoints; unset disables them
+
+    # Outbound HTTP (shared pooled clients, see app/services/http_clients.py)
+    HTTP2_ENABLED: bool = False  # Needs the optional `h2` package
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    SARVAM_TIMEOUT: float = 30.0
+    SARVAM_STT_TIMEOUT: float = 60.0
+    GROQ_TIMEOUT: float = 60.0
+    OPENWEATHER_TIMEOUT: float = 10.0
+    N8N_TIMEOUT: float = 30.0
+    GYANCALL_TIMEOUT: float = 15.0
+
+    # Gemini embeddings
+    # 3072 is gemini-embedding-001's native size; 768 shrinks storage and search cost.
+    # Must match the database column in use (see migrations/*_reduced_dimension_embeddings.sql),
+    # which only creates embedding_768 and its match_*_768 functions.
+    EMBEDDING_DIMENSION: int = 3072
+    EMBEDDING_MAX_CONCURRENCY: int = 8
+    EMBEDDING_BATCH_MAX_SIZE: int = 100  # Gemini's batchEmbedContents limit
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    # Embedding cache (memory LRU + size-capped directory of .npy files)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = ".cache/embeddings"
+    EMBEDDING_CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 * 1024
+    EMBEDDING_CACHE_DISK_MAX_BYTES: int = 1024 * 1024 * 1024
+    EMBEDDING_CACHE_DISK_DTYPE: str = "float16"  # or "float32"
+
+    # In-memory mirror of verified knowledge_posts for /api/v1/knowledge/search
+    # Off by default: at 3072 dims each post is 12 KB of float32 (768 dims or float16 shrink it).
+    KNOWLEDGE_INDEX_ENABLED: bool = False
+    KNOWLEDGE_INDEX_MAX_BYTES: int = 128 * 1024 * 1024  # incl. the 2nd matrix a full reload builds; over it, the RPC is used
+    KNOWLEDGE_INDEX_REFRESH_SECONDS: float = 60.0  # incremental (verified_at/created_at delta)
+    KNOWLEDGE_INDEX_FULL_REFRESH_SECONDS: float = 3600.0  # full reload, also drops deleted posts
+    KNOWLEDGE_INDEX_DTYPE: str = "float32"  # "float16" halves memory, but exact scans are ~10x slower (no BLAS)
+    KNOWLEDGE_INDEX_HNSW: bool = False  # needs the optional `hnswlib` package
+    KNOWLEDGE_INDEX_HNSW_EF: int = 100
+
+    # Semantic answer cache in front of /api/v1/gemini/answer
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.92  # cosine similarity between the two questions' embeddings
+    ANSWER_CACHE_MAX_ITEMS: int = 2000
+    ANSWER_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
+
+    # /api/v1/crop/analyze: crops are ranked locally, Groq only writes the advice text
+    CROP_NARRATIVE_ENABLED: bool = True
+
+    # Groq crop analysis cache (/api/v1/crop/analyze), keyed by inputs rounded to these steps
+    CROP_CACHE_ENABLED: bool = True
+    CROP_CACHE_MAX_ITEMS: int = 5000
+    CROP_CACHE_TTL_SECONDS: float = 24 * 3600
+    CROP_CACHE_NPK_STEP: float = 10.0  # kg/ha
+    CROP_CACHE_PH_STEP: float = 0.1
+    CROP_CACHE_TEMPERATURE_STEP: float = 1.0  # C
+    CROP_CACHE_HUMIDITY_STEP: float = 5.0  # %
+    CROP_CACHE_RAINFALL_STEP: float = 20.0  # mm
+
+    # API key pools (per-key cooldown with exponential backoff)
+    KEY_COOLDOWN_SECONDS: float = 30.0  # after 429
+    KEY_AUTH_COOLDOWN_SECONDS: float = 600.0  # after 401/403
+    KEY_MAX_COOLDOWN_SECONDS: float = 1800.0
+
+    # TTS audio cache (memory LRU + size-capped disk directory)
+    TTS_CACHE_ENABLED: bool = True
+    TTS_CACHE_DIR: str = ".cache/tts"
+    TTS_CACHE_MEMORY_MAX_BYTES: int = 32 * 1024 * 1024
+    TTS_CACHE_DISK_MAX_BYTES: int = 512 * 1024 * 1024
+    # Chunked (long-text) TTS
+    TTS_CHUNK_MAX_CHARS: int = 490  # Sarvam's per-input limit is 500
+    TTS_MAX_PARALLEL_CHUNKS: int = 3
+
+    # Audio uploads are streamed to Sarvam from memory; anything bigger is rejected with 413
+    MAX_AUDIO_UPLOAD_BYTES: int = 20 * 1024 * 1024
+
+    # Crop photos for /api/v1/gemini/analyze-crop: downscaled and re-encoded before Gemini sees them
+    MAX_IMAGE_UPLOAD_BYTES: int = 15 * 1024 * 1024
+    IMAGE_MAX_PIXELS: int = 50_000_000  # decompression-bomb guard
+    IMAGE_MAX_EDGE: int = 1536  # longest side in pixels; Gemini bills images per 768 px tile
+    IMAGE_FORMAT: str = "jpeg"  # or "webp"
+    IMAGE_QUALITY: int = 85
+    IMAGE_WORKERS: int = 2
+    # Near-duplicate photos (same query + language) reuse an earlier diagnosis
+    DIAGNOSIS_CACHE_ENABLED: bool = True
+    DIAGNOSIS_CACHE_PATH: str = ".cache/diagnoses.jsonl"
+    DIAGNOSIS_CACHE_MAX_ITEMS: int = 5000
+    DIAGNOSIS_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
+    DIAGNOSIS_CACHE_PHASH_DISTANCE: int = 6  # max differing bits of 64
+    DIAGNOSIS_CACHE_DHASH_DISTANCE: int = 10
+
+    # Long-audio STT (Sarvam real-time STT rejects audio over 30 s)
+    STT_SEGMENT_MAX_SECONDS: float = 25.0
+    STT_MAX_PARALLEL_SEGMENTS: int = 4
+
+    # Sentence-level translation memory
+    TRANSLATION_MEMORY_ENABLED: bool = True
+    TRANSLATION_MEMORY_MAX_ITEMS: int = 50_000
+    TRANSLATION_MEMORY_TTL_SECONDS: float = 7 * 24 * 3600
     
     # Auth & Database
     FIREBASE_CREDENTIALS_PATH: str | None = None  # Not needed if FIREBASE_CREDENTIALS_JSON is set
@@ -27,6 +130,14 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @field_validator("EMBEDDING_DIMENSION")
+    @classmethod
+    def _check_embedding_dimension(cls, value: int) -> int:
+        # Any other size would call match_knowledge_<n> / match_recent_questions_<n>, which don't exist
+        if value not in SUPPORTED_EMBEDDING_DIMENSIONS:
+            raise ValueError(f"EMBEDDING_DIMENSION must be one of {SUPPORTED_EMBEDDING_DIMENSIONS}, got {value}")
+        return value
+
 @lru_cache()
 def get_settings():
     return Settings()
@@ -0,0 +1,61 @@
+import json
+
+
+class JsonArrayStream:
+    """
+    Pulls the elements of a JSON array out of text that arrives in pieces, e.g. streamed
+    LLM output. `feed` returns every object (or nested array) element whose closing
+    bracket has arrived, parsed; scalar elements are ignored.
+
+    Anything before the first `[` is skipped, so a leading ```json fence or a sentence of
+    preamble doesn't matter. Brackets inside strings (including escaped quotes) are not
+    counted. An element that fails to parse is skipped and counted in `skipped`; `text`
+    keeps everything fed so far for a whole-response fallback.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.done = False  # the array's closing bracket has arrived
+        self.skipped = 0
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._element_start: int | None = None
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        text = self.text
+        elements = []
+        i = self._pos
+        while i < len(text) and not self.done:
+            ch = text[i]
+            if self._depth == 0:
+                if ch == "[":
+                    self._depth = 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 1:
+                    self._element_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._element_start is not None:
+                    try:
+                        elements.append(json.loads(text[self._element_start:i + 1]))
+                    except json.JSONDecodeError:
+                        self.skipped += 1
+                    self._element_start = None
+                elif self._depth == 0:
+                    self.done = True
+            i += 1
+        self._pos = i
+        return elements
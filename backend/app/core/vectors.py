@@ -0,0 +1,80 @@
+import base64
+import numpy as np
+
+# Opt-in compact embedding format: the same JSON envelope, but each vector is a base64
+# string of little-endian floats instead of a list of numbers. Negotiated with
+#   Accept: application/vnd.gramgyan.embedding+json; dtype=float16
+# on responses, and the same value as Content-Type on request bodies.
+COMPACT_MEDIA_TYPE = "application/vnd.gramgyan.embedding+json"
+COMPACT_DTYPES = {"float16": np.dtype("<f2"), "float32": np.dtype("<f4")}
+DEFAULT_COMPACT_DTYPE = "float32"
+
+
+def compact_dtype(header: str | None) -> str | None:
+    """
+    Returns the requested dtype name if `header` (Accept or Content-Type) asks for the
+    compact format, otherwise None. Unknown dtypes raise ValueError.
+    """
+    if not header:
+        return None
+    for media_range in header.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        if media_type.lower() != COMPACT_MEDIA_TYPE:
+            continue
+        dtype = DEFAULT_COMPACT_DTYPE
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "dtype":
+                dtype = value.strip().strip('"').lower()
+        if dtype not in COMPACT_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}. Use one of {', '.join(COMPACT_DTYPES)}.")
+        return dtype
+    return None
+
+
+def encode_vector(vector: np.ndarray, dtype: str = DEFAULT_COMPACT_DTYPE) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=COMPACT_DTYPES[dtype]).tobytes()).decode("ascii")
+
+
+def decode_vector(data: str, dtype: str = DEFAULT_COMPACT_DTYPE) -> np.ndarray:
+    """Decodes a base64 vector into a float32 array."""
+    return np.frombuffer(base64.b64decode(data, validate=True), dtype=COMPACT_DTYPES[dtype]).astype(np.float32)
+
+
+def as_vector(value) -> np.ndarray:
+    """Accepts a JSON list of numbers or an array and returns a 1-D float32 array."""
+    vector = np.asarray(value, dtype=np.float32)
+    if vector.ndim != 1 or vector.size == 0:
+        raise ValueError("Embedding must be a non-empty list of numbers.")
+    return vector
+
+
+def parse_embedding(value, content_type: str | None = None, dtype: str | None = None) -> np.ndarray:
+    """
+    Reads an embedding from a request body: a JSON list of numbers, or a base64 string
+    whose dtype comes from a compact Content-Type (or `dtype`, else float32).
+    Raises ValueError on anything malformed.
+    """
+    if isinstance(value, str):
+        return decode_vector(value, compact_dtype(content_type) or dtype or DEFAULT_COMPACT_DTYPE)
+    return as_vector(value)
+
+
+def truncate_embedding(vectors: np.ndarray, dimension: int) -> np.ndarray:
+    """
+    Keeps the first `dimension` components and L2-renormalizes (Matryoshka truncation, as
+    gemini-embedding-001 does for output_dimensionality). Works on one vector or a 2-D batch.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)[..., :dimension]
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def from_pgvector(text: str) -> np.ndarray:
+    """Parses pgvector's text form as returned by PostgREST."""
+    return np.array(text.strip("[]").split(","), dtype=np.float32)
+
+
+def to_pgvector(vector: np.ndarray) -> str:
+    """pgvector's text input form ('[0.1,0.2,...]'), used only when handing a vector to the database."""
+    return "[" + ",".join(np.asarray(vector, dtype=np.float32).astype(str)) + "]"
@@ -1,5 +1,8 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import get_settings
 from app.routes import speech
 import logging
@@ -12,6 +15,17 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 from app.services.firebase import initialize_firebase
+from app.services.http_clients import start_http_clients, close_http_clients
+from app.services.tts_cache import tts_cache
+from app.services.embedding_cache import embedding_cache
+from app.services.answer_cache import answer_cache
+from app.services.image_preprocess import image_preprocessor
+from app.services.diagnosis_cache import diagnosis_cache
+from app.services.crop_cache import crop_cache
+from app.services.translation_memory import translation_memory
+from app.services import sarvam as sarvam_service, groq as groq_service
+from app.services.gemini import gemini_service
+from app.services.knowledge_index import knowledge_index
 
 # ... 
 
@@ -20,9 +34,21 @@ settings = get_settings()
 # Initialize Firebase
 initialize_firebase()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared pooled HTTP clients for Sarvam, Groq, OpenWeather, n8n and GyanCall
+    await start_http_clients()
+    # Verified knowledge mirrored in memory for /api/v1/knowledge/search; loads in the background
+    refresh_task = asyncio.create_task(knowledge_index.run()) if settings.KNOWLEDGE_INDEX_ENABLED else None
+    yield
+    if refresh_task is not None:
+        refresh_task.cancel()
+    await close_http_clients()
+
 app = FastAPI(
     title=settings.APP_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -34,7 +60,26 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-from app.routes import speech, auth, gemini, alerts, crop, weather, gyancall, n8n
+# Upload size caps by path prefix, enforced from Content-Length before the body is read
+UPLOAD_LIMITS = {
+    f"{settings.API_V1_STR}/speech/": settings.MAX_AUDIO_UPLOAD_BYTES,
+    f"{settings.API_V1_STR}/voice/": settings.MAX_AUDIO_UPLOAD_BYTES,
+    f"{settings.API_V1_STR}/gemini/analyze-crop": settings.MAX_IMAGE_UPLOAD_BYTES,
+}
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        for prefix, limit in UPLOAD_LIMITS.items():
+            if request.url.path.startswith(prefix) and int(content_length) > limit:
+                return JSONResponse(
+                    status_code=413,
+                    content={"detail": f"Upload too large. Maximum is {limit // (1024 * 1024)} MB."},
+                )
+    return await call_next(request)
+
+from app.routes import speech, auth, gemini, alerts, crop, weather, gyancall, n8n, knowledge, voice
 import logging
 
 # ... imports ...
@@ -47,6 +92,8 @@ app.include_router(crop.router, prefix="/api/v1/crop", tags=["crop"])
 app.include_router(weather.router, prefix="/api/v1/weather", tags=["weather"])
 app.include_router(gyancall.router, prefix="/api/v1/gyancall", tags=["gyancall"])
 app.include_router(n8n.router, prefix="/api/v1/n8n", tags=["n8n"])
+app.include_router(knowledge.router, prefix="/api/v1/knowledge", tags=["knowledge"])
+app.include_router(voice.router, prefix="/api/v1/voice", tags=["voice"])
 
 @app.get("/")
 async def root():
@@ -60,6 +107,27 @@ def health_check():
         "debug_mode": settings.DEBUG
     }
 
+@app.get("/stats")
+def cache_stats():
+    """Hit/miss/eviction counters for the backend caches and per-key API usage."""
+    return {
+        "tts_cache": tts_cache.stats(),
+        "translation_memory": translation_memory.stats(),
+        "embeddings": gemini_service.embedding_limiter.stats(),
+        "embedding_batcher": gemini_service.embedding_batcher.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "knowledge_index": knowledge_index.stats(),
+        "answer_cache": answer_cache.stats(),
+        "image_preprocess": image_preprocessor.stats(),
+        "diagnosis_cache": diagnosis_cache.stats(),
+        "crop_cache": crop_cache.stats(),
+        "key_pools": {
+            "sarvam": sarvam_service.key_pool.stats(),
+            "groq": groq_service.key_pool.stats(),
+            "gemini": gemini_service.key_pool.stats(),
+        },
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,11 +1,21 @@
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
 import logging
+import numpy as np
+from app.core.config import get_settings
+from app.core.vectors import parse_embedding, to_pgvector, truncate_embedding
 from app.services.supabase import get_supabase_client
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+config = get_settings()
 
-async def process_community_alert(question_id: str, embedding: list, lat: float, lng: float, category: str):
+# Reduced-dimension columns have their own RPC (see migrations/*_reduced_dimension_embeddings.sql)
+MATCH_RECENT_QUESTIONS_RPC = (
+    "match_recent_questions" if config.EMBEDDING_DIMENSION == 3072
+    else f"match_recent_questions_{config.EMBEDDING_DIMENSION}"
+)
+
+async def process_community_alert(question_id: str, embedding: np.ndarray, lat: float, lng: float, category: str):
     """
     Background task to process threshold-based community alerts.
     """
@@ -14,9 +24,9 @@ async def process_community_alert(question_id: str, embedding: list, lat: float,
         
         # 1. Call the match_recent_questions RPC
         rpc_response = supabase.rpc(
-            "match_recent_questions",
+            MATCH_RECENT_QUESTIONS_RPC,
             {
-                "query_embedding": embedding,
+                "query_embedding": to_pgvector(embedding),
                 "query_lat": lat,
                 "query_lng": lng,
                 "match_threshold": 0.85,
@@ -76,6 +86,8 @@ async def process_community_alert(question_id: str, embedding: list, lat: float,
 async def handle_question_alert(request: Request, background_tasks: BackgroundTasks):
     """
     Webhook triggered when a new question is added with an embedding and location.
+    The embedding is a JSON list of numbers, or a base64 string when the body is sent
+    as application/vnd.gramgyan.embedding+json (dtype float16 or float32).
     """
     try:
         payload = await request.json()
@@ -88,6 +100,14 @@ async def handle_question_alert(request: Request, background_tasks: BackgroundTa
         
         if not question_id or not embedding or lat is None or lng is None:
             raise HTTPException(status_code=400, detail="Missing required payload fields")
+
+        try:
+            embedding = parse_embedding(embedding, request.headers.get("content-type"), payload.get("dtype"))
+            if embedding.size > config.EMBEDDING_DIMENSION:
+                # Rows written before the switch to a smaller dimension still carry full-size vectors
+                embedding = truncate_embedding(embedding, config.EMBEDDING_DIMENSION)
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid embedding: {e}")
             
         # Add to background tasks so respond immediately
         background_tasks.add_task(
@@ -101,6 +121,8 @@ async def handle_question_alert(request: Request, background_tasks: BackgroundTa
         
         return {"status": "success", "message": "Alert processing started"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in handle_question_alert: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import json
 import logging
-from app.services.groq import analyze_crops
+from app.services.groq import analyze_crops, stream_crop_analysis
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -20,7 +22,8 @@ class CropAnalysisRequest(BaseModel):
 @router.post("/analyze")
 async def analyze_crop_suitability(request: CropAnalysisRequest = Body(...)):
     """
-    Analyzes weather and soil data using Groq AI and returns the top 5 crops suitable for farming.
+    Ranks crops for the soil and weather data and returns the top 5 suitable for farming,
+    with advice text from Groq AI in the requested language.
     """
     try:
         results = await analyze_crops(
@@ -38,3 +41,30 @@ async def analyze_crop_suitability(request: CropAnalysisRequest = Body(...)):
     except Exception as e:
         logger.error(f"Error analyzing crops: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/stream")
+async def stream_crop_suitability(request: CropAnalysisRequest = Body(...)):
+    """
+    Same analysis as /analyze, streamed as Server-Sent Events: a `ranking` event with the
+    top 5 crops right away, then one `crop` event per crop as Groq finishes its advice
+    text, and a `done` event with the full list (or `error` if Groq fails).
+    """
+    async def event_stream():
+        async for event, data in stream_crop_analysis(
+            predicted_top_crop=request.predicted_top_crop,
+            nitrogen=request.nitrogen,
+            phosphorus=request.phosphorus,
+            potassium=request.potassium,
+            ph=request.ph,
+            rainfall=request.rainfall,
+            temperature=request.temperature,
+            humidity=request.humidity,
+            language_code=request.language_code
+        ):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,35 +1,127 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Literal
+import json
+from app.core.admin import require_admin
+from app.core.vectors import COMPACT_MEDIA_TYPE, compact_dtype, encode_vector
+from app.services.answer_cache import answer_cache
+from app.services.answer_stream import answer_events
+from app.services.diagnosis_cache import diagnosis_cache
+from app.core.config import get_settings
 from app.services.gemini import gemini_service
+from app.services.image_preprocess import image_preprocessor
 
 router = APIRouter()
+config = get_settings()
 
 class AnswerRequest(BaseModel):
     query: str
     language: str = "English"
 
+class StreamAnswerRequest(BaseModel):
+    query: str
+    language: str = "English"
+    speak: bool = False  # Also stream TTS audio, one sentence at a time
+    language_code: str = "ta-IN"  # Sarvam language code for `speak`
+
 class SafetyRequest(BaseModel):
     text: str
 
 class EmbeddingRequest(BaseModel):
     text: str
 
+class BatchEmbeddingRequest(BaseModel):
+    texts: list[str]
+    task_type: Literal["RETRIEVAL_DOCUMENT", "RETRIEVAL_QUERY"] = "RETRIEVAL_DOCUMENT"
+
 class TranslateRequest(BaseModel):
     text: str
     target_language: str
 
+MAX_BATCH_TEXTS = 1000
+UPLOAD_READ_CHUNK = 256 * 1024
+
+async def _read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """Reads an upload in chunks and stops with 413 as soon as it passes `max_bytes`."""
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Image too large. Maximum is {max_bytes // (1024 * 1024)} MB.")
+    data = bytearray()
+    while chunk := await file.read(UPLOAD_READ_CHUNK):
+        data += chunk
+        if len(data) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Image too large. Maximum is {max_bytes // (1024 * 1024)} MB.")
+    return bytes(data)
+
+def _response_dtype(http_request: Request) -> str | None:
+    """The compact dtype the client asked for in Accept, or None for plain JSON lists."""
+    try:
+        return compact_dtype(http_request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+def _embedding_response(field: str, value, dtype: str | None) -> JSONResponse:
+    """
+    Serializes one vector (or a list of vectors) under `field`. Built as a JSONResponse
+    directly, since FastAPI's generic encoder is slow on thousands of floats.
+    """
+    vectors = value if isinstance(value, list) else [value]
+    if dtype is None:
+        encoded = [vector.tolist() for vector in vectors]
+        content = {field: encoded if isinstance(value, list) else encoded[0]}
+        return JSONResponse(content, headers={"Vary": "Accept"})
+    encoded = [encode_vector(vector, dtype) for vector in vectors]
+    content = {
+        field: encoded if isinstance(value, list) else encoded[0],
+        "dtype": dtype,
+        "dimension": len(vectors[0]) if vectors else 0,
+    }
+    return JSONResponse(content, media_type=f"{COMPACT_MEDIA_TYPE}; dtype={dtype}", headers={"Vary": "Accept"})
+
 @router.post("/answer")
 async def generate_answer(request: AnswerRequest):
     """
     Generate an agricultural answer in Tamil using Gemini.
+    Near-identical questions in the same language are answered from the semantic cache;
+    `cached` tells the client which happened.
     """
     try:
-        answer = await gemini_service.generate_answer(request.query, language=request.language)
-        return {"answer": answer}
+        answer, similarity = await gemini_service.generate_answer_cached(request.query, language=request.language)
+        if similarity is not None:
+            return {"answer": answer, "cached": True, "similarity": round(similarity, 4)}
+        return {"answer": answer, "cached": False}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/answer/stream")
+async def stream_answer(request: StreamAnswerRequest):
+    """
+    Same answer as /answer, streamed as Server-Sent Events while Gemini generates it:
+    `token` events carry text pieces, then one `done` event with the full answer.
+    With `speak`, each finished sentence is also synthesized right away and sent as an
+    `audio` event (base64 WAV, in order), so playback can start after the first sentence.
+    """
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query is required")
+
+    async def event_stream():
+        language_code = request.language_code if request.speak else None
+        async for event, data in answer_events(request.query, request.language, language_code):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.delete("/answer/cache", dependencies=[Depends(require_admin)])
+async def purge_answer_cache(language: Optional[str] = None):
+    """
+    Admin: drops cached answers (all, or one language), e.g. after advice has changed.
+    """
+    return {"purged": answer_cache.purge(language)}
+
 @router.post("/safety-check")
 async def check_safety(request: SafetyRequest):
     """
@@ -42,28 +134,49 @@ async def check_safety(request: SafetyRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/embed/document")
-async def embed_document(request: EmbeddingRequest):
+async def embed_document(request: EmbeddingRequest, http_request: Request):
     """
     Generate Document Embedding.
     """
+    dtype = _response_dtype(http_request)
     try:
         embedding = await gemini_service.generate_document_embedding(request.text)
         if embedding is None:
             raise HTTPException(status_code=500, detail="Failed to generate embedding")
-        return {"embedding": embedding}
+        return _embedding_response("embedding", embedding, dtype)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/embed/query")
-async def embed_query(request: EmbeddingRequest):
+async def embed_query(request: EmbeddingRequest, http_request: Request):
     """
     Generate Query Embedding.
     """
+    dtype = _response_dtype(http_request)
     try:
         embedding = await gemini_service.generate_query_embedding(request.text)
         if embedding is None:
             raise HTTPException(status_code=500, detail="Failed to generate embedding")
-        return {"embedding": embedding}
+        return _embedding_response("embedding", embedding, dtype)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/embed/batch")
+async def embed_batch(request: BatchEmbeddingRequest, http_request: Request):
+    """
+    Generate embeddings for many texts in one request (backfills, bursts from the app).
+    Embeddings are returned in input order.
+    """
+    if len(request.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TEXTS} texts per request.")
+    if not all(request.texts):
+        raise HTTPException(status_code=400, detail="Texts must be non-empty.")
+    dtype = _response_dtype(http_request)
+    try:
+        embeddings = await gemini_service.embed_texts(request.texts, request.task_type)
+        if any(embedding is None for embedding in embeddings):
+            raise HTTPException(status_code=500, detail="Failed to generate embedding")
+        return _embedding_response("embeddings", embeddings, dtype)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -87,11 +200,23 @@ async def analyze_crop(
     """
     Analyzes an uploaded crop image with an optional query for disease diagnosis.
     Returns a JSON string matching the agreed upon structure.
+    The photo is downscaled to IMAGE_MAX_EDGE and re-encoded without metadata first, and a
+    near-duplicate of an earlier photo with the same query and language reuses its diagnosis.
     """
+    image_bytes = await _read_upload(file, config.MAX_IMAGE_UPLOAD_BYTES)
+    try:
+        image = await image_preprocessor.prepare(image_bytes)
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    if config.DIAGNOSIS_CACHE_ENABLED:
+        cached = diagnosis_cache.lookup(image.phash, image.dhash, query, language)
+        if cached is not None:
+            return {"analysis": cached, "cached": True}
     try:
-        image_bytes = await file.read()
-        analysis = await gemini_service.analyze_crop_disease(image_bytes, query, language=language)
+        analysis = await gemini_service.analyze_crop_disease(image.data, query, language=language, mime_type=image.mime_type)
+        if config.DIAGNOSIS_CACHE_ENABLED and not analysis.startswith("Error:"):
+            await diagnosis_cache.put(image.phash, image.dhash, query, language, analysis)
         # Returns the raw JSON string generated by Gemini to let the Flutter app parse it
-        return {"analysis": analysis}
+        return {"analysis": analysis, "cached": False}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
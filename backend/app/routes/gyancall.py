@@ -1,6 +1,6 @@
-import httpx
 from fastapi import APIRouter, HTTPException, Body
 from app.core.config import get_settings
+from app.services.http_clients import get_http_client
 import logging
 from pydantic import BaseModel
 
@@ -49,10 +49,10 @@ async def trigger_gyan_call(request: GyanCallRequest = Body(...)):
     }
     
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.post(endpoint, json=payload)
-            response.raise_for_status()
-            return {"status": "success"}
+        client = get_http_client("gyancall")
+        response = await client.post(endpoint, json=payload)
+        response.raise_for_status()
+        return {"status": "success"}
     except Exception as e:
         logger.error(f"Failed to trigger Gyan Call on line {request.line}: {e}")
         raise HTTPException(status_code=500, detail="Service busy. Please try again later.")
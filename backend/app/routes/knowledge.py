@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
+from app.core.config import get_settings
+from app.core.vectors import parse_embedding
+from app.services.gemini import gemini_service
+from app.services.knowledge_index import match_knowledge
+
+router = APIRouter()
+config = get_settings()
+
+class KnowledgeSearchRequest(BaseModel):
+    query: str | None = None  # Embedded here with RETRIEVAL_QUERY if no embedding is given
+    embedding: list[float] | str | None = None  # JSON list, or base64 in the compact format
+    dtype: str | None = None
+    match_threshold: float = 0.78
+    match_count: int = 3
+
+@router.post("/search")
+async def search_knowledge(request: KnowledgeSearchRequest, http_request: Request):
+    """
+    Finds verified knowledge posts similar to a question. Same results as the match_knowledge
+    RPC, served from the in-memory index (falls back to the RPC until the index has loaded).
+    """
+    if not 1 <= request.match_count <= 100:
+        raise HTTPException(status_code=400, detail="match_count must be between 1 and 100.")
+    if request.embedding is not None:
+        try:
+            embedding = parse_embedding(request.embedding, http_request.headers.get("content-type"), request.dtype)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid embedding: {e}")
+    elif request.query:
+        embedding = await gemini_service.generate_query_embedding(request.query)
+        if embedding is None:
+            raise HTTPException(status_code=500, detail="Failed to generate embedding")
+    else:
+        raise HTTPException(status_code=400, detail="Provide a query or an embedding.")
+    if embedding.size < config.EMBEDDING_DIMENSION:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Embedding has {embedding.size} dimensions, expected {config.EMBEDDING_DIMENSION}.",
+        )
+
+    try:
+        matches, source = await match_knowledge(embedding, request.match_threshold, request.match_count)
+        return {"matches": matches, "source": source}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,6 +1,7 @@
 import httpx
 from fastapi import APIRouter, HTTPException, Request
 from app.core.config import get_settings
+from app.services.http_clients import get_http_client
 import logging
 
 router = APIRouter()
@@ -12,15 +13,15 @@ async def _proxy_to_n8n(url: str, payload: dict):
         raise HTTPException(status_code=500, detail="n8n webhook URL not configured on backend.")
         
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
+        client = get_http_client("n8n")
+        response = await client.post(url, json=payload)
+        response.raise_for_status()
             
-            # n8n can sometimes return empty responses or JSON arrays
-            try:
-                return response.json()
-            except ValueError:
-                return response.text
+        # n8n can sometimes return empty responses or JSON arrays
+        try:
+            return response.json()
+        except ValueError:
+            return response.text
                 
     except httpx.HTTPStatusError as e:
         logger.error(f"n8n API Error ({e.response.status_code}): {e.response.text}")
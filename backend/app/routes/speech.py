@@ -1,17 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, Form, Query, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, StreamingResponse
-from app.services.sarvam import speech_to_text, text_to_speech, translate_text, transliterate_to_native_script, _is_tanglish
-import shutil
-import os
-import uuid
+from fastapi import APIRouter, UploadFile, File, Form, Query, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from app.services.sarvam import speech_to_text, cached_text_to_speech, stream_text_to_speech, tts_cache_key, translate_text, transliterate_to_native_script, _is_tanglish
+from app.core.config import get_settings
 from pydantic import BaseModel
 
 router = APIRouter()
+config = get_settings()
 
 class SpeakRequest(BaseModel):
     text: str
     language_code: str = "ta-IN" # Default to Tamil
     target_speaker_gender: str = "female" # optional
+    chunked: bool = False # Speak the full text (no 490-char cut), streamed progressively
 
 class TranslateRequest(BaseModel):
     text: str
@@ -31,32 +31,32 @@ def is_tamil(text: str) -> bool:
             return True
     return False
 
+def _check_upload_size(file: UploadFile):
+    """Rejects uploads over MAX_AUDIO_UPLOAD_BYTES (covers chunked bodies without Content-Length)."""
+    if file.size is not None and file.size > config.MAX_AUDIO_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio upload too large. Maximum is {config.MAX_AUDIO_UPLOAD_BYTES // (1024 * 1024)} MB.",
+        )
+
 @router.post("/transcribe")
 async def transcribe_audio(file: UploadFile = File(...), language_code: str = Query(..., description="Sarvam language code, e.g. ta-IN, hi-IN, pa-IN")):
     """
     Accepts an audio file upload and returns the transcription from Sarvam AI.
     """
-    # Create a temporary file to save the upload
-    temp_filename = f"temp_{uuid.uuid4()}_{file.filename}"
+    _check_upload_size(file)
     try:
-        with open(temp_filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        transcript = await speech_to_text(temp_filename, language_code)
+        transcript = await speech_to_text(file.file, language_code, filename=file.filename)
         
         return JSONResponse(content={"transcript": transcript, "language_code": language_code})
     
     except Exception as e:
         error_msg = str(e)
         if "duration greater than 30 seconds" in error_msg:
-             raise HTTPException(status_code=400, detail="Audio too long. Sarvam API only supports <30s for real-time. Use shorter audio.")
+             raise HTTPException(status_code=400, detail="Audio too long. Recordings over 30s are only supported as WAV uploads.")
         if "Sarvam API Error" in error_msg:
              raise HTTPException(status_code=400, detail=error_msg)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Clean up the temp file
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
 
 @router.post("/translate")
 async def translate(request: TranslateRequest):
@@ -79,13 +79,10 @@ async def process_audio(
     """
     Full workflow: Upload Audio -> STT -> Translate -> Return JSON.
     """
-    temp_filename = f"temp_{uuid.uuid4()}_{file.filename}"
+    _check_upload_size(file)
     try:
-        with open(temp_filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
         # 1. STT
-        transcript = await speech_to_text(temp_filename, source_language)
+        transcript = await speech_to_text(file.file, source_language, filename=file.filename)
 
         # 1b. Tanglish guard — if STT returned Latin text for a non-English language,
         #     convert it to native Indic script using Sarvam /transliterate
@@ -119,42 +116,118 @@ async def process_audio(
     except Exception as e:
         error_msg = str(e)
         if "duration greater than 30 seconds" in error_msg:
-             raise HTTPException(status_code=400, detail="Audio too long. Sarvam API only supports <30s for real-time. Use shorter audio.")
+             raise HTTPException(status_code=400, detail="Audio too long. Recordings over 30s are only supported as WAV uploads.")
         if "Sarvam API Error" in error_msg:
              raise HTTPException(status_code=400, detail=error_msg)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
+
+def _parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """Parses a single `bytes=start-end` range. Returns inclusive (start, end) or None if unsatisfiable."""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str == "":
+            # Suffix range: last N bytes
+            length = int(end_str)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+def _audio_response(request: Request, etag: str, audio: bytes) -> Response:
+    """
+    Serves cached audio with ETag revalidation and byte-range support,
+    so audio players can seek and re-request without another Sarvam call.
+    """
+    quoted_etag = f'"{etag}"'
+    headers = {
+        "ETag": quoted_etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=86400",
+    }
+    if quoted_etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == quoted_etag):
+        byte_range = _parse_range(range_header, len(audio))
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{len(audio)}"
+            return Response(status_code=416, headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(audio)}"
+        return Response(content=audio[start:end + 1], status_code=206, media_type="audio/wav", headers=headers)
+
+    return Response(content=audio, media_type="audio/wav", headers=headers)
+
+async def _progressive_audio_response(text: str, language_code: str) -> StreamingResponse:
+    """
+    Streams chunked TTS. The first chunk is awaited before responding so that
+    synthesis errors still surface as a proper HTTP error instead of a cut-off stream.
+    """
+    audio_stream = stream_text_to_speech(text, language_code)
+    first = await audio_stream.__anext__()
+
+    async def iterfile():
+        yield first
+        async for piece in audio_stream:
+            yield piece
+
+    return StreamingResponse(iterfile(), media_type="audio/wav")
 
 @router.post("/speak")
-async def speak_text(request: SpeakRequest):
+async def speak_text(request: SpeakRequest, http_request: Request):
     """
     Converts text to speech and returns an audio file.
+    With `chunked`, the whole text is spoken and audio starts streaming after the first sentence chunk.
     """
+    if request.chunked:
+        try:
+            return await _progressive_audio_response(request.text, request.language_code)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    etag = tts_cache_key(request.text, request.language_code)
+    if f'"{etag}"' in http_request.headers.get("if-none-match", ""):
+        return _audio_response(http_request, etag, b"")
     try:
-        audio_content = await text_to_speech(request.text, request.language_code)
-        
-        def iterfile():
-            yield audio_content
-            
-        return StreamingResponse(iterfile(), media_type="audio/wav")
+        etag, audio_content = await cached_text_to_speech(request.text, request.language_code)
+        return _audio_response(http_request, etag, audio_content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/stream")
-async def stream_text(text: str, language_code: str = Query(..., description="Sarvam language code, e.g. ta-IN, hi-IN, pa-IN")):
+async def stream_text(
+    http_request: Request,
+    text: str,
+    language_code: str = Query(..., description="Sarvam language code, e.g. ta-IN, hi-IN, pa-IN"),
+    chunked: bool = Query(False, description="Speak the full text, streaming audio chunk by chunk"),
+):
     """
     GET endpoint for instant streaming via audio players.
     """
     if not text:
         raise HTTPException(status_code=400, detail="Text is required")
+    if chunked:
+        try:
+            return await _progressive_audio_response(text, language_code)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    # Revalidation: the ETag is derived from the request, so a match needs no synthesis at all
+    etag = tts_cache_key(text, language_code)
+    if f'"{etag}"' in http_request.headers.get("if-none-match", ""):
+        return _audio_response(http_request, etag, b"")
     try:
-        audio_content = await text_to_speech(text, language_code)
-        
-        def iterfile():
-            yield audio_content
-            
-        return StreamingResponse(iterfile(), media_type="audio/wav")
+        etag, audio_content = await cached_text_to_speech(text, language_code)
+        return _audio_response(http_request, etag, audio_content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
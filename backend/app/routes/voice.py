@@ -0,0 +1,43 @@
+import json
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
+from app.core.config import get_settings
+from app.services.voice_pipeline import ask_events
+
+router = APIRouter()
+config = get_settings()
+
+@router.post("/ask")
+async def ask(
+    file: UploadFile = File(...),
+    source_language: str = Form("ta-IN"),
+):
+    """
+    One round trip for a spoken question: STT, translation, knowledge retrieval, answer and
+    TTS all run here instead of in the app. Streams newline-delimited JSON, one object per
+    partial result (transcript, translation, matches, answer, audio, done with timings).
+    """
+    if file.size is not None and file.size > config.MAX_AUDIO_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio upload too large. Maximum is {config.MAX_AUDIO_UPLOAD_BYTES // (1024 * 1024)} MB.",
+        )
+    audio = await file.read()
+    events = ask_events(audio, file.filename, source_language)
+    # The transcript is awaited before responding so STT errors still get a proper status code
+    try:
+        first = await events.__anext__()
+    except Exception as e:
+        error_msg = str(e)
+        if "duration greater than 30 seconds" in error_msg:
+            raise HTTPException(status_code=400, detail="Audio too long. Recordings over 30s are only supported as WAV uploads.")
+        if "Sarvam API Error" in error_msg:
+            raise HTTPException(status_code=400, detail=error_msg)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def lines():
+        yield json.dumps(first, ensure_ascii=False) + "\n"
+        async for event in events:
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
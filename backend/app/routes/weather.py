@@ -1,6 +1,7 @@
 import httpx
 from fastapi import APIRouter, HTTPException, Query
 from app.core.config import get_settings
+from app.services.http_clients import get_http_client
 import logging
 
 router = APIRouter()
@@ -22,16 +23,16 @@ async def get_current_weather(
     url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={config.OPENWEATHER_API_KEY}&units=metric"
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-            return {
-                "temperature": float(data.get("main", {}).get("temp", 0.0)),
-                "humidity": float(data.get("main", {}).get("humidity", 0.0)),
-                "latitude": lat,
-                "longitude": lon
-            }
+        client = get_http_client("openweather")
+        response = await client.get(url)
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "temperature": float(data.get("main", {}).get("temp", 0.0)),
+            "humidity": float(data.get("main", {}).get("humidity", 0.0)),
+            "latitude": lat,
+            "longitude": lon
+        }
     except httpx.HTTPStatusError as e:
         logger.error(f"OpenWeather API Error: {e.response.text}")
         raise HTTPException(status_code=e.response.status_code, detail="Error fetching weather data from OpenWeather.")
@@ -0,0 +1,132 @@
+import itertools
+import logging
+from dataclasses import dataclass, replace
+import numpy as np
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+from app.core.vectors import truncate_embedding
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def _normalize_language(language: str) -> str:
+    return language.strip().lower()
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    language: str
+    embedding: np.ndarray  # unit length
+    answer: str
+    generate_ms: float  # what the original Gemini call took
+    similarity: float = 1.0  # filled in on lookup
+
+
+@dataclass
+class _LanguageRows:
+    """Preallocated embedding matrix for one language: a put writes one row into spare capacity."""
+    matrix: np.ndarray  # (capacity, dimension); rows past len(ids) are unused
+    ids: list[int]  # entry id of each used row
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by the meaning of the question rather than its exact text. A lookup
+    embeds nothing itself: it takes the query embedding, scans the cached questions in the
+    same language and returns the closest one if its cosine similarity reaches `threshold`.
+
+    Entries live in an LRUCache (TTL + LRU eviction). Per language, the embeddings sit in
+    one preallocated matrix for the scan, and a put copies only its own row in. Rows whose
+    entry was evicted or expired are skipped on lookup, and dropped once the matrix is full:
+    it is compacted in place when at least half its rows are dead, and doubled otherwise.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: float | None, threshold: float):
+        self.entries = LRUCache(max_items=max_items, ttl_seconds=ttl_seconds)
+        self.threshold = threshold
+        self._ids = itertools.count()
+        self._rows: dict[str, _LanguageRows] = {}
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self.purged = 0
+
+    def _make_room(self, rows: _LanguageRows):
+        """Called when every row is used: O(rows) work once per O(rows) puts."""
+        live = [row for row, entry_id in enumerate(rows.ids) if entry_id in self.entries]
+        if len(live) <= len(rows.ids) // 2:
+            rows.matrix[: len(live)] = rows.matrix[live]
+            rows.ids = [rows.ids[row] for row in live]
+        else:
+            matrix = np.empty((2 * len(rows.matrix), rows.matrix.shape[1]), dtype=rows.matrix.dtype)
+            matrix[: len(rows.ids)] = rows.matrix
+            rows.matrix = matrix
+
+    def lookup(self, embedding: np.ndarray, language: str) -> CachedAnswer | None:
+        language = _normalize_language(language)
+        rows = self._rows.get(language)
+        if rows is not None and rows.ids and rows.matrix.shape[1] == embedding.shape[-1]:
+            ids, matrix = rows.ids, rows.matrix[: len(rows.ids)]
+            scores = matrix @ truncate_embedding(embedding, embedding.shape[-1])
+            for row in np.argsort(-scores):
+                if scores[row] < self.threshold:
+                    break
+                entry = self.entries.get(ids[row])  # Also refreshes its LRU position
+                if entry is not None:
+                    self.hits += 1
+                    self.saved_ms += entry.generate_ms
+                    return replace(entry, similarity=float(scores[row]))
+        self.misses += 1
+        return None
+
+    def put(self, query: str, language: str, embedding: np.ndarray, answer: str, generate_ms: float):
+        language = _normalize_language(language)
+        embedding = truncate_embedding(embedding, embedding.shape[-1])
+        entry_id = next(self._ids)
+        self.entries.put(entry_id, CachedAnswer(query, language, embedding, answer, generate_ms))
+        rows = self._rows.get(language)
+        if rows is None or rows.matrix.shape[1] != embedding.shape[-1]:
+            rows = self._rows[language] = _LanguageRows(np.empty((64, embedding.shape[-1]), dtype=embedding.dtype), [])
+        if len(rows.ids) == len(rows.matrix):
+            self._make_room(rows)
+        rows.matrix[len(rows.ids)] = embedding
+        rows.ids.append(entry_id)
+
+    def purge(self, language: str | None = None) -> int:
+        """Drops every entry, or only those in `language`. Returns how many were removed."""
+        if language is None:
+            count = len(self.entries)
+            self.entries.clear()
+            self._rows.clear()
+        else:
+            language = _normalize_language(language)
+            stale = [entry_id for entry_id, entry in self.entries.items() if entry.language == language]
+            for entry_id in stale:
+                self.entries.pop(entry_id)
+            count = len(stale)
+            self._rows.pop(language, None)
+        self.purged += count
+        logger.info(f"Answer cache: purged {count} entries ({language or 'all languages'}).")
+        return count
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self.entries),
+            "evictions": self.entries.evictions,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_ms": round(self.saved_ms, 1),
+            "purged": self.purged,
+        }
+
+
+answer_cache = SemanticAnswerCache(
+    max_items=config.ANSWER_CACHE_MAX_ITEMS,
+    ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+    threshold=config.ANSWER_CACHE_THRESHOLD,
+)
@@ -0,0 +1,110 @@
+import asyncio
+import base64
+import logging
+import time
+from typing import AsyncIterator
+from app.core.config import get_settings
+from app.services.gemini import gemini_service
+from app.services.sarvam import cached_text_to_speech, _split_for_tts
+from app.services.translation_memory import split_sentences
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+
+async def _single(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+async def answer_events(
+    query: str,
+    language: str = "English",
+    language_code: str | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streams an answer as (event, data) pairs:
+
+        token   {"text"}                        a piece of the answer, as Gemini produces it
+        audio   {"index", "text", "audio"}      base64 WAV of the next sentence (only with language_code)
+        error   {"stage", "detail"}             "answer" ends the stream; "tts" only skips that sentence
+        done    {"answer", "cached", ...}       the full answer text
+
+    With `language_code`, every sentence is sent to TTS as soon as its end has streamed in,
+    while the rest of the answer keeps generating; audio events go out in sentence order.
+    Near-identical earlier questions are answered from the semantic answer cache in one piece.
+    """
+    hit, embedding = await gemini_service.lookup_cached_answer(query, language)
+    pieces = _single(hit.answer) if hit is not None else gemini_service.stream_answer(query, language)
+    semaphore = asyncio.Semaphore(config.TTS_MAX_PARALLEL_CHUNKS)
+
+    async def speak(text: str) -> bytes:
+        async with semaphore:
+            _, audio = await cached_text_to_speech(text, language_code)
+            return audio
+
+    speech: list[tuple[str, asyncio.Task]] = []  # in sentence order, not yet sent
+
+    def queue_speech(sentence: str):
+        # Also breaks sentences over Sarvam's per-input limit, and skips markdown-only lines
+        for chunk in _split_for_tts(sentence, config.TTS_CHUNK_MAX_CHARS):
+            speech.append((chunk, asyncio.create_task(speak(chunk))))
+
+    answer, pending, sent = [], "", 0
+    started = time.perf_counter()
+    next_piece: asyncio.Future | None = asyncio.ensure_future(pieces.__anext__())
+    try:
+        while next_piece is not None or speech:
+            waiting = {next_piece} if next_piece is not None else set()
+            if speech:
+                waiting.add(speech[0][1])
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            while speech and speech[0][1].done():
+                text, task = speech.pop(0)
+                try:
+                    audio = task.result()
+                except Exception as e:
+                    logger.warning(f"Streamed answer TTS failed for sentence {sent}: {e}")
+                    yield "error", {"stage": "tts", "index": sent, "detail": str(e)}
+                else:
+                    yield "audio", {"index": sent, "text": text, "audio": base64.b64encode(audio).decode("ascii")}
+                sent += 1
+
+            if next_piece not in done:
+                continue
+            try:
+                piece = next_piece.result()
+            except StopAsyncIteration:
+                next_piece = None
+                if language_code and pending.strip():
+                    queue_speech(pending)
+                continue
+            except Exception as e:
+                logger.error(f"Gemini Streaming Answer Error: {e}")
+                next_piece = None
+                yield "error", {"stage": "answer", "detail": str(e)}
+                return
+            answer.append(piece)
+            yield "token", {"text": piece}
+            if language_code:
+                # Every segment but the last is complete once its separator has streamed in
+                sentences, _ = split_sentences(pending + piece)
+                for sentence in sentences[:-1]:
+                    if sentence.strip():
+                        queue_speech(sentence)
+                pending = sentences[-1]
+            next_piece = asyncio.ensure_future(pieces.__anext__())
+
+        text = "".join(answer)
+        if hit is not None:
+            yield "done", {"answer": text, "cached": True, "similarity": round(hit.similarity, 4)}
+        else:
+            gemini_service.remember_answer(query, language, embedding, text, (time.perf_counter() - started) * 1000)
+            yield "done", {"answer": text, "cached": False}
+    finally:
+        # Client went away or the answer failed: stop paying for generation and speech
+        tasks = [task for _, task in speech] + ([next_piece] if next_piece is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await pieces.aclose()
@@ -0,0 +1,104 @@
+import io
+import struct
+import wave
+from typing import NamedTuple
+import numpy as np
+
+# Data-chunk size used when the total length isn't known yet (progressive streaming).
+# Players treat it as "read until EOF".
+STREAMING_DATA_SIZE = 0xFFFFFFFF
+
+
+class PCMFormat(NamedTuple):
+    channels: int
+    sample_width: int  # bytes per sample
+    sample_rate: int
+
+
+def read_wav(data: bytes) -> tuple[PCMFormat, bytes]:
+    """Splits a PCM WAV file into its format and raw frames."""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        fmt = PCMFormat(wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+        frames = wav.readframes(wav.getnframes())
+    return fmt, frames
+
+
+def wav_header(fmt: PCMFormat, data_size: int | None = None) -> bytes:
+    """
+    Builds a 44-byte PCM WAV header. Without `data_size` the header is written
+    for a stream of unknown length.
+    """
+    if data_size is None:
+        data_size = STREAMING_DATA_SIZE
+        riff_size = STREAMING_DATA_SIZE
+    else:
+        riff_size = 36 + data_size
+    block_align = fmt.channels * fmt.sample_width
+    return (
+        b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+        + b"fmt " + struct.pack(
+            "<IHHIIHH", 16, 1, fmt.channels, fmt.sample_rate,
+            fmt.sample_rate * block_align, block_align, fmt.sample_width * 8,
+        )
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+def write_wav(fmt: PCMFormat, frames: bytes) -> bytes:
+    """Wraps raw frames in a complete WAV file."""
+    return wav_header(fmt, len(frames)) + frames
+
+
+def is_wav(header: bytes) -> bool:
+    return len(header) >= 12 and header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+
+
+def duration_seconds(fmt: PCMFormat, frames: bytes) -> float:
+    return len(frames) / (fmt.channels * fmt.sample_width * fmt.sample_rate)
+
+
+def _frame_energy(fmt: PCMFormat, frames: bytes, window: int) -> np.ndarray:
+    """RMS energy per `window` samples of the mono mix-down."""
+    dtypes = {1: np.uint8, 2: np.int16, 4: np.int32}
+    if fmt.sample_width not in dtypes:
+        raise ValueError(f"Unsupported sample width: {fmt.sample_width}")
+    samples = np.frombuffer(frames, dtype=dtypes[fmt.sample_width]).astype(np.float32)
+    if fmt.sample_width == 1:
+        samples -= 128.0  # 8-bit WAV is unsigned
+    samples = samples[: len(samples) - len(samples) % fmt.channels].reshape(-1, fmt.channels).mean(axis=1)
+    n_windows = len(samples) // window
+    if n_windows == 0:
+        return np.zeros(0, dtype=np.float32)
+    windows = samples[: n_windows * window].reshape(n_windows, window)
+    return np.sqrt((windows ** 2).mean(axis=1))
+
+
+def split_on_silence(
+    fmt: PCMFormat,
+    frames: bytes,
+    max_seconds: float,
+    search_seconds: float = 5.0,
+    window_ms: int = 20,
+) -> list[bytes]:
+    """
+    Cuts PCM frames into segments no longer than `max_seconds`. Each cut is placed at
+    the quietest window within the last `search_seconds` before the limit, so words
+    aren't split mid-syllable. Returns the raw frames of each segment, in order.
+    """
+    window = max(1, fmt.sample_rate * window_ms // 1000)  # samples per energy window
+    bytes_per_sample = fmt.channels * fmt.sample_width
+    energy = _frame_energy(fmt, frames, window)
+    max_windows = int(max_seconds * 1000 // window_ms)
+    search_windows = min(int(search_seconds * 1000 // window_ms), max_windows - 1)
+
+    total_samples = len(frames) // bytes_per_sample
+    segments = []
+    start = 0  # in windows
+    while (total_samples - start * window) > max_windows * window:
+        lo = start + max_windows - search_windows
+        hi = start + max_windows
+        cut = lo + int(np.argmin(energy[lo:hi]))
+        segments.append(frames[start * window * bytes_per_sample: cut * window * bytes_per_sample])
+        start = cut
+    segments.append(frames[start * window * bytes_per_sample:])
+    return segments
@@ -0,0 +1,154 @@
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+
+config = get_settings()
+
+
+def _bucket(value: float, step: float) -> int:
+    """Index of the `step`-wide bin centred on a multiple of step (round half up, not to even)."""
+    return math.floor(value / step + 0.5)
+
+
+class _OwnerCancelled(Exception):
+    """Set on the shared future when the request fetching it was cancelled."""
+
+
+class CropAnalysisCache:
+    """
+    Groq's crop advice keyed by quantized inputs. Soil values are only meaningful to a few
+    kg/ha, and farmers in the same block share an OpenWeather cell, so requests whose
+    N/P/K, pH, temperature, humidity and rainfall fall in the same bins (and have the same
+    ML-predicted crop, scorer ranking and language) share the same advice text.
+
+    Only the narrative is cached, as {crop name (lowercase): advice fields}. The ranking,
+    scores and risk fields are computed per request and the narrative is merged onto them
+    by crop name, so a hit never hands one farmer's numbers to another.
+
+    Entries live in an LRUCache (TTL + LRU eviction). Concurrent misses for the same key
+    share one upstream call (singleflight), so a burst from one village costs one Groq call.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: float | None, steps: dict[str, float]):
+        self.cache = LRUCache(max_items=max_items, ttl_seconds=ttl_seconds)
+        self.steps = steps
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_ms = 0.0
+
+    def key(
+        self,
+        predicted_top_crop: str,
+        nitrogen: float,
+        phosphorus: float,
+        potassium: float,
+        ph: float,
+        rainfall: float,
+        temperature: float,
+        humidity: float,
+        language_code: str,
+        crops: list[str],
+    ) -> tuple:
+        steps = self.steps
+        return (
+            _bucket(nitrogen, steps["npk"]),
+            _bucket(phosphorus, steps["npk"]),
+            _bucket(potassium, steps["npk"]),
+            _bucket(ph, steps["ph"]),
+            _bucket(temperature, steps["temperature"]),
+            _bucket(humidity, steps["humidity"]),
+            _bucket(rainfall, steps["rainfall"]),
+            (predicted_top_crop or "").strip().lower(),
+            (language_code or "en").strip().lower()[:2],  # _language_name only looks at the first two letters
+            tuple(crop.lower() for crop in crops),
+        )
+
+    def _hit(self, cached: tuple[dict[str, dict], float]) -> dict[str, dict]:
+        narrative, generate_ms = cached
+        self.hits += 1
+        self.saved_ms += generate_ms
+        return narrative
+
+    def get(self, key: tuple) -> dict[str, dict] | None:
+        """Plain lookup (no coalescing), for callers that fetch in their own way, like streaming."""
+        cached = self.cache.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+        return self._hit(cached)
+
+    def put(self, key: tuple, narrative: dict[str, dict], generate_ms: float):
+        if isinstance(narrative, dict) and narrative:
+            self.cache.put(key, (narrative, generate_ms))
+
+    async def get_or_fetch(self, key: tuple, fetch: Callable[[], Awaitable[dict[str, dict]]]) -> dict[str, dict]:
+        while True:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._hit(cached)
+            future = self._inflight.get(key)
+            if future is None:
+                return await self._fetch(key, fetch)
+            self.coalesced += 1
+            try:
+                narrative, generate_ms = await asyncio.shield(future)
+            except _OwnerCancelled:
+                # The request that was fetching went away; retry (and likely become the owner)
+                self.coalesced -= 1
+                continue
+            self.saved_ms += generate_ms
+            return narrative
+
+    async def _fetch(self, key: tuple, fetch: Callable[[], Awaitable[dict[str, dict]]]) -> dict[str, dict]:
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        started = time.perf_counter()
+        try:
+            narrative = await fetch()
+            generate_ms = (time.perf_counter() - started) * 1000
+            self.put(key, narrative, generate_ms)
+            future.set_result((narrative, generate_ms))
+            return narrative
+        except asyncio.CancelledError:
+            # Only this request was cancelled: waiters retry instead of being cancelled too
+            future.set_exception(_OwnerCancelled())
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if future.done():
+                future.exception()  # Retrieved here in case nobody else was waiting
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "items": len(self.cache),
+            "evictions": self.cache.evictions,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "saved_ms": round(self.saved_ms, 1),
+            "steps": self.steps,
+        }
+
+
+crop_cache = CropAnalysisCache(
+    max_items=config.CROP_CACHE_MAX_ITEMS,
+    ttl_seconds=config.CROP_CACHE_TTL_SECONDS,
+    steps={
+        "npk": config.CROP_CACHE_NPK_STEP,
+        "ph": config.CROP_CACHE_PH_STEP,
+        "temperature": config.CROP_CACHE_TEMPERATURE_STEP,
+        "humidity": config.CROP_CACHE_HUMIDITY_STEP,
+        "rainfall": config.CROP_CACHE_RAINFALL_STEP,
+    },
+)
@@ -0,0 +1,145 @@
+import csv
+import logging
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CROP_PROFILES_CSV = Path(__file__).resolve().parents[2] / "crop_prediction_backend" / "Crop_classification.csv"
+
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+FEATURE_NAMES = ["Nitrogen", "Phosphorus", "Potassium", "Temperature", "Humidity", "Soil pH", "Rainfall"]
+FEATURE_UNITS = [" kg/ha", " kg/ha", " kg/ha", " C", "%", "", " mm"]
+
+# CSV label -> the name the app shows (same spelling the Groq prompt always used)
+DISPLAY_NAMES = {
+    "kidneybeans": "KidneyBeans",
+    "pigeonpeas": "PigeonPeas",
+    "mothbeans": "MothBeans",
+    "mungbean": "MungBean",
+    "blackgram": "BlackGram",
+}
+
+LOW_RISK_SCORE = 0.70
+HIGH_RISK_SCORE = 0.40
+
+
+def load_profiles_csv(path: Path = CROP_PROFILES_CSV) -> tuple[np.ndarray, list[str]]:
+    """Feature matrix (rows, 7) in FEATURES order and the lowercased crop label of each row."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    X = np.array([[float(row[name]) for name in FEATURES] for row in rows])
+    return X, [row["label"].strip().lower() for row in rows]
+
+
+def risk_level(score: float) -> str:
+    if score >= LOW_RISK_SCORE:
+        return "Low"
+    return "Medium" if score >= HIGH_RISK_SCORE else "High"
+
+
+class CropScorer:
+    """
+    Ranks all crops for a set of soil and weather values, without an LLM.
+
+    Each crop's profile is derived from the Crop_classification.csv rows for that crop: the
+    5th-95th percentile of every feature is its "usual range", and its standard deviation
+    (floored, so tightly clustered features don't explode) is the unit of distance. A value
+    inside the range is distance 0; outside, it's how many of those units it is off.
+
+        confidence_score  exp(-mean(distance^2) / 2) over the 7 features, 1.0 = all in range
+        risk_level        Low >= 0.70, Medium >= 0.40, otherwise High
+        risk_cause        the feature with the largest distance (or, when everything is in
+                          range, the one furthest from the crop's median)
+
+    Ties (several crops with every value in range) are broken by closeness to the medians.
+    Everything is one broadcast over (rows, crops, features), so batches cost the same call.
+    """
+
+    def __init__(self, X: np.ndarray, labels: list[str]):
+        self.labels = sorted(set(labels))
+        self.crops = [DISPLAY_NAMES.get(label, label.capitalize()) for label in self.labels]
+        y = np.array([self.labels.index(label) for label in labels])
+        groups = [X[y == c] for c in range(len(self.labels))]
+        self.low = np.stack([np.percentile(g, 5, axis=0) for g in groups])  # (crops, features)
+        self.high = np.stack([np.percentile(g, 95, axis=0) for g in groups])
+        self.median = np.stack([np.median(g, axis=0) for g in groups])
+        self.scale = np.maximum(np.stack([g.std(axis=0) for g in groups]), 0.05 * X.std(axis=0))
+        self.width = np.maximum(self.high - self.low, 1e-9)
+
+    @classmethod
+    def from_csv(cls, path: Path = CROP_PROFILES_CSV) -> "CropScorer":
+        return cls(*load_profiles_csv(path))
+
+    def score(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        values: (rows, 7) in FEATURES order. Returns (confidence (rows, crops), ranking
+        (rows, crops) of crop indices best first, signed distances (rows, crops, features)).
+        """
+        x = np.asarray(values, dtype=np.float64)[:, None, :]
+        below = (self.low - x) / self.scale
+        above = (x - self.high) / self.scale
+        distance = np.where(above > 0, above, np.where(below > 0, -below, 0.0))  # > 0 too high, < 0 too low
+        mismatch = (distance ** 2).mean(axis=-1)
+        confidence = np.exp(-0.5 * mismatch)
+        off_center = np.minimum(np.abs(x - self.median) / self.width, 1.0).mean(axis=-1)
+        # Ranked on mismatch rather than confidence, which underflows to 0 for far-off values
+        ranking = np.lexsort((off_center, mismatch), axis=-1)
+        return confidence, ranking, distance
+
+    def _risk_cause(self, crop: int, values: np.ndarray, distance: np.ndarray) -> str:
+        name = self.crops[crop]
+        if np.any(distance):
+            f = int(np.argmax(np.abs(distance)))
+            direction = "too high" if distance[f] > 0 else "too low"
+        else:
+            f = int(np.argmax(np.abs(values - self.median[crop]) / self.width[crop]))
+            direction = "within range but furthest from ideal"
+        unit = FEATURE_UNITS[f]
+        return (
+            f"{FEATURE_NAMES[f]} is {direction} for {name} "
+            f"({values[f]:g}{unit}; usual {self.low[crop, f]:.1f}-{self.high[crop, f]:.1f}{unit})."
+        )
+
+    def _why_suitable(self, crop: int, distance: np.ndarray) -> str:
+        matching = [FEATURE_NAMES[f] for f in range(len(FEATURES)) if distance[f] == 0]
+        if not matching:
+            return f"None of the values are within the usual range for {self.crops[crop]}."
+        return f"{', '.join(matching)} {'is' if len(matching) == 1 else 'are'} within the usual range for {self.crops[crop]}."
+
+    def top_crops(self, values: np.ndarray, count: int = 5) -> list[list[dict]]:
+        """Top `count` crops per row, in the /crop/analyze result shape (without Groq's advice lists)."""
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        confidence, ranking, distance = self.score(values)
+        results = []
+        for row in range(len(values)):
+            crops = []
+            for crop in ranking[row, :count]:
+                crop = int(crop)
+                score = round(float(confidence[row, crop]), 3)
+                crops.append({
+                    "crop": self.crops[crop],
+                    "confidence_score": score,
+                    "risk_level": risk_level(score),
+                    "risk_cause": self._risk_cause(crop, values[row], distance[row, crop]),
+                    "why_suitable": self._why_suitable(crop, distance[row, crop]),
+                    "improvement_steps": [],
+                    "planting_advice": [],
+                })
+            results.append(crops)
+        return results
+
+    def profile_lines(self, crops: list[str]) -> str:
+        """Usual ranges of the given crops, one line each, for the narrative prompt."""
+        lines = []
+        for name in crops:
+            c = self.crops.index(name)
+            ranges = ", ".join(
+                f"{feature}={self.low[c, f]:.3g}-{self.high[c, f]:.3g}" for f, feature in enumerate(FEATURES)
+            )
+            lines.append(f"- {name}: {ranges}")
+        return "\n".join(lines)
+
+
+crop_scorer = CropScorer.from_csv()
+logger.info(f"Crop scorer: {len(crop_scorer.crops)} crop profiles from {CROP_PROFILES_CSV.name}")
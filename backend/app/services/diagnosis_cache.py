@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class DiagnosisCache:
+    """
+    Crop diagnoses keyed by what the photo looks like. An image matches an earlier one when
+    both its pHash and dHash are within the configured Hamming distances and it was sent with
+    the same query text and language, so a resent or forwarded photo (recompressed, resized,
+    lightly cropped) reuses the earlier Gemini diagnosis.
+
+    Entries sit in an LRUCache (bounded, LRU order) with a wall-clock TTL so it survives
+    restarts. They are persisted as an append-only JSON-lines file that is replayed on
+    startup and compacted once it holds twice as many lines as live entries.
+    """
+
+    def __init__(self, path: str, max_items: int, ttl_seconds: float, phash_distance: int, dhash_distance: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.phash_distance = phash_distance
+        self.dhash_distance = dhash_distance
+        self.entries = LRUCache(max_items=max_items)  # id -> entry dict
+        self._next_id = 0
+        self._log_lines = 0
+        self._write_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.unhashed = 0
+        self._load()
+
+    def _expired(self, entry: dict) -> bool:
+        return time.time() - entry["created"] > self.ttl_seconds
+
+    def _load(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    self._log_lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line after a crash
+                    if not self._expired(entry):
+                        self._insert(entry)
+            logger.info(f"Diagnosis cache: {len(self.entries)} entries from {self.path}")
+        except OSError as e:
+            logger.warning(f"Diagnosis cache file unavailable ({e}). Keeping entries in memory only.")
+            self.path = None
+
+    def _insert(self, entry: dict):
+        self.entries.put(self._next_id, entry)
+        self._next_id += 1
+
+    def lookup(self, phash: int | None, dhash: int | None, query: str, language: str) -> str | None:
+        """Cached diagnosis for a near-duplicate photo with the same query and language, or None."""
+        if phash is None or dhash is None:
+            self.unhashed += 1
+            return None
+        query, language = _normalize(query), _normalize(language)
+        best_id, best_distance = None, None
+        for entry_id, entry in self.entries.items():
+            if entry["query"] != query or entry["language"] != language or self._expired(entry):
+                continue
+            p = (entry["phash"] ^ phash).bit_count()
+            d = (entry["dhash"] ^ dhash).bit_count()
+            if p <= self.phash_distance and d <= self.dhash_distance and (best_distance is None or p + d < best_distance):
+                best_id, best_distance = entry_id, p + d
+        if best_id is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.entries.get(best_id)["analysis"]  # get() also marks it recently used
+
+    async def put(self, phash: int | None, dhash: int | None, query: str, language: str, analysis: str):
+        if phash is None or dhash is None:
+            return
+        entry = {
+            "phash": phash,
+            "dhash": dhash,
+            "query": _normalize(query),
+            "language": _normalize(language),
+            "analysis": analysis,
+            "created": time.time(),
+        }
+        self._insert(entry)
+        if self.path is None:
+            return
+        try:
+            async with self._write_lock:
+                if self._log_lines + 1 > 2 * max(len(self.entries), 1) and self._log_lines > 100:
+                    live = [e for _, e in self.entries.items() if not self._expired(e)]
+                    await asyncio.to_thread(self._rewrite, live)
+                else:
+                    await asyncio.to_thread(self._append, entry)
+        except OSError as e:
+            logger.warning(f"Diagnosis cache write failed: {e}")
+
+    def _append(self, entry: dict):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._log_lines += 1
+
+    def _rewrite(self, entries: list[dict]):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        self._log_lines = len(entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self.entries),
+            "evictions": self.entries.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "unhashed": self.unhashed,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "log_lines": self._log_lines,
+        }
+
+
+diagnosis_cache = DiagnosisCache(
+    path=config.DIAGNOSIS_CACHE_PATH,
+    max_items=config.DIAGNOSIS_CACHE_MAX_ITEMS,
+    ttl_seconds=config.DIAGNOSIS_CACHE_TTL_SECONDS,
+    phash_distance=config.DIAGNOSIS_CACHE_PHASH_DISTANCE,
+    dhash_distance=config.DIAGNOSIS_CACHE_DHASH_DISTANCE,
+)
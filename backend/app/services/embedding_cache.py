@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC with whitespace collapsed, so trivially different inputs share an entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Cache for Gemini embeddings, keyed by (normalized text, task type, model, dimensionality).
+    Tier 1 is a byte-bounded in-memory LRU of float32 arrays, tier 2 a size-capped directory
+    of .npy files stored as `disk_dtype` (float16 halves the footprint at ~1e-3 precision).
+    """
+
+    def __init__(self, directory: str, memory_max_bytes: int, disk_max_bytes: int, disk_dtype: str = "float16"):
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_dtype = np.dtype(disk_dtype)
+        self.memory = LRUCache(max_items=1_000_000, max_bytes=memory_max_bytes, sizeof=lambda a: a.nbytes)
+        # key -> file size, ordered by last access (oldest first)
+        self._disk_index: OrderedDict[str, int] = OrderedDict()
+        self.disk_bytes = 0
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self.misses = 0
+        self._load_disk_index()
+
+    @staticmethod
+    def make_key(text: str, task_type: str, model: str, dimension: int) -> str:
+        raw = "\x1f".join([normalize_text(text), task_type, model, str(dimension)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def _load_disk_index(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith(".npy"):
+                    st = os.stat(os.path.join(self.directory, name))
+                    entries.append((st.st_mtime, name[:-4], st.st_size))
+            for _, key, size in sorted(entries):
+                self._disk_index[key] = size
+                self.disk_bytes += size
+            logger.info(f"Embedding cache: {len(self._disk_index)} files ({self.disk_bytes} bytes) in {self.directory}")
+        except OSError as e:
+            logger.warning(f"Embedding disk cache unavailable ({e}). Using memory tier only.")
+            self.disk_max_bytes = 0
+
+    def _read_file(self, key: str) -> np.ndarray:
+        path = self._path(key)
+        vector = np.load(path, allow_pickle=False).astype(np.float32)
+        os.utime(path)  # Bump mtime so LRU order survives restarts
+        vector.flags.writeable = False
+        return vector
+
+    def _write_file(self, key: str, data: bytes, evict: list[str]):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        for old_key in evict:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+
+    async def get(self, key: str) -> np.ndarray | None:
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector
+        if key in self._disk_index:
+            try:
+                vector = await asyncio.to_thread(self._read_file, key)
+            except (OSError, ValueError):
+                self.disk_bytes -= self._disk_index.pop(key)
+            else:
+                self._disk_index.move_to_end(key)
+                self.disk_hits += 1
+                self.memory.put(key, vector)
+                return vector
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, vector: np.ndarray):
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False  # Hits hand out the cached array itself
+        self.memory.put(key, vector)
+        if key in self._disk_index:
+            return
+        buffer = io.BytesIO()
+        np.save(buffer, vector.astype(self.disk_dtype), allow_pickle=False)
+        data = buffer.getvalue()
+        if len(data) > self.disk_max_bytes:
+            return
+        self._disk_index[key] = len(data)
+        self.disk_bytes += len(data)
+        evict = []
+        while self.disk_bytes > self.disk_max_bytes:
+            old_key, size = self._disk_index.popitem(last=False)
+            self.disk_bytes -= size
+            self.disk_evictions += 1
+            evict.append(old_key)
+        try:
+            await asyncio.to_thread(self._write_file, key, data, evict)
+        except OSError as e:
+            logger.warning(f"Embedding disk cache write failed: {e}")
+            if self._disk_index.pop(key, None) is not None:
+                self.disk_bytes -= len(data)
+
+    def stats(self) -> dict:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + self.disk_hits + self.misses
+        return {
+            "memory": memory,
+            "disk": {
+                "items": len(self._disk_index),
+                "bytes": self.disk_bytes,
+                "max_bytes": self.disk_max_bytes,
+                "dtype": self.disk_dtype.name,
+                "hits": self.disk_hits,
+                "evictions": self.disk_evictions,
+            },
+            "misses": self.misses,
+            "hit_rate": round((memory["hits"] + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+embedding_cache = EmbeddingCache(
+    directory=config.EMBEDDING_CACHE_DIR,
+    memory_max_bytes=config.EMBEDDING_CACHE_MEMORY_MAX_BYTES,
+    disk_max_bytes=config.EMBEDDING_CACHE_DISK_MAX_BYTES,
+    disk_dtype=config.EMBEDDING_CACHE_DISK_DTYPE,
+)
@@ -1,15 +1,81 @@
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable
+import numpy as np
 import google.generativeai as genai
+from google.generativeai import client as genai_client
 from app.core.config import get_settings
+from app.core.batching import MicroBatcher
+from app.core.concurrency import ConcurrencyLimiter
+from app.core.vectors import truncate_embedding
+from app.services.key_pool import KeyPool
+from app.services.embedding_cache import embedding_cache
+from app.services.answer_cache import answer_cache
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+def _error_status(e: Exception) -> int | None:
+    """Maps a Gemini SDK exception to the HTTP status the key pool understands."""
+    error_str = str(e).lower()
+    if "429" in error_str or "quota" in error_str or "limit" in error_str or "resource has been exhausted" in error_str:
+        return 429
+    if "api key not valid" in error_str or "permission denied" in error_str or "403" in error_str:
+        return 403
+    return None
+
+def _chunk_text(chunk) -> str:
+    """Text of one streamed response chunk (`chunk.text` raises on chunks without parts)."""
+    if not chunk.candidates:
+        return ""
+    return "".join(part.text for part in chunk.candidates[0].content.parts if part.text)
+
+GEMINI_MODEL = 'gemini-2.5-flash'
+EMBEDDING_MODEL = 'models/gemini-embedding-001'
+EMBEDDING_FALLBACK_MODEL = 'models/embedding-001'
+EMBEDDING_NATIVE_DIMENSION = 3072
+EMBEDDING_DIMENSION = settings.EMBEDDING_DIMENSION
+
+class _KeyClients:
+    """
+    Model and API clients bound to a single key. genai.configure() mutates process-global
+    state, so instead each key gets its own client manager and the model is pointed at it.
+    Clients are created lazily, inside the running event loop.
+    """
+
+    def __init__(self, key: str):
+        self._manager = genai_client._ClientManager()
+        self._manager.configure(api_key=key)
+        self._model = None
+
+    @property
+    def model(self) -> genai.GenerativeModel:
+        if self._model is None:
+            self._model = genai.GenerativeModel(GEMINI_MODEL)
+            self._model._client = self._manager.get_default_client("generative")
+            self._model._async_client = self._manager.get_default_client("generative_async")
+        return self._model
+
+    @property
+    def generative_async_client(self):
+        return self._manager.get_default_client("generative_async")
+
 class GeminiService:
     def __init__(self):
         self.api_keys = []
-        self.current_key_index = 0
         self._initialize_keys()
+        # Concurrent requests are dispatched to the least-loaded healthy key
+        self.key_pool = KeyPool("Gemini", self.api_keys)
+        self._key_clients = {key: _KeyClients(key) for key in self.key_pool.keys}
+        # Embedding calls run on the async gRPC client and are capped so bursts queue here
+        self.embedding_limiter = ConcurrencyLimiter(settings.EMBEDDING_MAX_CONCURRENCY)
+        # Concurrent single-text embedding requests are coalesced into one batch call
+        self.embedding_batcher = MicroBatcher(
+            lambda task_type, texts: self._embed_misses(texts, task_type),
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_seconds=settings.EMBEDDING_BATCH_MAX_WAIT_MS / 1000,
+        )
 
     def _initialize_keys(self):
         # Support comma-separated keys for rotation
@@ -21,53 +87,122 @@ class GeminiService:
             
         if not self.api_keys:
             logger.warning("No Gemini API keys found in config.")
-            return
-
-        self._configure_model()
-
-    def _configure_model(self):
-        if not self.api_keys:
-            return
-            
-        key = self.api_keys[self.current_key_index]
-        genai.configure(api_key=key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-        logger.info(f"GeminiService configured with key index: {self.current_key_index}")
-
-    def _rotate_key(self):
-        if len(self.api_keys) <= 1:
-            return
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        logger.info(f"Rotating Gemini API Key to index: {self.current_key_index}")
-        self._configure_model()
 
     async def _generate_with_retry(self, prompt, max_retries=3):
         attempt = 0
         while attempt < max_retries:
+            # The pool skips keys that are cooling down after a 429, and fails fast if all are
+            key = self.key_pool.acquire()
+            acquired_at = time.monotonic()
+            status_code = None
             try:
-                response = await self.model.generate_content_async(prompt)
+                model = self._key_clients[key].model
+                response = await model.generate_content_async(prompt)
+                status_code = 200
                 return response.text
             except Exception as e:
                 attempt += 1
-                error_str = str(e).lower()
-                
+                status_code = _error_status(e)
+
                 # Check for rate limit or quota exhausted
-                if "429" in error_str or "quota" in error_str or "limit" in error_str or "resource has been exhausted" in error_str:
-                    logger.warning(f"Gemini Rate Limit hit (Attempt {attempt}). Rotating key...")
-                    self._rotate_key()
+                if status_code == 429:
+                    logger.warning(f"Gemini Rate Limit hit (Attempt {attempt}). Trying another key...")
                 else:
                     raise e
+            finally:
+                self.key_pool.release(key, status_code, acquired_at)
         
         raise Exception(f"Gemini Rate Limit Exceeded after {max_retries} retries (Keys rotated).")
 
+    @staticmethod
+    def _answer_prompt(query: str, language: str) -> str:
+        return f'Provide a clear, simple agricultural solution for this farmer question: "{query}". Keep the answer concise and easy to understand for a farmer. The answer MUST be in {language} language.'
+
     async def generate_answer(self, query: str, language: str = "English") -> str:
-        prompt = f'Provide a clear, simple agricultural solution for this farmer question: "{query}". Keep the answer concise and easy to understand for a farmer. The answer MUST be in {language} language.'
         try:
-            return await self._generate_with_retry(prompt)
+            return await self._generate_with_retry(self._answer_prompt(query, language))
         except Exception as e:
             logger.error(f"Gemini Multi-turn Answer Error: {e}")
             return f"DEBUG ERROR: {type(e).__name__} - {str(e)}"
 
+    async def generate_answer_cached(
+        self, query: str, language: str = "English", embedding: Awaitable | None = None
+    ) -> tuple[str, float | None]:
+        """
+        generate_answer behind the semantic answer cache. Returns (answer, similarity), where
+        similarity is set when the answer was reused from a near-identical earlier question.
+        `embedding`: see lookup_cached_answer.
+        """
+        if not settings.ANSWER_CACHE_ENABLED:
+            return await self.generate_answer(query, language), None
+        hit, embedding = await self.lookup_cached_answer(query, language, embedding)
+        if hit is not None:
+            return hit.answer, hit.similarity
+
+        started = time.perf_counter()
+        try:
+            answer = await self._generate_with_retry(self._answer_prompt(query, language))
+        except Exception as e:
+            logger.error(f"Gemini Multi-turn Answer Error: {e}")
+            return f"DEBUG ERROR: {type(e).__name__} - {str(e)}", None
+        self.remember_answer(query, language, embedding, answer, (time.perf_counter() - started) * 1000)
+        return answer, None
+
+    async def lookup_cached_answer(self, query: str, language: str, embedding: Awaitable | None = None):
+        """
+        Returns (cached answer or None, query embedding to remember a new answer under).
+        `embedding` is an already running generate_query_embedding(query) task, for callers
+        that need the embedding themselves too; it is awaited (shielded) instead of embedding
+        the query a second time.
+        """
+        if not settings.ANSWER_CACHE_ENABLED:
+            return None, None
+        if embedding is not None:
+            embedding = await asyncio.shield(embedding)
+        else:
+            embedding = await self.generate_query_embedding(query)
+        # Fallback-model vectors are in another space, so they neither match nor get stored
+        if embedding is None or embedding.shape[-1] != EMBEDDING_DIMENSION:
+            return None, None
+        return answer_cache.lookup(embedding, language), embedding
+
+    def remember_answer(self, query: str, language: str, embedding, answer: str, generate_ms: float):
+        if embedding is not None and answer.strip():
+            answer_cache.put(query, language, embedding, answer, generate_ms)
+
+    async def stream_answer(self, query: str, language: str = "English") -> AsyncIterator[str]:
+        """
+        generate_answer over Gemini's streaming API: yields text pieces as they are generated.
+        A rate-limited key is swapped for another only before the first piece has gone out.
+        Errors are raised, not turned into an answer string.
+        """
+        prompt = self._answer_prompt(query, language)
+        max_retries = 3
+        for attempt in range(1, max_retries + 1):
+            key = self.key_pool.acquire()
+            acquired_at = time.monotonic()
+            status_code = None
+            started = False
+            try:
+                model = self._key_clients[key].model
+                response = await model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    text = _chunk_text(chunk)
+                    if text:
+                        started = True
+                        yield text
+                status_code = 200
+                return
+            except Exception as e:
+                status_code = _error_status(e)
+                if status_code == 429 and not started:
+                    logger.warning(f"Gemini Rate Limit hit (Attempt {attempt}). Trying another key...")
+                    continue
+                raise
+            finally:
+                self.key_pool.release(key, status_code, acquired_at)
+        raise Exception(f"Gemini Rate Limit Exceeded after {max_retries} retries (Keys rotated).")
+
     async def check_safety(self, text: str) -> dict:
         prompt = f'''
 You are a STRICT Agricultural Knowledge Verifier.
@@ -113,49 +248,121 @@ If in doubt, FLAG AS UNSAFE.
             return {"is_safe": True, "reason": "AI Check Error"} # Allow but might flag in UI later
 
     async def _generate_embedding_with_rotation(self, text: str, task_type: str = "RETRIEVAL_DOCUMENT"):
+        if settings.EMBEDDING_CACHE_ENABLED:
+            cache_key = embedding_cache.make_key(text, task_type, EMBEDDING_MODEL, EMBEDDING_DIMENSION)
+            cached = await embedding_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        return await self.embedding_batcher.submit(task_type, text)
+
+    async def embed_texts(self, texts: list[str], task_type: str = "RETRIEVAL_DOCUMENT") -> list:
+        """
+        Embeds many texts at once, as float32 arrays. Cached vectors are returned directly;
+        the rest are sent upstream in batches. Empty texts and failed batches come back as None.
+        """
+        results = [None] * len(texts)
+        misses: dict[str, list[int]] = {}  # text -> positions
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            if settings.EMBEDDING_CACHE_ENABLED:
+                cached = await embedding_cache.get(
+                    embedding_cache.make_key(text, task_type, EMBEDDING_MODEL, EMBEDDING_DIMENSION)
+                )
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            misses.setdefault(text, []).append(i)
+
+        embeddings = await self._embed_misses(list(misses), task_type)
+        for positions, embedding in zip(misses.values(), embeddings):
+            for i in positions:
+                results[i] = embedding
+        return results
+
+    async def _embed_misses(self, texts: list[str], task_type: str) -> list:
+        """Calls upstream for texts known to be uncached and stores the results."""
+        unique = list(dict.fromkeys(texts))
+        size = settings.EMBEDDING_BATCH_MAX_SIZE
+        chunks = [unique[i:i + size] for i in range(0, len(unique), size)]
+        outcomes = await asyncio.gather(*(self._embed_chunk(chunk, task_type) for chunk in chunks))
+
+        by_text = {}
+        for chunk, (model, embeddings) in zip(chunks, outcomes):
+            if embeddings is None:
+                continue
+            for text, values in zip(chunk, embeddings):
+                embedding = np.asarray(values, dtype=np.float32)
+                by_text[text] = embedding
+                # Fallback-model vectors live in a different space, so only primary results are cached
+                if settings.EMBEDDING_CACHE_ENABLED and model == EMBEDDING_MODEL:
+                    cache_key = embedding_cache.make_key(text, task_type, EMBEDDING_MODEL, EMBEDDING_DIMENSION)
+                    await embedding_cache.put(cache_key, embedding)
+        return [by_text.get(text) for text in texts]
+
+    async def _embed_chunk(self, texts: list[str], task_type: str):
+        async with self.embedding_limiter.slot():
+            return await self._embed_with_rotation(texts, task_type)
+
+    async def _embed_with_rotation(self, texts: list[str], task_type: str):
+        """One batchEmbedContents call. Returns (model, embeddings) or (None, None)."""
         max_retries = 3
         attempt = 0
         
         while attempt < max_retries:
+            if not self.api_keys:
+                return None, None
             try:
-                if not self.api_keys:
-                    return None
-                current_key = self.api_keys[self.current_key_index]
-                
+                current_key = self.key_pool.acquire()
+                acquired_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"Embedding Error: {e}")
+                return None, None
+            status_code = None
+            try:
+                # Async client: the event loop keeps serving other routes during the round trip
+                client = self._key_clients[current_key].generative_async_client
                 try:
-                    # Configure specifically for embedding
-                    genai.configure(api_key=current_key)
-                    result = genai.embed_content(
-                        model="models/gemini-embedding-001",
-                        content=text,
-                        task_type=task_type
+                    result = await genai.embed_content_async(
+                        model=EMBEDDING_MODEL,
+                        content=texts,
+                        task_type=task_type,
+                        output_dimensionality=EMBEDDING_DIMENSION if EMBEDDING_DIMENSION < EMBEDDING_NATIVE_DIMENSION else None,
+                        client=client,
                     )
-                    return result['embedding']
+                    status_code = 200
+                    embeddings = result['embedding']
+                    if EMBEDDING_DIMENSION < EMBEDDING_NATIVE_DIMENSION:
+                        # Only the full-size output comes back unit-length; cosine scores assume it
+                        embeddings = list(truncate_embedding(embeddings, EMBEDDING_DIMENSION))
+                    return EMBEDDING_MODEL, embeddings
                 except Exception as e:
-                    error_str = str(e).lower()
-                    if "429" in error_str or "quota" in error_str or "limit" in error_str:
+                    if _error_status(e) is not None:
                          raise e
                     
                     logger.warning(f"Primary embedding failed ({e}). Trying fallback...")
                     # Fallback
-                    result = genai.embed_content(
-                        model="models/embedding-001",
-                        content=text,
-                        task_type=task_type
+                    result = await genai.embed_content_async(
+                        model=EMBEDDING_FALLBACK_MODEL,
+                        content=texts,
+                        task_type=task_type,
+                        client=client,
                     )
-                    return result['embedding']
+                    status_code = 200
+                    return EMBEDDING_FALLBACK_MODEL, result['embedding']
                     
             except Exception as e:
                 attempt += 1
-                error_str = str(e).lower()
+                status_code = _error_status(e)
                 
-                if "429" in error_str or "quota" in error_str or "limit" in error_str or "resource has been exhausted" in error_str:
-                    logger.warning("Gemini Embedding Rate Limit hit. Rotating key...")
-                    self._rotate_key()
+                if status_code == 429:
+                    logger.warning("Gemini Embedding Rate Limit hit. Trying another key...")
                 else:
                     logger.error(f"Embedding Error: {e}")
-                    return None
-        return None
+                    return None, None
+            finally:
+                self.key_pool.release(current_key, status_code, acquired_at)
+        return None, None
 
     async def generate_document_embedding(self, text: str):
         if not text: return None
@@ -165,7 +372,7 @@ If in doubt, FLAG AS UNSAFE.
         if not text: return None
         return await self._generate_embedding_with_rotation(text, "RETRIEVAL_QUERY")
 
-    async def analyze_crop_disease(self, image_bytes: bytes, query: str, language: str = "English") -> str:
+    async def analyze_crop_disease(self, image_bytes: bytes, query: str, language: str = "English", mime_type: str = "image/jpeg") -> str:
         prompt_text = f'''
 Role: You are the "Gram Gyan" Senior Multimodal Agronomist. Your mission is to support rural farmers in India by identifying crop diseases and providing actionable, safe, and culturally relevant farming advice.
 
@@ -195,7 +402,7 @@ Return ONLY a JSON object with this structure:
             # We must use proper multi-part message structure for Gemini vision
             content = [
                 prompt_text,
-                {"mime_type": "image/jpeg", "data": image_bytes}
+                {"mime_type": mime_type, "data": image_bytes}
             ]
             response_text = await self._generate_with_retry(content)
             return response_text.strip()
@@ -1,7 +1,14 @@
 import httpx
 import json
 import logging
+import time
+from typing import AsyncIterator
 from app.core.config import get_settings
+from app.core.json_stream import JsonArrayStream
+from app.services.crop_cache import crop_cache
+from app.services.crop_scorer import crop_scorer
+from app.services.http_clients import get_http_client
+from app.services.key_pool import KeyPool, send_with_key_pool
 
 config = get_settings()
 logger = logging.getLogger(__name__)
@@ -18,9 +25,8 @@ def _get_api_keys() -> list[str]:
         keys.append(config.GROQ_API_KEY_2)
     return keys
 
-def _should_fallback(status_code: int) -> bool:
-    """Determines if the error warrants trying the next key."""
-    return status_code in (401, 403, 429)
+# Shared across requests: a key that hit its quota is skipped until it cools down
+key_pool = KeyPool("Groq", _get_api_keys())
 
 def _language_name(code: str) -> str:
     lang_map = {
@@ -49,63 +55,89 @@ async def analyze_crops(
     language_code: str = "en"
 ) -> list[dict]:
     """
-    Calls Groq to analyze crop suitability with 5 recommended crops.
-    Automatically falls back to a secondary API key if available.
+    Top 5 crops for the farmer's soil and weather values. The ranking, confidence_score,
+    risk_level and risk_cause come from the local crop scorer (profiles derived from
+    Crop_classification.csv); Groq only writes the advice text for those 5 crops, in the
+    farmer's language. Without a Groq key, or if the Groq call fails, the ranked crops
+    are returned with the scorer's English text and empty advice lists.
+    The advice text is cached per bucket of inputs and ranking (see crop_cache); the
+    ranking, scores and risk fields are always this request's own.
     """
-    keys = _get_api_keys()
-    if not keys:
-        raise Exception("Groq API key is not configured in backend.")
-
-    ml_hint = f"An ML model predicted: {predicted_top_crop} for these values." if predicted_top_crop and predicted_top_crop != "Unknown" else ""
-
-    prompt = (
-        "You are an expert agricultural AI for Indian farmers. "
-        "You have deep knowledge of the Kaggle Crop Recommendation dataset "
-        "which contains these key crop profiles (N/P/K in kg/ha, temp in C, humidity %, rainfall in mm):\n"
-        "- Rice:       N=60-100, P=35-60, K=35-45, temp=20-27, humidity=80-85, rainfall=183-298\n"
-        "- Maize:      N=60-100, P=35-60, K=15-25, temp=18-27, humidity=55-74, rainfall=60-110\n"
-        "- Chickpea:   N=20-60,  P=55-80, K=75-85, temp=17-21, humidity=14-20, rainfall=65-95\n"
-        "- KidneyBeans:N=0-40,   P=55-80, K=15-25, temp=15-24, humidity=18-25, rainfall=60-150\n"
-        "- PigeonPeas: N=0-40,   P=55-80, K=15-25, temp=18-37, humidity=30-68, rainfall=90-199\n"
-        "- MothBeans:  N=0-40,   P=35-60, K=15-25, temp=24-32, humidity=40-65, rainfall=30-75\n"
-        "- MungBean:   N=0-40,   P=35-60, K=15-25, temp=27-30, humidity=80-90, rainfall=36-60\n"
-        "- BlackGram:  N=20-60,  P=55-80, K=15-25, temp=25-35, humidity=60-70, rainfall=60-75\n"
-        "- Lentil:     N=18-28,  P=55-80, K=15-25, temp=18-24, humidity=60-70, rainfall=36-60\n"
-        "- Pomegranate:N=0-20,   P=55-80, K=35-45, temp=18-24, humidity=85-95, rainfall=100-130\n"
-        "- Banana:     N=80-120, P=55-80, K=45-55, temp=25-30, humidity=78-92, rainfall=100-160\n"
-        "- Mango:      N=0-20,   P=15-25, K=25-35, temp=27-37, humidity=45-55, rainfall=90-130\n"
-        "- Grapes:     N=0-20,   P=55-80, K=35-45, temp=8-42,  humidity=80-90, rainfall=65-80\n"
-        "- Watermelon: N=80-120, P=55-80, K=45-55, temp=24-27, humidity=83-97, rainfall=50-60\n"
-        "- Muskmelon:  N=80-100, P=55-80, K=45-55, temp=28-32, humidity=90-95, rainfall=20-35\n"
-        "- Apple:      N=0-20,   P=55-80, K=35-45, temp=0-22,  humidity=90-95, rainfall=100-125\n"
-        "- Orange:     N=0-20,   P=15-25, K=5-15,  temp=10-35, humidity=90-95, rainfall=100-120\n"
-        "- Papaya:     N=40-60,  P=55-80, K=35-45, temp=33-38, humidity=92-97, rainfall=145-175\n"
-        "- Coconut:    N=0-20,   P=15-25, K=25-35, temp=25-30, humidity=90-95, rainfall=100-150\n"
-        "- Cotton:     N=100-140,P=35-60, K=15-25, temp=23-37, humidity=79-92, rainfall=60-100\n"
-        "- Jute:       N=60-80,  P=35-60, K=35-45, temp=23-27, humidity=78-92, rainfall=150-200\n"
-        "- Coffee:     N=100-140,P=15-25, K=25-35, temp=22-30, humidity=55-65, rainfall=158-200\n\n"
-        f"A farmer entered these values:\n"
-        f"- N: {nitrogen}  P: {phosphorus}  K: {potassium}  pH: {ph}\n"
-        f"- Temperature: {temperature:.1f} C  Humidity: {humidity:.1f}%  Rainfall: {rainfall:.0f} mm\n"
-        f"{ml_hint}\n\n"
-        "Match the farmer values to the crop profiles above. "
-        "Recommend TOP 5 crops that best match ALL parameters simultaneously. "
-        "Give priority to crops with the closest N/P/K/temp/humidity/rainfall match. "
-        "Ignore crops that clearly do not match (e.g. Apple if temp>30). "
-        "Indian context: prefer crops actually grown in India.\n\n"
-        "Return ONLY a valid JSON array of exactly 5 objects with these fields:\n"
-        "- \"crop\": string (ALWAYS in English, e.g. \"Maize\")\n"
-        "- \"confidence_score\": 0.0-1.0 (match quality, descending order)\n"
-        "- \"risk_level\": \"Low\"/\"Medium\"/\"High\" (>= 0.70 = Low, 0.40-0.69 = Medium, < 0.40 = High)\n"
-        "- \"risk_cause\": string (one sentence: which parameter is furthest from ideal)\n"
+    ranked = crop_scorer.top_crops([nitrogen, phosphorus, potassium, temperature, humidity, ph, rainfall])[0]
+    if not config.CROP_NARRATIVE_ENABLED or not key_pool.size:
+        return ranked
+    values = (predicted_top_crop, nitrogen, phosphorus, potassium, ph, rainfall, temperature, humidity, language_code)
+    try:
+        if not config.CROP_CACHE_ENABLED:
+            return _merge_items(ranked, await _fetch_narrative(ranked, *values))
+        own = None
+
+        async def fetch() -> dict[str, dict]:
+            nonlocal own
+            own = await _fetch_narrative(ranked, *values)
+            return _shared_narrative(ranked, own)
+
+        shared = await crop_cache.get_or_fetch(crop_cache.key(*values, [crop["crop"] for crop in ranked]), fetch)
+        if own is not None:
+            return _merge_items(ranked, own)  # This request called Groq, so its risk_cause is translated too
+        return _merge_items(ranked, [shared.get(crop["crop"].lower()) for crop in ranked])
+    except Exception as e:
+        logger.error(f"Groq crop narrative failed, returning the ranking without advice: {e}")
+        return ranked
+
+def _parse_json_array(content: str) -> list:
+    # Cleanup potential groq markdown fences
+    cleaned = content.replace('```json', '').replace('```', '').strip()
+
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        start = content.find('[')
+        end = content.rfind(']')
+        if start != -1 and end != -1 and end > start:
+            return json.loads(content[start:end+1])
+        raise Exception(f"Could not parse Groq response as JSON array. Content: {content}")
+
+def _narrative_prompt(
+    ranked: list[dict],
+    predicted_top_crop: str,
+    nitrogen: float,
+    phosphorus: float,
+    potassium: float,
+    ph: float,
+    rainfall: float,
+    temperature: float,
+    humidity: float,
+    language_code: str,
+) -> str:
+    ml_hint = f"An ML model predicted: {predicted_top_crop} for these values.\n" if predicted_top_crop and predicted_top_crop != "Unknown" else ""
+    ranking = "\n".join(
+        f"{i}. {crop['crop']} (match {crop['confidence_score']:.2f}, {crop['risk_level']} risk): {crop['risk_cause']}"
+        for i, crop in enumerate(ranked, 1)
+    )
+    return (
+        "You are an expert agricultural AI for Indian farmers.\n"
+        f"A farmer entered: N={nitrogen} P={phosphorus} K={potassium} kg/ha, pH={ph}, "
+        f"temperature={temperature:.1f} C, humidity={humidity:.1f}%, rainfall={rainfall:.0f} mm.\n"
+        f"{ml_hint}"
+        "Usual ranges of the recommended crops (N/P/K kg/ha, temperature C, humidity %, rainfall mm):\n"
+        f"{crop_scorer.profile_lines([crop['crop'] for crop in ranked])}\n\n"
+        "These crops are already ranked by how well the values match; keep this order:\n"
+        f"{ranking}\n\n"
+        f"Return ONLY a valid JSON array of {len(ranked)} objects, one per crop in the same order, with these fields:\n"
+        "- \"crop\": string (exactly as given above, in English)\n"
+        "- \"risk_cause\": string (one sentence: which parameter is furthest from ideal, as given above)\n"
         "- \"why_suitable\": string (two sentences: which parameters match well)\n"
         "- \"improvement_steps\": array of 3 strings\n"
-        "- \"planting_advice\": array of 4 strings\n\n"
+        "- \"planting_advice\": array of 4 strings\n"
+        "why_suitable, improvement_steps and planting_advice are reused for farmers with nearly the same "
+        "values, so don't quote the exact numbers the farmer entered in them.\n\n"
         "IMPORTANT: Write ALL text fields (risk_cause, why_suitable, improvement_steps, planting_advice) "
         f"in {_language_name(language_code)}. Keep the \"crop\" field in English.\n"
         "No markdown, no extra text. Only the JSON array."
     )
 
+def _narrative_request(prompt: str, stream: bool = False) -> dict:
     request_body = {
         "model": GROQ_MODEL,
         "messages": [
@@ -116,58 +148,205 @@ async def analyze_crops(
         "presence_penalty": 0.3,
         "max_tokens": 4096,
     }
+    if stream:
+        request_body["stream"] = True
+    return request_body
+
+_NARRATIVE_FIELDS = ("risk_cause", "why_suitable", "improvement_steps", "planting_advice")
+_SHARED_FIELDS = ("why_suitable", "improvement_steps", "planting_advice")
+
+def _merge_item(crop: dict, item: dict | None) -> dict:
+    crop = dict(crop)
+    for field in _NARRATIVE_FIELDS:
+        if item and item.get(field):
+            crop[field] = item[field]
+    return crop
+
+def _merge_items(ranked: list[dict], items: list[dict | None]) -> list[dict]:
+    return [_merge_item(crop, item) for crop, item in zip(ranked, items)]
+
+def _match_narrative(ranked: list[dict], narrative: list) -> list[dict | None]:
+    """Groq's item for each ranked crop, matched by name (or position)."""
+    by_name = {str(item.get("crop", "")).strip().lower(): item for item in narrative if isinstance(item, dict)}
+    items = []
+    for i, crop in enumerate(ranked):
+        item = by_name.get(crop["crop"].lower())
+        if item is None and i < len(narrative) and isinstance(narrative[i], dict):
+            item = narrative[i]
+        items.append(item)
+    return items
+
+def _shared_narrative(ranked: list[dict], items: list[dict | None]) -> dict[str, dict]:
+    """
+    The part of Groq's answer that crop_cache keeps for the whole bucket: each crop's advice,
+    by crop name. risk_cause is left out since it quotes this request's values.
+    """
+    return {
+        crop["crop"].lower(): {field: item[field] for field in _SHARED_FIELDS if item.get(field)}
+        for crop, item in zip(ranked, items)
+        if item
+    }
+
+async def _fetch_narrative(
+    ranked: list[dict],
+    predicted_top_crop: str,
+    nitrogen: float,
+    phosphorus: float,
+    potassium: float,
+    ph: float,
+    rainfall: float,
+    temperature: float,
+    humidity: float,
+    language_code: str,
+) -> list[dict | None]:
+    request_body = _narrative_request(_narrative_prompt(
+        ranked, predicted_top_crop, nitrogen, phosphorus, potassium, ph, rainfall, temperature, humidity, language_code
+    ))
 
-    last_error = None
-
-    for i, key in enumerate(keys):
-        try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {key}",
-                }
-                logger.info(f"Groq analyze_crops called (try {i+1}). lang={language_code}")
-                
-                response = await client.post(
-                    GROQ_URL, headers=headers, json=request_body
-                )
-
-                if _should_fallback(response.status_code) and i < len(keys) - 1:
-                    logger.warning(
-                        f"Groq API key {i+1} failed ({response.status_code}). Trying key {i+2}..."
-                    )
-                    last_error = response.text
-                    continue
-
-                response.raise_for_status()
-                response_data = response.json()
-                
-                content = response_data['choices'][0]['message']['content']
-                
-                # Cleanup potential groq markdown fences
-                cleaned = content.replace('```json', '').replace('```', '').strip()
-                
-                try:
-                    analysis_json = json.loads(cleaned)
-                except json.JSONDecodeError:
-                    start = content.find('[')
-                    end = content.rfind(']')
-                    if start != -1 and end != -1 and end > start:
-                        analysis_json = json.loads(content[start:end+1])
-                    else:
-                        raise Exception(f"Could not parse Groq response as JSON array. Content: {content}")
-                
-                return analysis_json
-
-        except httpx.HTTPStatusError as e:
-            if _should_fallback(e.response.status_code) and i < len(keys) - 1:
-                logger.warning(
-                    f"Groq API key {i+1} failed ({e.response.status_code}). Trying key {i+2}..."
-                )
-                last_error = e.response.text
+    client = get_http_client("groq")
+
+    def send(key: str):
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}",
+        }
+        logger.info(f"Groq analyze_crops called (key {key_pool.label(key)}). lang={language_code}")
+        return client.post(GROQ_URL, headers=headers, json=request_body)
+
+    response = await send_with_key_pool(key_pool, send, "Groq API")
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Groq AI error ({e.response.status_code}): {e.response.text}") from e
+    response_data = response.json()
+
+    content = response_data['choices'][0]['message']['content']
+    return _match_narrative(ranked, _parse_json_array(content))
+
+async def stream_crop_analysis(
+    predicted_top_crop: str,
+    nitrogen: float,
+    phosphorus: float,
+    potassium: float,
+    ph: float,
+    rainfall: float,
+    temperature: float,
+    humidity: float,
+    language_code: str = "en"
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    analyze_crops as a stream of (event, data) pairs:
+
+        ranking  the scorer's top 5 (no advice yet), right away
+        crop     one crop with Groq's advice merged in, as soon as its JSON object is complete
+        error    the Groq call failed; the ranking already sent stands
+        done     the full list, with timings (ms)
+
+    Cached advice is merged onto this request's ranking and replayed as `crop` events
+    without calling Groq.
+    """
+    started = time.perf_counter()
+
+    def elapsed() -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    ranked = crop_scorer.top_crops([nitrogen, phosphorus, potassium, temperature, humidity, ph, rainfall])[0]
+    yield "ranking", {"crops": ranked, "elapsed_ms": elapsed()}
+    if not config.CROP_NARRATIVE_ENABLED or not key_pool.size:
+        yield "done", {"crops": ranked, "elapsed_ms": elapsed()}
+        return
+
+    values = (predicted_top_crop, nitrogen, phosphorus, potassium, ph, rainfall, temperature, humidity, language_code)
+    key = crop_cache.key(*values, [crop["crop"] for crop in ranked]) if config.CROP_CACHE_ENABLED else None
+    shared = crop_cache.get(key) if key is not None else None
+    if shared is not None:
+        results = _merge_items(ranked, [shared.get(crop["crop"].lower()) for crop in ranked])
+        for index, crop in enumerate(results):
+            yield "crop", {"index": index, "crop": crop, "cached": True, "elapsed_ms": elapsed()}
+        yield "done", {"crops": results, "cached": True, "elapsed_ms": elapsed()}
+        return
+
+    results = list(ranked)
+    items: list[dict | None] = [None] * len(ranked)
+    sent: set[int] = set()
+    try:
+        async for index, item in _stream_narrative(ranked, *values):
+            if index in sent:
+                continue
+            sent.add(index)
+            items[index] = item
+            results[index] = _merge_item(ranked[index], item)
+            yield "crop", {"index": index, "crop": results[index], "elapsed_ms": elapsed()}
+    except Exception as e:
+        logger.error(f"Groq crop narrative stream failed: {e}")
+        yield "error", {"stage": "narrative", "detail": str(e), "elapsed_ms": elapsed()}
+        return
+    if key is not None and len(sent) == len(ranked):
+        crop_cache.put(key, _shared_narrative(ranked, items), elapsed())
+    yield "done", {"crops": results, "elapsed_ms": elapsed()}
+
+async def _stream_narrative(ranked: list[dict], *values) -> AsyncIterator[tuple[int, dict]]:
+    """
+    Streams the narrative completion from Groq and yields (index in `ranked`, item) for each
+    crop object as soon as its closing brace arrives. Items are matched by crop name, or by
+    position when the name doesn't match. If nothing could be parsed incrementally, the
+    whole response goes through _parse_json_array (fence cleanup + bracket recovery).
+    """
+    request_body = _narrative_request(_narrative_prompt(ranked, *values), stream=True)
+    names = [crop["crop"].lower() for crop in ranked]
+    client = get_http_client("groq")
+
+    async def send(key: str):
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}",
+        }
+        logger.info(f"Groq analyze_crops stream called (key {key_pool.label(key)}). lang={values[-1]}")
+        response = await client.send(client.build_request("POST", GROQ_URL, headers=headers, json=request_body), stream=True)
+        if response.status_code >= 400:
+            await response.aread()  # So the status and text can be reported, then the connection is freed
+            await response.aclose()
+        return response
+
+    response = await send_with_key_pool(key_pool, send, "Groq API")
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Groq AI error ({e.response.status_code}): {e.response.text}") from e
+
+    parser = JsonArrayStream()
+    position = 0
+
+    def place(item) -> tuple[int, dict] | None:
+        nonlocal position
+        if not isinstance(item, dict):
+            return None
+        name = str(item.get("crop", "")).strip().lower()
+        index = names.index(name) if name in names else min(position, len(names) - 1)
+        position += 1
+        return index, item
+
+    found = 0
+    try:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+            if not delta:
                 continue
-            raise Exception(f"Groq AI error ({e.response.status_code}): {e.response.text}") from e
-        except Exception as e:
-            raise e
+            for item in parser.feed(delta):
+                placed = place(item)
+                if placed:
+                    found += 1
+                    yield placed
+    finally:
+        await response.aclose()
 
-    raise Exception(f"All Groq API keys exhausted. Last error: {last_error}")
+    if not found:
+        for item in _parse_json_array(parser.text):
+            placed = place(item)
+            if placed:
+                yield placed
@@ -0,0 +1,78 @@
+import httpx
+import logging
+from functools import lru_cache
+from app.core.config import get_settings
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+# ── Upstreams ─────────────────────────────────────────────────────────────────
+# One pooled client per upstream so keep-alive connections (and their TLS
+# sessions) are reused across requests instead of re-handshaking every call.
+
+UPSTREAM_TIMEOUTS = {
+    "sarvam": config.SARVAM_TIMEOUT,
+    "groq": config.GROQ_TIMEOUT,
+    "openweather": config.OPENWEATHER_TIMEOUT,
+    "n8n": config.N8N_TIMEOUT,
+    "gyancall": config.GYANCALL_TIMEOUT,
+}
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+@lru_cache()
+def _http2_available() -> bool:
+    if not config.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("HTTP2_ENABLED is set but the `h2` package is not installed. Using HTTP/1.1.")
+        return False
+
+
+def _create_client(upstream: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        timeout=UPSTREAM_TIMEOUTS[upstream],
+        limits=limits,
+        http2=_http2_available(),
+    )
+
+
+def get_http_client(upstream: str) -> httpx.AsyncClient:
+    """
+    Returns the shared pooled client for an upstream (sarvam, groq, openweather, n8n, gyancall).
+    Clients are created on first use if the app lifespan hasn't started them (e.g. in scripts).
+    """
+    if upstream not in UPSTREAM_TIMEOUTS:
+        raise ValueError(f"Unknown upstream: {upstream}")
+    client = _clients.get(upstream)
+    if client is None or client.is_closed:
+        client = _create_client(upstream)
+        _clients[upstream] = client
+    return client
+
+
+async def start_http_clients():
+    """Opens a pooled client for every upstream. Called from the app lifespan."""
+    for upstream in UPSTREAM_TIMEOUTS:
+        get_http_client(upstream)
+    logger.info(f"HTTP clients started for: {', '.join(_clients)} (http2={_http2_available()})")
+
+
+async def close_http_clients():
+    """Closes all pooled clients and their keep-alive connections."""
+    for upstream, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP client '{upstream}': {e}")
+    _clients.clear()
+    logger.info("HTTP clients closed")
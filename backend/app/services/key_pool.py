@@ -0,0 +1,183 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+import httpx
+from app.core.config import get_settings
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+# 401 = invalid key, 403 = forbidden, 429 = quota exceeded
+FALLBACK_STATUS_CODES = (401, 403, 429)
+
+
+class KeyPoolExhausted(Exception):
+    """Raised without calling upstream when every key in a pool is cooling down (circuit open)."""
+
+    def __init__(self, name: str, retry_after: float, last_error: str | None = None):
+        self.retry_after = retry_after
+        message = f"All {name} API keys exhausted. Retry in {retry_after:.0f}s."
+        if last_error:
+            message += f" Last error: {last_error}"
+        super().__init__(message)
+
+
+@dataclass
+class _KeyState:
+    key: str
+    in_flight: int = 0
+    requests: int = 0
+    successes: int = 0
+    rate_limited: int = 0
+    auth_failures: int = 0
+    errors: int = 0
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+    cooled_at: float = 0.0  # when the current cooldown episode began
+    last_status: int | None = None
+
+    @property
+    def label(self) -> str:
+        return f"...{self.key[-4:]}" if len(self.key) > 8 else "***"
+
+
+class KeyPool:
+    """
+    Shared API-key pool for upstreams that take several keys (Sarvam, Groq, Gemini).
+
+    - Spreads load: picks the healthy key with the fewest in-flight (then total) requests.
+    - Cools a key down after 429 (quota) or 401/403 (auth), with exponential backoff.
+      Backoff grows once per cooldown episode: failures from calls that were already in
+      flight (or are released while the key is cooling) don't escalate it, and their
+      late successes don't clear it.
+    - Fails fast with KeyPoolExhausted when no key is healthy, instead of burning a
+      request on a key that is known to be exhausted. A key becomes eligible again
+      (half-open) once its cooldown passes; one success fully resets it.
+    """
+
+    def __init__(self, name: str, keys: list[str]):
+        self.name = name
+        self._states = [_KeyState(key) for key in dict.fromkeys(k for k in keys if k)]
+        self._by_key = {state.key: state for state in self._states}
+
+    @property
+    def size(self) -> int:
+        return len(self._states)
+
+    @property
+    def keys(self) -> list[str]:
+        return [state.key for state in self._states]
+
+    def label(self, key: str) -> str:
+        state = self._by_key.get(key)
+        return state.label if state else "***"
+
+    def available(self) -> bool:
+        now = time.monotonic()
+        return any(state.cooldown_until <= now for state in self._states)
+
+    def acquire(self, last_error: str | None = None) -> str:
+        """Returns the healthiest key and marks it in flight. Raises KeyPoolExhausted if all are cooling."""
+        if not self._states:
+            raise KeyPoolExhausted(self.name, 0.0, f"No {self.name} API keys configured.")
+        now = time.monotonic()
+        healthy = [state for state in self._states if state.cooldown_until <= now]
+        if not healthy:
+            retry_after = min(state.cooldown_until for state in self._states) - now
+            raise KeyPoolExhausted(self.name, retry_after, last_error)
+        # Fewest in-flight first, then least used overall, so load alternates between keys
+        state = min(healthy, key=lambda s: (s.in_flight, s.requests))
+        state.in_flight += 1
+        state.requests += 1
+        return state.key
+
+    def release(self, key: str, status_code: int | None = None, acquired_at: float | None = None):
+        """
+        Returns a key after a call. `status_code` is the upstream HTTP status, or None
+        when the call failed without one (network error): that neither heals nor cools the key.
+        `acquired_at` is the time.monotonic() of the acquire; a call that started before
+        the key's current cooldown neither heals nor escalates it.
+        """
+        state = self._by_key.get(key)
+        if state is None:
+            return
+        state.in_flight = max(0, state.in_flight - 1)
+        state.last_status = status_code
+        stale = acquired_at is not None and acquired_at < state.cooled_at
+        if status_code is None:
+            state.errors += 1
+        elif status_code in FALLBACK_STATUS_CODES:
+            self._cool_down(state, status_code, stale)
+        elif status_code < 500:
+            state.successes += 1
+            if not stale:
+                state.consecutive_failures = 0
+                state.cooldown_until = 0.0
+        else:
+            state.errors += 1
+
+    def _cool_down(self, state: _KeyState, status_code: int, stale: bool):
+        if status_code == 429:
+            state.rate_limited += 1
+            base = config.KEY_COOLDOWN_SECONDS
+        else:
+            state.auth_failures += 1
+            base = config.KEY_AUTH_COOLDOWN_SECONDS
+        now = time.monotonic()
+        if stale or state.cooldown_until > now:
+            # Same episode: concurrent calls on this key failing together count once
+            return
+        state.consecutive_failures += 1
+        cooldown = min(base * 2 ** (state.consecutive_failures - 1), config.KEY_MAX_COOLDOWN_SECONDS)
+        state.cooled_at = now
+        state.cooldown_until = now + cooldown
+        logger.warning(f"{self.name} key {state.label} got {status_code}. Cooling down for {cooldown:.0f}s.")
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "keys": [
+                {
+                    "key": state.label,
+                    "healthy": state.cooldown_until <= now,
+                    "cooldown_remaining": round(max(0.0, state.cooldown_until - now), 1),
+                    "in_flight": state.in_flight,
+                    "requests": state.requests,
+                    "successes": state.successes,
+                    "rate_limited": state.rate_limited,
+                    "auth_failures": state.auth_failures,
+                    "errors": state.errors,
+                }
+                for state in self._states
+            ],
+            "circuit_open": bool(self._states) and not self.available(),
+        }
+
+
+async def send_with_key_pool(
+    pool: KeyPool,
+    send: Callable[[str], Awaitable[httpx.Response]],
+    operation: str,
+) -> httpx.Response:
+    """
+    Calls `send(key)` with keys from the pool until a response isn't a key problem
+    (401/403/429) or no healthy key is left. Returns the last response; raises
+    KeyPoolExhausted if no key was available to begin with.
+    """
+    last_error = None
+    for _ in range(max(pool.size, 1)):
+        key = pool.acquire(last_error)
+        acquired_at = time.monotonic()
+        status_code = None
+        try:
+            response = await send(key)
+            status_code = response.status_code
+        finally:
+            pool.release(key, status_code, acquired_at)
+        if status_code in FALLBACK_STATUS_CODES and pool.available():
+            logger.warning(f"{operation} key {pool.label(key)} failed ({status_code}). Trying another key...")
+            last_error = response.text
+            continue
+        return response
+    return response
@@ -0,0 +1,363 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterator
+import numpy as np
+from app.core.config import get_settings
+from app.core.vectors import from_pgvector, to_pgvector, truncate_embedding
+from app.services.supabase import get_supabase_client
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+# Columns returned by match_knowledge (plus `similarity`)
+KNOWLEDGE_FIELDS = ("id", "user_id", "original_text", "english_text", "audio_url")
+PAGE_SIZE = 500
+MATCH_KNOWLEDGE_RPC = "match_knowledge" if config.EMBEDDING_DIMENSION == 3072 else f"match_knowledge_{config.EMBEDDING_DIMENSION}"
+SCORE_CHUNK_ROWS = 2048  # float16 rows are upcast this many at a time for the matmul
+
+
+@lru_cache()
+def _hnswlib():
+    """hnswlib is optional; without it search is an exact matrix scan."""
+    if not config.KNOWLEDGE_INDEX_HNSW:
+        return None
+    try:
+        import hnswlib
+        return hnswlib
+    except ImportError:
+        logger.warning("KNOWLEDGE_INDEX_HNSW is set but the `hnswlib` package is not installed. Using exact search.")
+        return None
+
+
+def embedding_column(dimension: int) -> str:
+    return "embedding" if dimension == 3072 else f"embedding_{dimension}"
+
+
+class IndexOverBudget(Exception):
+    """The verified posts don't fit KNOWLEDGE_INDEX_MAX_BYTES; searches use the RPC instead."""
+
+
+@dataclass
+class _IndexState:
+    """One immutable-size snapshot: rows never move, removed rows are masked out."""
+    matrix: np.ndarray  # (capacity, dimension), unit-length rows
+    alive: np.ndarray  # (capacity,) bool
+    records: list[dict] = field(default_factory=list)  # row -> match_knowledge fields
+    rows: dict[str, int] = field(default_factory=dict)  # post id -> row
+    size: int = 0
+    hnsw: object | None = None
+
+
+class KnowledgeIndex:
+    """
+    In-memory mirror of verified knowledge_posts, searchable like the match_knowledge RPC
+    (cosine similarity > match_threshold, verified only, best match_count first).
+
+    Embeddings are kept unit-length in one contiguous float32/float16 matrix next to an
+    id -> row map, so exact top-k is a single matrix-vector product. With hnswlib installed
+    and KNOWLEDGE_INDEX_HNSW set, an HNSW graph over the same rows is used instead.
+    A full reload runs on startup and every KNOWLEDGE_INDEX_FULL_REFRESH_SECONDS (it also
+    drops deleted and un-verified posts); in between only rows whose verified_at or
+    created_at moved past the last seen timestamp are fetched.
+
+    Memory is capped by KNOWLEDGE_INDEX_MAX_BYTES, counting the second matrix a full reload
+    builds while the old one still serves searches. If the posts don't fit, the index
+    unloads and match_knowledge() answers from the RPC until they fit again.
+    """
+
+    def __init__(self, dimension: int, dtype: str = "float32"):
+        self.dimension = dimension
+        self.dtype = np.dtype(dtype)
+        self.column = embedding_column(dimension)
+        self._state = self._empty_state(0)
+        self.watermark: str | None = None  # greatest verified_at/created_at seen
+        self.loaded = False
+        self.last_full_refresh = 0.0
+        self.full_refreshes = 0
+        self.delta_refreshes = 0
+        self.refresh_errors = 0
+        self.over_budget = False
+        self.searches = 0
+        self._latencies_ms: deque[float] = deque(maxlen=1000)
+
+    def _empty_state(self, capacity: int) -> _IndexState:
+        return _IndexState(
+            matrix=np.zeros((capacity, self.dimension), dtype=self.dtype),
+            alive=np.zeros(capacity, dtype=bool),
+        )
+
+    @property
+    def size(self) -> int:
+        return int(self._state.alive[: self._state.size].sum())
+
+    @property
+    def max_rows(self) -> int:
+        """Rows that fit KNOWLEDGE_INDEX_MAX_BYTES while a full reload holds two matrices."""
+        return config.KNOWLEDGE_INDEX_MAX_BYTES // (2 * self.dimension * self.dtype.itemsize)
+
+    # ── Loading ──────────────────────────────────────────────────────────────
+
+    def _pages(self, since: str | None) -> Iterator[list[dict]]:
+        """Pages through knowledge_posts: all verified rows, or every row changed after `since`."""
+        supabase = get_supabase_client()
+        fields = ", ".join(KNOWLEDGE_FIELDS + ("is_verified", "verified_at", "created_at", self.column))
+        offset = 0
+        while True:
+            query = supabase.table("knowledge_posts").select(fields)
+            if since:
+                query = query.or_(f'verified_at.gt."{since}",created_at.gt."{since}"')
+            else:
+                query = query.eq("is_verified", True)
+            page = query.order("id").range(offset, offset + PAGE_SIZE - 1).execute().data
+            yield page
+            if len(page) < PAGE_SIZE:
+                return
+            offset += PAGE_SIZE
+
+    def _fetch(self, since: str) -> list[dict]:
+        """Rows changed after `since` (a delta: small, so they are collected in one list)."""
+        return [row for page in self._pages(since) for row in page]
+
+    def _count_verified(self) -> int:
+        response = (
+            get_supabase_client().table("knowledge_posts")
+            .select("id", count="exact").eq("is_verified", True).limit(1).execute()
+        )
+        return response.count or 0
+
+    def _parse(self, rows: list[dict]) -> tuple[list[dict], np.ndarray, list[str], str | None]:
+        """Splits fetched rows into (records to upsert, their vectors, ids to drop, newest timestamp)."""
+        records, removed = [], []
+        vectors = np.empty((len(rows), self.dimension), dtype=self.dtype)
+        newest = None
+        for row in rows:
+            for stamp in (row.get("verified_at"), row.get("created_at")):
+                if stamp and (newest is None or stamp > newest):
+                    newest = stamp
+            if not row.get("is_verified") or not row.get(self.column):
+                removed.append(row["id"])
+                continue
+            vector = from_pgvector(row[self.column])
+            if vector.size != self.dimension:
+                logger.warning(f"Knowledge post {row['id']} has a {vector.size}-dim embedding, expected {self.dimension}.")
+                removed.append(row["id"])
+                continue
+            vectors[len(records)] = truncate_embedding(vector, self.dimension)
+            records.append({name: row.get(name) for name in KNOWLEDGE_FIELDS})
+        return records, vectors[: len(records)], removed, newest
+
+    def _new_state(self, rows: int) -> _IndexState:
+        if rows > self.max_rows:
+            raise IndexOverBudget(
+                f"{rows} posts need {2 * rows * self.dimension * self.dtype.itemsize / 2**20:.0f} MB "
+                f"during a full reload, over KNOWLEDGE_INDEX_MAX_BYTES ({config.KNOWLEDGE_INDEX_MAX_BYTES / 2**20:.0f} MB)"
+            )
+        return self._empty_state(min(max(rows, 1024), self.max_rows))
+
+    def _add_hnsw(self, state: _IndexState):
+        """Builds the HNSW graph over a filled state (hnswlib installed and enabled only)."""
+        hnswlib = _hnswlib()
+        if hnswlib is None:
+            return
+        state.hnsw = hnswlib.Index(space="ip", dim=self.dimension)
+        state.hnsw.init_index(max_elements=len(state.alive), ef_construction=200, M=16)
+        state.hnsw.set_ef(max(64, config.KNOWLEDGE_INDEX_HNSW_EF))
+        if state.size:
+            state.hnsw.add_items(state.matrix[: state.size].astype(np.float32), np.arange(state.size))
+
+    def _build(self, records: list[dict], vectors: np.ndarray) -> _IndexState:
+        state = self._new_state(len(records))
+        self._upsert(state, records, vectors)
+        self._add_hnsw(state)
+        return state
+
+    def _load_all(self) -> tuple[_IndexState, str | None]:
+        """
+        Full reload. The matrix is sized from a row count up front and each page is parsed
+        into it as it arrives, so at most one page of pgvector text is held at a time.
+        """
+        state = self._new_state(self._count_verified())
+        newest = None
+        for page in self._pages(None):
+            records, vectors, _, page_newest = self._parse(page)
+            self._upsert(state, records, vectors)
+            if page_newest and (newest is None or page_newest > newest):
+                newest = page_newest
+        self._add_hnsw(state)
+        return state, newest
+
+    def _apply_delta(self, records: list[dict], vectors: np.ndarray, removed: list[str]):
+        """Upserts and removals on the live state. Runs on the event loop, between searches."""
+        state = self._state
+        for post_id in removed:
+            row = state.rows.pop(post_id, None)
+            if row is not None:
+                state.alive[row] = False
+                if state.hnsw is not None:
+                    state.hnsw.mark_deleted(row)
+        self._upsert(state, records, vectors)
+
+    def _upsert(self, state: _IndexState, records: list[dict], vectors: np.ndarray):
+        for record, vector in zip(records, vectors):
+            row = state.rows.get(record["id"])
+            if row is None:
+                if state.size == len(state.alive):
+                    self._grow(state)
+                row = state.size
+                state.size += 1
+                state.rows[record["id"]] = row
+                state.records.append(record)
+            else:
+                state.records[row] = record
+            state.matrix[row] = vector
+            state.alive[row] = True
+            if state.hnsw is not None:
+                state.hnsw.add_items(vector.astype(np.float32)[None, :], np.array([row]))
+
+    def _grow(self, state: _IndexState):
+        # Old and new matrix coexist while copying; max_rows leaves room for both
+        capacity = min(max(len(state.alive) * 2, 1024), self.max_rows)
+        if capacity <= state.size:
+            raise IndexOverBudget(f"more than {self.max_rows} posts, over KNOWLEDGE_INDEX_MAX_BYTES")
+        matrix = np.zeros((capacity, self.dimension), dtype=self.dtype)
+        matrix[: state.size] = state.matrix[: state.size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: state.size] = state.alive[: state.size]
+        state.matrix, state.alive = matrix, alive
+        if state.hnsw is not None:
+            state.hnsw.resize_index(capacity)
+
+    def _unload(self, reason: IndexOverBudget):
+        if not self.over_budget:
+            logger.warning(f"Knowledge index unloaded, searching via {MATCH_KNOWLEDGE_RPC} instead: {reason}")
+        self.over_budget = True
+        self._state = self._empty_state(0)
+        self.loaded = False
+        self.watermark = None
+
+    async def refresh(self, full: bool = False):
+        try:
+            await self._refresh(full)
+        except IndexOverBudget as e:
+            self._unload(e)
+
+    async def _refresh(self, full: bool):
+        if full or not self.loaded:
+            # Built off the event loop, then swapped in whole so searches never see a half-built index
+            state, newest = await asyncio.to_thread(self._load_all)
+            self.over_budget = False
+            self._state = state
+            self.watermark = newest
+            self.loaded = True
+            self.last_full_refresh = time.monotonic()
+            self.full_refreshes += 1
+            logger.info(f"Knowledge index: loaded {state.size} verified posts ({self.column}, {self.dtype.name}).")
+            return
+        rows = await asyncio.to_thread(self._fetch, self.watermark)
+        if not rows:
+            return
+        records, vectors, removed, newest = await asyncio.to_thread(self._parse, rows)
+        self._apply_delta(records, vectors, removed)
+        if newest and (self.watermark is None or newest > self.watermark):
+            self.watermark = newest
+        self.delta_refreshes += 1
+
+    async def run(self):
+        """Background refresh loop, started from the app lifespan."""
+        while True:
+            full = not self.loaded or time.monotonic() - self.last_full_refresh > config.KNOWLEDGE_INDEX_FULL_REFRESH_SECONDS
+            try:
+                await self.refresh(full=full)
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Knowledge index refresh failed: {e}")
+            await asyncio.sleep(config.KNOWLEDGE_INDEX_REFRESH_SECONDS)
+
+    # ── Search ───────────────────────────────────────────────────────────────
+
+    def _scores(self, state: _IndexState, query: np.ndarray) -> np.ndarray:
+        matrix = state.matrix[: state.size]
+        if self.dtype == np.float32:
+            scores = matrix @ query
+        else:
+            # NumPy has no BLAS path for float16, so upcast in cache-sized chunks
+            scores = np.empty(state.size, dtype=np.float32)
+            for start in range(0, state.size, SCORE_CHUNK_ROWS):
+                chunk = matrix[start:start + SCORE_CHUNK_ROWS].astype(np.float32)
+                scores[start:start + SCORE_CHUNK_ROWS] = chunk @ query
+        scores[~state.alive[: state.size]] = -np.inf
+        return scores
+
+    def search(self, query: np.ndarray, match_threshold: float, match_count: int) -> list[dict]:
+        """Same result shape and semantics as the match_knowledge RPC."""
+        started = time.perf_counter()
+        state = self._state
+        query = truncate_embedding(query, self.dimension)
+        live = len(state.rows)
+        k = min(match_count, live)
+        matches = []
+        if k > 0:
+            if state.hnsw is not None:
+                labels, distances = state.hnsw.knn_query(query[None, :], k=k)
+                candidates = zip(labels[0], 1.0 - distances[0])
+            else:
+                scores = self._scores(state, query)
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                candidates = zip(top, scores[top])
+            matches = [
+                {**state.records[row], "similarity": float(similarity)}
+                for row, similarity in candidates
+                if similarity > match_threshold
+            ]
+        self.searches += 1
+        self._latencies_ms.append((time.perf_counter() - started) * 1000)
+        return matches
+
+    def stats(self) -> dict:
+        state = self._state
+        latencies = sorted(self._latencies_ms)
+        return {
+            "loaded": self.loaded,
+            "posts": self.size,
+            "column": self.column,
+            "dtype": self.dtype.name,
+            "hnsw": state.hnsw is not None,
+            "matrix_bytes": int(state.matrix.nbytes),
+            "max_bytes": config.KNOWLEDGE_INDEX_MAX_BYTES,
+            "over_budget": self.over_budget,
+            "watermark": self.watermark,
+            "full_refreshes": self.full_refreshes,
+            "delta_refreshes": self.delta_refreshes,
+            "refresh_errors": self.refresh_errors,
+            "searches": self.searches,
+            "p50_ms": round(latencies[len(latencies) // 2], 3) if latencies else 0.0,
+            "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3) if latencies else 0.0,
+        }
+
+
+knowledge_index = KnowledgeIndex(dimension=config.EMBEDDING_DIMENSION, dtype=config.KNOWLEDGE_INDEX_DTYPE)
+
+
+async def match_knowledge(embedding: np.ndarray, match_threshold: float, match_count: int) -> tuple[list[dict], str]:
+    """
+    match_knowledge results for a query embedding, from the in-memory index, or from the
+    RPC until the index has loaded. Returns (matches, "index" | "database").
+    """
+    if knowledge_index.loaded:
+        return knowledge_index.search(embedding, match_threshold, match_count), "index"
+    response = await asyncio.to_thread(
+        get_supabase_client().rpc(
+            MATCH_KNOWLEDGE_RPC,
+            {
+                "query_embedding": to_pgvector(embedding[: config.EMBEDDING_DIMENSION]),
+                "match_threshold": match_threshold,
+                "match_count": match_count,
+            },
+        ).execute
+    )
+    return response.data, "database"
@@ -1,7 +1,14 @@
 import httpx
+import asyncio
 import base64
 import logging
+from typing import AsyncIterator, BinaryIO
 from app.core.config import get_settings
+from app.services.http_clients import get_http_client
+from app.services.key_pool import KeyPool, send_with_key_pool
+from app.services.tts_cache import tts_cache
+from app.services.translation_memory import translation_memory
+from app.services.audio import read_wav, wav_header, write_wav, is_wav, duration_seconds, split_on_silence
 
 config = get_settings()
 logger = logging.getLogger(__name__)
@@ -10,6 +17,10 @@ SARVAM_STT_URL = "https://api.sarvam.ai/speech-to-text"
 SARVAM_TTS_URL = "https://api.sarvam.ai/text-to-speech"
 SARVAM_TRANSLATE_URL = "https://api.sarvam.ai/translate"
 SARVAM_TRANSLITERATE_URL = "https://api.sarvam.ai/transliterate"
+SARVAM_TRANSLATE_MODE = "formal"
+SARVAM_TRANSLATE_MODEL = "mayura:v1"
+SARVAM_TTS_SPEAKER = "shubh"
+SARVAM_TTS_MODEL = "bulbul:v3"
 
 # ── Key Rotation ──────────────────────────────────────────────────────────────
 
@@ -20,10 +31,14 @@ def _get_api_keys() -> list[str]:
         keys.append(config.SARVAM_API_KEY_2)
     return keys
 
-def _should_fallback(status_code: int) -> bool:
-    """Determines if the error warrants trying the next key."""
-    # 401 = invalid key, 403 = forbidden, 429 = quota exceeded
-    return status_code in (401, 403, 429)
+# Shared with every Sarvam call: a key that hit its quota is skipped until it cools down
+key_pool = KeyPool("Sarvam", _get_api_keys())
+
+def _headers(key: str, json_body: bool = True) -> dict:
+    headers = {"api-subscription-key": key}
+    if json_body:
+        headers["Content-Type"] = "application/json"
+    return headers
 
 
 import os
@@ -47,33 +62,31 @@ async def transliterate_to_native_script(text: str, language_code: str) -> str:
     Converts a Tanglish/romanized string to native Indic script using Sarvam /transliterate.
     e.g. 'Vanakkam' -> 'வணக்கம்' for ta-IN
     """
-    keys = _get_api_keys()
-    for key in keys:
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                payload = {
-                    "input": text,
-                    "source_language_code": "en-IN",   # Tanglish is treated as English input
-                    "target_language_code": language_code,
-                    "speaker_gender": "Male",
-                    "mode": "classic-colloquial",
-                    "numerals_format": "international",
-                    "output_script": "fully-native",
-                }
-                headers = {
-                    "api-subscription-key": key,
-                    "Content-Type": "application/json",
-                }
-                response = await client.post(SARVAM_TRANSLITERATE_URL, json=payload, headers=headers)
-                if response.status_code == 200:
-                    result = response.json()
-                    native = result.get("transliterated_text", text)
-                    logger.info(f"Transliterated '{text[:50]}' -> '{native[:50]}' [{language_code}]")
-                    return native
-                else:
-                    logger.warning(f"Transliterate failed ({response.status_code}): {response.text[:200]}")
-        except Exception as e:
-            logger.warning(f"Transliterate exception: {e}")
+    client = get_http_client("sarvam")
+    payload = {
+        "input": text,
+        "source_language_code": "en-IN",   # Tanglish is treated as English input
+        "target_language_code": language_code,
+        "speaker_gender": "Male",
+        "mode": "classic-colloquial",
+        "numerals_format": "international",
+        "output_script": "fully-native",
+    }
+    try:
+        response = await send_with_key_pool(
+            key_pool,
+            lambda key: client.post(SARVAM_TRANSLITERATE_URL, json=payload, headers=_headers(key)),
+            "Sarvam Transliterate",
+        )
+        if response.status_code == 200:
+            result = response.json()
+            native = result.get("transliterated_text", text)
+            logger.info(f"Transliterated '{text[:50]}' -> '{native[:50]}' [{language_code}]")
+            return native
+        else:
+            logger.warning(f"Transliterate failed ({response.status_code}): {response.text[:200]}")
+    except Exception as e:
+        logger.warning(f"Transliterate exception: {e}")
     return text  # fallback: return original if transliteration fails
 
 
@@ -94,53 +107,76 @@ def _get_audio_mime_type(file_path: str) -> str:
     }
     return mime_map.get(ext, "audio/wav")
 
-async def speech_to_text(audio_file_path: str, language_code: str = "ta-IN") -> str:
+async def speech_to_text(audio: str | BinaryIO, language_code: str = "ta-IN", filename: str | None = None) -> str:
     """
     Converts speech to text using Sarvam AI.
+    `audio` is a file path or an open binary buffer (e.g. an UploadFile's spooled file),
+    which is streamed straight into the multipart request without a temp copy.
     Automatically falls back to the secondary API key if the primary hits quota/auth errors.
+    WAV recordings longer than Sarvam's 30 s real-time limit are split at silences and
+    the segments are transcribed concurrently.
     """
-    keys = _get_api_keys()
-    last_error = None
-
-    for i, key in enumerate(keys):
-        try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                with open(audio_file_path, "rb") as f:
-                    files = {"file": (os.path.basename(audio_file_path), f, _get_audio_mime_type(audio_file_path))}
-                    headers = {"api-subscription-key": key}
-                    data = {"model": "saarika:v2.5", "language_code": language_code}
-
-                    response = await client.post(
-                        SARVAM_STT_URL, headers=headers, files=files, data=data
-                    )
-
-                    if _should_fallback(response.status_code) and i < len(keys) - 1:
-                        logger.warning(
-                            f"Sarvam STT key {i+1} failed ({response.status_code}). "
-                            f"Trying key {i+2}..."
-                        )
-                        last_error = response.text
-                        continue
-
-                    response.raise_for_status()
-                    result = response.json()
-                    transcript = result.get("transcript", "")
-                    logger.info(f"STT [{language_code}] → '{transcript[:80]}...' (file: {os.path.basename(audio_file_path)})")
-                    return transcript
-
-        except httpx.HTTPStatusError as e:
-            if _should_fallback(e.response.status_code) and i < len(keys) - 1:
-                logger.warning(
-                    f"Sarvam STT key {i+1} failed ({e.response.status_code}). "
-                    f"Trying key {i+2}..."
-                )
-                last_error = e.response.text
-                continue
-            raise Exception(f"Sarvam API Error: {e.response.text}") from e
-        except Exception as e:
-            raise e
-
-    raise Exception(f"All Sarvam API keys exhausted. Last error: {last_error}")
+    if isinstance(audio, str):
+        with open(audio, "rb") as f:
+            return await speech_to_text(f, language_code, filename or os.path.basename(audio))
+
+    filename = filename or "audio.wav"
+    mime_type = _get_audio_mime_type(filename)
+    audio.seek(0)
+    if is_wav(audio.read(12)):
+        audio.seek(0)
+        segments = _split_long_wav(audio.read())
+        if segments is not None:
+            return await _transcribe_segments(filename, segments, language_code)
+    return await _transcribe(filename, audio, mime_type, language_code)
+
+def _split_long_wav(data: bytes) -> list[bytes] | None:
+    """Returns WAV segments if the recording exceeds the segment limit, else None."""
+    try:
+        fmt, frames = read_wav(data)
+        if duration_seconds(fmt, frames) <= config.STT_SEGMENT_MAX_SECONDS:
+            return None
+        return [write_wav(fmt, part) for part in split_on_silence(fmt, frames, config.STT_SEGMENT_MAX_SECONDS)]
+    except Exception as e:
+        # Compressed or unusual WAV variants: let Sarvam decide
+        logger.warning(f"Could not segment WAV upload ({e}). Sending as a single request.")
+        return None
+
+async def _transcribe_segments(filename: str, segments: list[bytes], language_code: str) -> str:
+    semaphore = asyncio.Semaphore(config.STT_MAX_PARALLEL_SEGMENTS)
+    stem = os.path.splitext(filename)[0]
+
+    async def transcribe_segment(index: int, segment: bytes) -> str:
+        async with semaphore:
+            return await _transcribe(f"{stem}_part{index}.wav", segment, "audio/wav", language_code)
+
+    logger.info(f"Long audio: transcribing {len(segments)} segments of {filename} in parallel")
+    transcripts = await asyncio.gather(*(transcribe_segment(i, seg) for i, seg in enumerate(segments)))
+    return " ".join(t.strip() for t in transcripts if t and t.strip())
+
+async def _transcribe(filename: str, content, mime_type: str, language_code: str) -> str:
+    """Sends one recording (bytes or a seekable file object) to Sarvam STT with key fallback."""
+    client = get_http_client("sarvam")
+    data = {"model": "saarika:v2.5", "language_code": language_code}
+
+    async def send(key: str) -> httpx.Response:
+        if hasattr(content, "seek"):
+            content.seek(0)
+        files = {"file": (filename, content, mime_type)}
+        return await client.post(
+            SARVAM_STT_URL, headers=_headers(key, json_body=False), files=files, data=data,
+            timeout=config.SARVAM_STT_TIMEOUT,
+        )
+
+    response = await send_with_key_pool(key_pool, send, "Sarvam STT")
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Sarvam API Error: {e.response.text}") from e
+    result = response.json()
+    transcript = result.get("transcript", "")
+    logger.info(f"STT [{language_code}] → '{transcript[:80]}...' (file: {filename})")
+    return transcript
 
 
 # ── Translation ───────────────────────────────────────────────────────────────
@@ -152,64 +188,51 @@ async def translate_text(
 ) -> str:
     """
     Translates text using Sarvam AI with automatic key fallback.
+    Sentences already seen for this language pair are served from the translation memory;
+    only the misses go to Sarvam.
     """
-    keys = _get_api_keys()
-    last_error = None
-
-    for i, key in enumerate(keys):
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                headers = {
-                    "api-subscription-key": key,
-                    "Content-Type": "application/json",
-                }
-                payload = {
-                    "input": text,
-                    "source_language_code": source_language,
-                    "target_language_code": target_language,
-                    "speaker_gender": "Female",
-                    "mode": "formal",
-                    "model": "mayura:v1",
-                }
-
-                response = await client.post(
-                    SARVAM_TRANSLATE_URL, headers=headers, json=payload
-                )
-
-                if _should_fallback(response.status_code) and i < len(keys) - 1:
-                    logger.warning(
-                        f"Sarvam Translate key {i+1} failed ({response.status_code}). "
-                        f"Trying key {i+2}..."
-                    )
-                    last_error = response.text
-                    continue
-
-                response.raise_for_status()
-                result = response.json()
-                return result.get("translated_text", "")
-
-        except httpx.HTTPStatusError as e:
-            if _should_fallback(e.response.status_code) and i < len(keys) - 1:
-                logger.warning(
-                    f"Sarvam Translate key {i+1} failed ({e.response.status_code}). "
-                    f"Trying key {i+2}..."
-                )
-                last_error = e.response.text
-                continue
-            raise Exception(f"Sarvam API Error: {e.response.text}") from e
-        except Exception as e:
-            raise e
-
-    raise Exception(f"All Sarvam API keys exhausted. Last error: {last_error}")
+    if not text or not text.strip():
+        return text
+    if not config.TRANSLATION_MEMORY_ENABLED:
+        return await _translate_upstream(text, source_language, target_language)
+
+    async def upstream(chunk: str) -> str:
+        return await _translate_upstream(chunk, source_language, target_language)
+
+    return await translation_memory.translate(
+        text, source_language, target_language,
+        SARVAM_TRANSLATE_MODE, SARVAM_TRANSLATE_MODEL, upstream,
+    )
+
+async def _translate_upstream(text: str, source_language: str, target_language: str) -> str:
+    """Sends text to Sarvam /translate as-is."""
+    client = get_http_client("sarvam")
+    payload = {
+        "input": text,
+        "source_language_code": source_language,
+        "target_language_code": target_language,
+        "speaker_gender": "Female",
+        "mode": SARVAM_TRANSLATE_MODE,
+        "model": SARVAM_TRANSLATE_MODEL,
+    }
+
+    response = await send_with_key_pool(
+        key_pool,
+        lambda key: client.post(SARVAM_TRANSLATE_URL, headers=_headers(key), json=payload),
+        "Sarvam Translate",
+    )
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Sarvam API Error: {e.response.text}") from e
+    result = response.json()
+    return result.get("translated_text", "")
 
 
 # ── Text-to-Speech ────────────────────────────────────────────────────────────
 
-def _clean_for_tts(text: str, max_chars: int = 490) -> str:
-    """
-    Strip markdown and truncate text so Sarvam TTS (500-char limit) doesn't fail.
-    Keeps the first few meaningful sentences.
-    """
+def _strip_markdown(text: str) -> str:
+    """Strips markdown and collapses whitespace so the text reads naturally when spoken."""
     # Remove markdown bold/italic: **text** -> text, *text* -> text
     text = re.sub(r'\*{1,3}(.*?)\*{1,3}', r'\1', text)
     # Remove markdown headers: ## Header -> Header
@@ -219,6 +242,14 @@ def _clean_for_tts(text: str, max_chars: int = 490) -> str:
     # Remove extra whitespace / newlines
     text = re.sub(r'\n+', ' ', text).strip()
     text = re.sub(r'\s{2,}', ' ', text)
+    return text
+
+def _clean_for_tts(text: str, max_chars: int = 490) -> str:
+    """
+    Strip markdown and truncate text so Sarvam TTS (500-char limit) doesn't fail.
+    Keeps the first few meaningful sentences.
+    """
+    text = _strip_markdown(text)
     # Truncate to first N chars at a sentence boundary
     if len(text) > max_chars:
         truncated = text[:max_chars]
@@ -229,6 +260,42 @@ def _clean_for_tts(text: str, max_chars: int = 490) -> str:
         text = truncated
     return text
 
+# Sentence ends: Latin punctuation plus the Devanagari danda used by Hindi/Marathi/Bengali
+_SENTENCE_END = re.compile(r'(?<=[.!?\u0964\u0965])\s+')
+
+def _split_for_tts(text: str, max_chars: int = 490) -> list[str]:
+    """
+    Splits the full (markdown-stripped) text into chunks under Sarvam's per-input limit,
+    breaking at sentence boundaries. Over-long sentences are broken at the last space.
+    """
+    text = _strip_markdown(text)
+    chunks: list[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+def tts_cache_key(text: str, language_code: str) -> str:
+    """Cache key / ETag for the audio of `text` (hash of cleaned text, language, speaker, model)."""
+    return tts_cache.make_key(_clean_for_tts(text), language_code, SARVAM_TTS_SPEAKER, SARVAM_TTS_MODEL)
+
 async def text_to_speech(text: str, language_code: str = "ta-IN") -> bytes:
     """
     Converts text to speech using Sarvam AI with automatic key fallback.
@@ -238,51 +305,82 @@ async def text_to_speech(text: str, language_code: str = "ta-IN") -> bytes:
     text = _clean_for_tts(text)
     if not text.strip():
         raise ValueError("Empty text after cleaning")
+    return await _synthesize(text, language_code)
+
+async def cached_text_to_speech(text: str, language_code: str = "ta-IN") -> tuple[str, bytes]:
+    """
+    Same as text_to_speech, but served from the TTS cache when the same cleaned text
+    was already synthesized. Returns (cache key, audio) so routes can use the key as ETag.
+    """
+    text = _clean_for_tts(text)
+    if not text.strip():
+        raise ValueError("Empty text after cleaning")
+    return await _cached_synthesize(text, language_code)
+
+async def _cached_synthesize(text: str, language_code: str) -> tuple[str, bytes]:
+    key = tts_cache.make_key(text, language_code, SARVAM_TTS_SPEAKER, SARVAM_TTS_MODEL)
+    if not config.TTS_CACHE_ENABLED:
+        return key, await _synthesize(text, language_code)
+
+    audio = await tts_cache.get(key)
+    if audio is None:
+        audio = await _synthesize(text, language_code)
+        await tts_cache.put(key, audio)
+    return key, audio
+
+async def stream_text_to_speech(text: str, language_code: str = "ta-IN") -> AsyncIterator[bytes]:
+    """
+    Chunked TTS for long answers: splits the full text at sentence boundaries, synthesizes
+    the chunks concurrently (bounded by TTS_MAX_PARALLEL_CHUNKS) and yields one continuous
+    WAV stream. The header and first chunk's PCM go out as soon as that chunk is ready.
+    Each chunk goes through the TTS cache individually.
+    """
+    chunks = _split_for_tts(text, config.TTS_CHUNK_MAX_CHARS)
+    if not chunks:
+        raise ValueError("Empty text after cleaning")
+
+    semaphore = asyncio.Semaphore(config.TTS_MAX_PARALLEL_CHUNKS)
+
+    async def synthesize_chunk(chunk: str) -> bytes:
+        async with semaphore:
+            _, audio = await _cached_synthesize(chunk, language_code)
+            return audio
+
+    tasks = [asyncio.create_task(synthesize_chunk(chunk)) for chunk in chunks]
+    logger.info(f"Chunked TTS [{language_code}]: {len(text)} chars -> {len(chunks)} chunks")
+    try:
+        stream_format = None
+        for task in tasks:
+            fmt, frames = read_wav(await task)
+            if stream_format is None:
+                stream_format = fmt
+                yield wav_header(fmt)
+            elif fmt != stream_format:
+                raise ValueError(f"TTS chunk format mismatch: {fmt} != {stream_format}")
+            yield frames
+    finally:
+        # Client disconnected or a chunk failed: don't keep paying for the rest
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def _synthesize(text: str, language_code: str) -> bytes:
+    """Sends already-cleaned text to Sarvam TTS and returns the decoded WAV bytes."""
     logger.info(f"TTS [{language_code}] speaking: '{text[:80]}...'" if len(text) > 80 else f"TTS [{language_code}] speaking: '{text}'")
-    keys = _get_api_keys()
-    last_error = None
-
-    for i, key in enumerate(keys):
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                headers = {
-                    "api-subscription-key": key,
-                    "Content-Type": "application/json",
-                }
-                payload = {
-                    "inputs": [text],
-                    "target_language_code": language_code,
-                    "speaker": "shubh",
-                    "model": "bulbul:v3",
-                }
-
-                response = await client.post(
-                    SARVAM_TTS_URL, headers=headers, json=payload
-                )
-
-                if _should_fallback(response.status_code) and i < len(keys) - 1:
-                    logger.warning(
-                        f"Sarvam TTS key {i+1} failed ({response.status_code}). "
-                        f"Trying key {i+2}..."
-                    )
-                    last_error = response.text
-                    continue
-
-                response.raise_for_status()
-                result = response.json()
-                audio_base64 = result.get("audios", [])[0]
-                return base64.b64decode(audio_base64)
-
-        except httpx.HTTPStatusError as e:
-            if _should_fallback(e.response.status_code) and i < len(keys) - 1:
-                logger.warning(
-                    f"Sarvam TTS key {i+1} failed ({e.response.status_code}). "
-                    f"Trying key {i+2}..."
-                )
-                last_error = e.response.text
-                continue
-            raise e
-        except Exception as e:
-            raise e
-
-    raise Exception(f"All Sarvam API keys exhausted. Last error: {last_error}")
+    client = get_http_client("sarvam")
+    payload = {
+        "inputs": [text],
+        "target_language_code": language_code,
+        "speaker": SARVAM_TTS_SPEAKER,
+        "model": SARVAM_TTS_MODEL,
+    }
+
+    response = await send_with_key_pool(
+        key_pool,
+        lambda key: client.post(SARVAM_TTS_URL, headers=_headers(key), json=payload),
+        "Sarvam TTS",
+    )
+    response.raise_for_status()
+    result = response.json()
+    audio_base64 = result.get("audios", [])[0]
+    return base64.b64decode(audio_base64)
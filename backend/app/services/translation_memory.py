@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import re
+from typing import Awaitable, Callable
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+# Sentence ends (Latin punctuation, Devanagari danda) or line breaks. The separator is
+# kept so the translated sentences can be stitched back with the original spacing.
+_SEGMENT_SPLIT = re.compile(r'((?<=[.!?।॥])[ \t]+|\s*\n\s*)')
+
+# Sarvam translate accepts up to 1000 characters per input
+_MAX_BATCH_CHARS = 900
+
+
+class _OwnerCancelled(Exception):
+    """Set on shared futures when the request translating them was cancelled."""
+
+
+def split_sentences(text: str) -> tuple[list[str], list[str]]:
+    """Returns (sentences, separators) where separators[i] follows sentences[i]."""
+    parts = _SEGMENT_SPLIT.split(text)
+    sentences = parts[0::2]
+    separators = parts[1::2] + [""]
+    return sentences, separators
+
+
+class TranslationMemory:
+    """
+    Sentence-level translation cache with in-flight request coalescing (singleflight).
+    Each (sentence, source, target, mode, model) is translated upstream at most once
+    at a time; concurrent requests for the same sentence await the same future.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: float | None):
+        self.cache = LRUCache(max_items=max_items, ttl_seconds=ttl_seconds)
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.requests = 0
+        self.sentences = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+
+    async def translate(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        mode: str,
+        model: str,
+        upstream: Callable[[str], Awaitable[str]],
+    ) -> str:
+        self.requests += 1
+        sentences, separators = split_sentences(text)
+        results: dict[int, str] = {}
+        waiting: dict[int, asyncio.Future] = {}
+        owned: dict[tuple, asyncio.Future] = {}
+
+        for i, sentence in enumerate(sentences):
+            if not sentence.strip():
+                results[i] = sentence
+                continue
+            self.sentences += 1
+            key = (sentence, source_language, target_language, mode, model)
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[i] = cached
+            elif key in self._inflight:
+                if key not in owned:
+                    self.coalesced += 1
+                waiting[i] = self._inflight[key]
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                owned[key] = future
+                waiting[i] = future
+
+        if owned:
+            await self._fill(list(owned), owned, upstream)
+
+        for i, future in waiting.items():
+            results[i] = await self._wait(sentences[i], source_language, target_language, mode, model, future, upstream)
+
+        return "".join(results[i] + separators[i] for i in range(len(sentences)))
+
+    async def _wait(self, sentence, source_language, target_language, mode, model, future, upstream) -> str:
+        """
+        Awaits a sentence's future without cancelling it for others (shield). If the request
+        that owned it was cancelled, picks the sentence up again: from the cache, from a new
+        owner, or by translating it here.
+        """
+        key = (sentence, source_language, target_language, mode, model)
+        while True:
+            try:
+                return await asyncio.shield(future)
+            except _OwnerCancelled:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+                future = self._inflight.get(key)
+                if future is None:
+                    future = asyncio.get_running_loop().create_future()
+                    self._inflight[key] = future
+                    await self._fill([key], {key: future}, upstream)
+
+    async def _fill(self, keys: list[tuple], owned: dict[tuple, asyncio.Future], upstream):
+        """Translates the missing sentences this request owns and resolves their futures."""
+        try:
+            for batch in self._batches(keys):
+                translations = await self._translate_batch([key[0] for key in batch], upstream)
+                for key, translated in zip(batch, translations):
+                    self.cache.put(key, translated)
+                    owned[key].set_result(translated)
+        except asyncio.CancelledError:
+            # Only this request was cancelled: waiters retry instead of being cancelled too
+            for future in owned.values():
+                if not future.done():
+                    future.set_exception(_OwnerCancelled())
+            raise
+        except Exception as e:
+            for future in owned.values():
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            for key in owned:
+                self._inflight.pop(key, None)
+            for future in owned.values():
+                # Mark exceptions as retrieved when no other request was waiting on them
+                if future.done() and not future.cancelled():
+                    future.exception()
+
+    @staticmethod
+    def _batches(keys: list[tuple]) -> list[list[tuple]]:
+        batches, current, size = [], [], 0
+        for key in keys:
+            if current and size + len(key[0]) + 1 > _MAX_BATCH_CHARS:
+                batches.append(current)
+                current, size = [], 0
+            current.append(key)
+            size += len(key[0]) + 1
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _translate_batch(self, sentences: list[str], upstream) -> list[str]:
+        """
+        Sends the misses as one newline-joined input. If the upstream merges or splits
+        lines, falls back to translating each sentence on its own.
+        """
+        self.upstream_calls += 1
+        if len(sentences) == 1:
+            return [await upstream(sentences[0])]
+        translated = (await upstream("\n".join(sentences))).split("\n")
+        if len(translated) == len(sentences):
+            return [t.strip() for t in translated]
+        logger.info(f"Translation batch of {len(sentences)} lines came back as {len(translated)}. Retrying per sentence.")
+        self.upstream_calls += len(sentences)
+        return list(await asyncio.gather(*(upstream(s) for s in sentences)))
+
+    def stats(self) -> dict:
+        cache = self.cache.stats()
+        return {
+            **cache,
+            "requests": self.requests,
+            "sentences": self.sentences,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.upstream_calls,
+            "inflight": len(self._inflight),
+        }
+
+
+translation_memory = TranslationMemory(
+    max_items=config.TRANSLATION_MEMORY_MAX_ITEMS,
+    ttl_seconds=config.TRANSLATION_MEMORY_TTL_SECONDS,
+)
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    Content-addressed cache for synthesized audio.
+    Tier 1 is a byte-bounded in-memory LRU, tier 2 a size-capped directory of .wav files.
+    The key is a hash of (cleaned text, language, speaker, model), so it doubles as an ETag.
+    """
+
+    def __init__(self, directory: str, memory_max_bytes: int, disk_max_bytes: int):
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.memory = LRUCache(max_items=10_000, max_bytes=memory_max_bytes)
+        # key -> file size, ordered by last access (oldest first)
+        self._disk_index: OrderedDict[str, int] = OrderedDict()
+        self.disk_bytes = 0
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self.misses = 0
+        self._writing: set[str] = set()  # keys whose file is being written, not yet in _disk_index
+        self._load_disk_index()
+
+    @staticmethod
+    def make_key(text: str, language_code: str, speaker: str, model: str) -> str:
+        raw = "\x1f".join([text, language_code, speaker, model])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def _load_disk_index(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith(".wav"):
+                    st = os.stat(os.path.join(self.directory, name))
+                    entries.append((st.st_mtime, name[:-4], st.st_size))
+            for _, key, size in sorted(entries):
+                self._disk_index[key] = size
+                self.disk_bytes += size
+            logger.info(f"TTS cache: {len(self._disk_index)} files ({self.disk_bytes} bytes) in {self.directory}")
+        except OSError as e:
+            logger.warning(f"TTS disk cache unavailable ({e}). Using memory tier only.")
+            self.disk_max_bytes = 0
+
+    def _read_file(self, key: str) -> bytes:
+        path = self._path(key)
+        with open(path, "rb") as f:
+            audio = f.read()
+        os.utime(path)  # Bump mtime so LRU order survives restarts
+        return audio
+
+    def _write_file(self, key: str, audio: bytes):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+    def _remove_files(self, keys: list[str]):
+        for old_key in keys:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+
+    def contains(self, key: str) -> bool:
+        return key in self.memory or key in self._disk_index
+
+    async def get(self, key: str) -> bytes | None:
+        audio = self.memory.get(key)
+        if audio is not None:
+            return audio
+        if key in self._disk_index:
+            try:
+                audio = await asyncio.to_thread(self._read_file, key)
+            except OSError:
+                self.disk_bytes -= self._disk_index.pop(key)
+            else:
+                self._disk_index.move_to_end(key)
+                self.disk_hits += 1
+                self.memory.put(key, audio)
+                return audio
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, audio: bytes):
+        self.memory.put(key, audio)
+        if len(audio) > self.disk_max_bytes or key in self._disk_index or key in self._writing:
+            return
+        # Only index the key once its file exists, so a concurrent get never finds it missing
+        self._writing.add(key)
+        try:
+            await asyncio.to_thread(self._write_file, key, audio)
+        except OSError as e:
+            logger.warning(f"TTS disk cache write failed: {e}")
+            return
+        finally:
+            self._writing.discard(key)
+        self._disk_index[key] = len(audio)
+        self.disk_bytes += len(audio)
+        evict = []
+        while self.disk_bytes > self.disk_max_bytes:
+            old_key, size = self._disk_index.popitem(last=False)
+            self.disk_bytes -= size
+            self.disk_evictions += 1
+            evict.append(old_key)
+        if evict:
+            try:
+                await asyncio.to_thread(self._remove_files, evict)
+            except OSError as e:
+                logger.warning(f"TTS disk cache eviction failed: {e}")
+
+    def stats(self) -> dict:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + self.disk_hits + self.misses
+        return {
+            "memory": memory,
+            "disk": {
+                "items": len(self._disk_index),
+                "bytes": self.disk_bytes,
+                "max_bytes": self.disk_max_bytes,
+                "hits": self.disk_hits,
+                "evictions": self.disk_evictions,
+            },
+            "misses": self.misses,
+            "hit_rate": round((memory["hits"] + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+tts_cache = TTSCache(
+    directory=config.TTS_CACHE_DIR,
+    memory_max_bytes=config.TTS_CACHE_MEMORY_MAX_BYTES,
+    disk_max_bytes=config.TTS_CACHE_DISK_MAX_BYTES,
+)
@@ -0,0 +1,148 @@
+import asyncio
+import base64
+import io
+import logging
+import time
+from typing import AsyncIterator
+from app.core.config import get_settings
+from app.services.gemini import gemini_service
+from app.services.knowledge_index import match_knowledge
+from app.services.sarvam import (
+    cached_text_to_speech,
+    speech_to_text,
+    translate_text,
+    transliterate_to_native_script,
+    _is_tanglish,
+)
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+# Sarvam language code -> the language name Gemini is asked to answer in (as the app does)
+LANGUAGE_NAMES = {
+    "en-IN": "English",
+    "ta-IN": "Tamil",
+    "hi-IN": "Hindi",
+    "pa-IN": "Punjabi",
+    "te-IN": "Telugu",
+    "bn-IN": "Bengali",
+    "mr-IN": "Marathi",
+    "gu-IN": "Gujarati",
+    "kn-IN": "Kannada",
+    "ml-IN": "Malayalam",
+    "od-IN": "Odia",
+}
+
+# Same retrieval settings as the app's searchSimilarKnowledge / voice screen
+MATCH_THRESHOLD = 0.78
+MATCH_COUNT = 3
+GOOD_MATCH_SIMILARITY = 0.75
+
+
+class _Timings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    async def run(self, stage: str, awaitable):
+        """Awaits one stage and records its duration (not recorded if it fails or is cancelled)."""
+        start = time.perf_counter()
+        result = await awaitable
+        self.stages[stage] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    def elapsed(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+
+async def ask_events(audio: bytes, filename: str | None, source_language: str) -> AsyncIterator[dict]:
+    """
+    The app's voice question flow, run server-side. Yields one dict per partial result:
+
+        transcript   STT (+ Tanglish transliteration) in the farmer's language
+        translation  the English question
+        matches      verified knowledge posts (match_knowledge, threshold 0.78, top 3)
+        answer       the best post (>= 0.75) translated back, otherwise Gemini's answer
+        audio        base64 WAV of the answer, or the post's own `audio_url`
+        done         per-stage and total timings (ms)
+
+    Retrieval (embed + match) and the Gemini answer both start as soon as the English text
+    exists; the Gemini call is cancelled if a good enough post is found. STT failures
+    propagate before anything is yielded, so routes can still turn them into HTTP errors.
+    Later failures are yielded as an `error` event, which ends the stream.
+    """
+    timings = _Timings()
+    transcript = await timings.run("stt", speech_to_text(io.BytesIO(audio), source_language, filename=filename))
+    if _is_tanglish(transcript, source_language):
+        transcript = await timings.run("transliterate", transliterate_to_native_script(transcript, source_language))
+    yield {"event": "transcript", "transcript": transcript, "source_language": source_language, "elapsed_ms": timings.elapsed()}
+    if not transcript.strip():
+        yield {"event": "done", "timings_ms": timings.stages, "total_ms": timings.elapsed()}
+        return
+
+    stage = "translate"
+    language_name = LANGUAGE_NAMES.get(source_language, "English")
+    ai_answer: asyncio.Task | None = None
+    embedding_task: asyncio.Task | None = None
+    try:
+        if source_language == "en-IN":
+            english = transcript
+        else:
+            english = await timings.run("translate", translate_text(transcript, source_language, "en-IN"))
+        yield {"event": "translation", "text": english, "elapsed_ms": timings.elapsed()}
+
+        # One embedding, shared by retrieval and the answer cache lookup
+        embedding_task = asyncio.create_task(timings.run("embed", gemini_service.generate_query_embedding(english)))
+        # Speculative: only used when retrieval finds nothing good, but it's the slowest stage
+        ai_answer = asyncio.create_task(timings.run(
+            "answer", gemini_service.generate_answer_cached(english, language_name, embedding=embedding_task)
+        ))
+
+        stage = "retrieve"
+        embedding = await embedding_task
+        if embedding is None:
+            raise RuntimeError("Failed to generate embedding")
+        matches, source = await timings.run("retrieve", match_knowledge(embedding, MATCH_THRESHOLD, MATCH_COUNT))
+        yield {"event": "matches", "matches": matches, "source": source, "elapsed_ms": timings.elapsed()}
+
+        stage = "answer"
+        best = matches[0] if matches else None
+        if best is not None and (best.get("similarity") or 0) >= GOOD_MATCH_SIMILARITY:
+            ai_answer.cancel()
+            english_answer = best.get("english_text") or best.get("original_text") or ""
+            if source_language == "en-IN" or not english_answer:
+                answer = english_answer
+            else:
+                answer = await timings.run("translate_answer", translate_text(english_answer, "en-IN", source_language))
+            yield {
+                "event": "answer", "source": "knowledge", "answer": answer, "answer_english": english_answer,
+                "post_id": best.get("id"), "similarity": best.get("similarity"), "elapsed_ms": timings.elapsed(),
+            }
+            audio_url = best.get("audio_url")
+        else:
+            # Gemini answers in the farmer's language directly, so no translation back
+            answer, similarity = await ai_answer
+            yield {
+                "event": "answer", "source": "ai", "answer": answer, "cached": similarity is not None,
+                "elapsed_ms": timings.elapsed(),
+            }
+            audio_url = None
+
+        stage = "tts"
+        if audio_url:
+            yield {"event": "audio", "audio_url": audio_url, "elapsed_ms": timings.elapsed()}
+        elif answer.strip():
+            _, speech = await timings.run("tts", cached_text_to_speech(answer, source_language))
+            yield {
+                "event": "audio", "audio": base64.b64encode(speech).decode("ascii"), "media_type": "audio/wav",
+                "elapsed_ms": timings.elapsed(),
+            }
+        yield {"event": "done", "timings_ms": timings.stages, "total_ms": timings.elapsed()}
+    except Exception as e:
+        logger.error(f"Voice pipeline failed at {stage}: {e}")
+        yield {"event": "error", "stage": stage, "detail": str(e), "timings_ms": timings.stages}
+    finally:
+        for task in (ai_answer, embedding_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,147 @@
+"""
+Replays a question log through GeminiService.generate_answer_cached and reports how
+often the semantic answer cache hits and how much answer latency it saves.
+
+Answer generation is stubbed with a fixed delay (--generate-ms), and each question is
+embedded either with a local character-trigram embedding (default, no key needed) or
+with Gemini itself (--live, needs GEMINI_API_KEY[S]). Trigram vectors only capture
+spelling overlap, so their similarities run lower than Gemini's: use the default mode to
+check the wiring and the threshold sweep's shape, and --live to pick ANSWER_CACHE_THRESHOLD.
+`wrong` counts hits answered from a question on a different topic (exact-text match
+for --log files, which carry no topic labels); `reworded` counts hits answered from a
+different wording of the same topic, the ones only a semantic cache can serve.
+
+The log is a text file with one question per line, optionally prefixed by its language
+and a tab ("Hindi\\tमिर्च में पत्ती मुड़ना"). Without --log a built-in seasonal mix of
+paraphrased farmer questions is replayed.
+
+Usage:
+    python bench_answer_cache.py
+    python bench_answer_cache.py --log questions.txt --thresholds 0.88,0.92,0.95 --live
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import re
+import time
+import numpy as np
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+
+import app.services.gemini as gemini_module  # noqa: E402
+from app.services.answer_cache import answer_cache  # noqa: E402
+
+service = gemini_module.gemini_service
+
+# Base questions and the ways farmers actually phrase them
+SAMPLE_QUESTIONS = [
+    ("English", ["leaf curl in chilli", "chilli leaves curling", "my chilli plant leaves are curling what to do",
+                 "how to control leaf curl in chilli"]),
+    ("English", ["whitefly on cotton", "whiteflies in cotton field", "how to control whitefly in cotton",
+                 "cotton whitefly attack"]),
+    ("English", ["yellow leaves in paddy", "paddy leaves turning yellow", "why are my rice leaves yellow"]),
+    ("English", ["blast disease in rice", "rice blast control", "how to treat paddy blast"]),
+    ("English", ["tomato fruit borer", "worms in tomato fruits", "how to stop fruit borer in tomato"]),
+    ("English", ["best fertilizer for sugarcane", "which fertilizer for sugarcane", "sugarcane fertilizer dose"]),
+    ("English", ["stem borer in maize", "maize stem borer control", "how to control stem borer in corn"]),
+    ("English", ["fall armyworm in maize", "armyworm on corn leaves", "how to control fall armyworm in maize"]),
+    ("English", ["when to sow wheat", "wheat sowing time", "right time to sow wheat"]),
+    ("Hindi", ["मिर्च में पत्ती मुड़ना", "मिर्च की पत्तियां मुड़ रही हैं", "मिर्च में लीफ कर्ल का इलाज"]),
+    ("Hindi", ["कपास में सफेद मक्खी", "कपास पर सफेद मक्खी का नियंत्रण", "सफेद मक्खी कपास में कैसे रोकें"]),
+    ("Hindi", ["धान की पत्तियां पीली", "धान में पीलापन", "धान के पत्ते पीले क्यों हो रहे हैं"]),
+]
+
+
+def sample_log(size: int, seed: int = 0) -> list[tuple[str, str]]:
+    """A season's worth of questions: a few topics dominate (Zipf-like), phrasings vary."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(SAMPLE_QUESTIONS))]
+    log = []
+    for _ in range(size):
+        language, phrasings = rng.choices(SAMPLE_QUESTIONS, weights)[0]
+        log.append((language, rng.choice(phrasings)))
+    return log
+
+
+def read_log(path: str) -> list[tuple[str, str]]:
+    log = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            language, _, question = line.rstrip("\n").rpartition("\t")
+            if question.strip():
+                log.append((language or "English", question.strip()))
+    return log
+
+
+def trigram_embedding(text: str, dimension: int) -> np.ndarray:
+    vector = np.zeros(dimension, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            digest = hashlib.blake2b(padded[i:i + 3].encode(), digest_size=8).digest()
+            vector[int.from_bytes(digest, "little") % dimension] += 1.0
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+def install_stubs(generate_ms: float, live: bool):
+    async def generate(prompt, max_retries=3):
+        await asyncio.sleep(generate_ms / 1000)
+        query = re.search(r'question: "(.*?)"', prompt).group(1)
+        return f"answer to: {query}"
+
+    service._generate_with_retry = generate
+    if not live:
+        async def embed(text):
+            return trigram_embedding(text, gemini_module.EMBEDDING_DIMENSION)
+
+        service.generate_query_embedding = embed
+
+
+async def replay(log: list[tuple[str, str]], threshold: float) -> dict:
+    """Returns the cache stats plus wall time, and hits answered from a different topic / a reworded question."""
+    topics = {phrasing: topic for topic, (_, phrasings) in enumerate(SAMPLE_QUESTIONS) for phrasing in phrasings}
+    answer_cache.purge()
+    answer_cache.threshold = threshold
+    answer_cache.hits = answer_cache.misses = 0
+    answer_cache.saved_ms = 0.0
+    wrong = reworded = 0
+    start = time.perf_counter()
+    for language, question in log:
+        answer, similarity = await service.generate_answer_cached(question, language)
+        source = answer.removeprefix("answer to: ")
+        if similarity is None or source == question:
+            continue
+        if topics.get(source, source) != topics.get(question, question):
+            wrong += 1
+        else:
+            reworded += 1
+    return {**answer_cache.stats(), "elapsed_ms": (time.perf_counter() - start) * 1000, "wrong": wrong,
+            "reworded": reworded}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", help="Question log (one per line, optional 'language<TAB>' prefix)")
+    parser.add_argument("--size", type=int, default=300, help="Questions in the built-in log")
+    parser.add_argument("--thresholds", default="0.7,0.8,0.85,0.9,0.92,0.95")
+    parser.add_argument("--generate-ms", type=float, default=2500.0, help="Stubbed Gemini answer latency")
+    parser.add_argument("--live", action="store_true", help="Embed with Gemini instead of trigram vectors")
+    args = parser.parse_args()
+
+    log = read_log(args.log) if args.log else sample_log(args.size)
+    install_stubs(args.generate_ms, args.live)
+    baseline_ms = len(log) * args.generate_ms
+    print(f"{len(log)} questions, {args.generate_ms:.0f} ms per generated answer, "
+          f"{'Gemini' if args.live else 'trigram'} embeddings")
+    print(f"{'threshold':>9} {'hits':>6} {'hit rate':>9} {'reworded':>9} {'wrong':>6} {'saved s':>9} {'mean ms':>9} {'uncached ms':>12}")
+    for threshold in [float(t) for t in args.thresholds.split(",")]:
+        stats = await replay(log, threshold)
+        print(f"{threshold:>9.2f} {stats['hits']:>6} {stats['hit_rate']:>9.1%} {stats['reworded']:>9} {stats['wrong']:>6} {stats['saved_ms'] / 1000:>9.1f} "
+              f"{stats['elapsed_ms'] / len(log):>9.1f} {baseline_ms / len(log):>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Time to first token / first audio for streamed answers vs the blocking flow.
+
+Gemini and Sarvam TTS are replaced by local stubs: the answer arrives in chunks (first
+chunk after --first-chunk-ms, then one every --chunk-ms), and TTS takes a fixed round trip
+plus a per-character cost. Two flows, each run --runs times:
+
+    blocking    /answer (full generation), then /speech/speak on the whole answer
+    streamed    /answer/stream with speak: tokens as generated, TTS per finished sentence
+
+Usage:
+    python bench_answer_stream.py
+    python bench_answer_stream.py --first-chunk-ms 600 --chunk-ms 150 --tts-ms 400
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("GEMINI_API_KEYS", "bench-key-1")
+os.environ.setdefault("TTS_CACHE_ENABLED", "false")  # Every sentence must reach the stub
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+
+import app.services.gemini as gemini_module  # noqa: E402
+import app.services.sarvam as sarvam_module  # noqa: E402
+from app.services.answer_stream import answer_events  # noqa: E402
+
+service = gemini_module.gemini_service
+
+ANSWER = (
+    "Leaf curl in chilli is usually spread by whiteflies and thrips. "
+    "Remove and burn the curled plants as soon as you see them. "
+    "Spray neem oil at 5 ml per litre of water every 7 days. "
+    "If the attack is heavy, use imidacloprid 17.8 SL at 0.3 ml per litre. "
+    "Put up yellow sticky traps, about 10 per acre, to catch the whiteflies. "
+    "Next season, raise the nursery under an insect net."
+)
+
+
+def install_stubs(first_chunk: float, chunk_interval: float, chunk_chars: int, tts_latency: float, tts_per_char: float):
+    pieces = [ANSWER[i:i + chunk_chars] for i in range(0, len(ANSWER), chunk_chars)]
+
+    class StubResponse:
+        async def __aiter__(self):
+            for i, piece in enumerate(pieces):
+                await asyncio.sleep(first_chunk if i == 0 else chunk_interval)
+                yield SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=piece)]))])
+
+        @property
+        def text(self):
+            return ANSWER
+
+    class StubModel:
+        async def generate_content_async(self, prompt, stream=False):
+            if stream:
+                return StubResponse()
+            await asyncio.sleep(first_chunk + chunk_interval * (len(pieces) - 1))
+            return StubResponse()
+
+    model = StubModel()
+    for clients in service._key_clients.values():
+        type(clients).model = property(lambda self: model)
+
+    async def synthesize(text, language_code):
+        await asyncio.sleep(tts_latency + tts_per_char * len(text))
+        return b"RIFF" + bytes(len(text))
+
+    sarvam_module._synthesize = synthesize
+
+
+async def blocking() -> tuple[float, float, float]:
+    start = time.perf_counter()
+    answer = await service.generate_answer("leaf curl in chilli", "English")
+    first_token = time.perf_counter() - start
+    await sarvam_module.cached_text_to_speech(answer, "en-IN")
+    done = time.perf_counter() - start
+    return first_token, done, done
+
+
+async def streamed() -> tuple[float, float, float]:
+    start = time.perf_counter()
+    first_token = first_audio = None
+    async for event, _ in answer_events("leaf curl in chilli", "English", "en-IN"):
+        now = time.perf_counter() - start
+        if event == "token" and first_token is None:
+            first_token = now
+        elif event == "audio" and first_audio is None:
+            first_audio = now
+    return first_token, first_audio, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--first-chunk-ms", type=float, default=700.0)
+    parser.add_argument("--chunk-ms", type=float, default=120.0)
+    parser.add_argument("--chunk-chars", type=int, default=40)
+    parser.add_argument("--tts-ms", type=float, default=350.0)
+    parser.add_argument("--tts-per-char-ms", type=float, default=2.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    install_stubs(args.first_chunk_ms / 1000, args.chunk_ms / 1000, args.chunk_chars,
+                  args.tts_ms / 1000, args.tts_per_char_ms / 1000)
+    print(f"{len(ANSWER)}-char answer in {args.chunk_chars}-char chunks; TTS {args.tts_ms:.0f} ms + {args.tts_per_char_ms} ms/char")
+    print(f"{'flow':>10} {'first token ms':>15} {'first audio ms':>15} {'all done ms':>12}")
+    for name, flow in (("blocking", blocking), ("streamed", streamed)):
+        results = [await flow() for _ in range(args.runs)]
+        token, audio, done = (statistics.median(column) * 1000 for column in zip(*results))
+        print(f"{name:>10} {token:>15.0f} {audio:>15.0f} {done:>12.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Hit rate of the bucketed Groq crop analysis cache on a simulated day of /crop/analyze traffic.
+
+Requests come from --blocks villages (popularity ~ Zipf). Each block has a soil health card
+drawn from a Crop_classification.csv row and one OpenWeather cell whose temperature and
+humidity follow the time of day. A farmer either copies the block's card exactly (--copy
+share) or enters values a few kg/ha off; rainfall is typed in as a round number most of
+the time. predicted_top_crop comes from a nearest-centroid model over the CSV (a stand-in
+for the classifier), the ranking from the real crop scorer, and the language is the block's.
+
+For each bucket configuration it replays the day against CropAnalysisCache on a virtual
+clock (so the TTL applies) with a stub upstream, and reports:
+
+    hit rate     share of requests answered from the cache
+    saved        Groq time saved at --groq-ms per call
+
+The scorer's top 5 is part of the key, so a hit always carries advice for the crops the
+request itself ranked; bucketing can only cost hit rate, not hand back the wrong crops.
+
+Usage:
+    python bench_crop_cache.py
+    python bench_crop_cache.py --requests 5000 --blocks 100 --copy 0.4
+"""
+import argparse
+import asyncio
+import csv
+import os
+import numpy as np
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+
+import app.core.cache as cache_module  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+from app.services.crop_cache import CropAnalysisCache  # noqa: E402
+from app.services.crop_scorer import crop_scorer  # noqa: E402
+
+config = get_settings()
+CSV_PATH = os.path.join(os.path.dirname(__file__), "crop_prediction_backend", "Crop_classification.csv")
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+LANGUAGES = ["ta", "ta", "ta", "en", "hi", "te", "kn", "ml"]
+
+CONFIGS = {
+    "exact": {"npk": 1.0, "ph": 0.01, "temperature": 0.01, "humidity": 0.01, "rainfall": 1.0},
+    "default": {
+        "npk": config.CROP_CACHE_NPK_STEP,
+        "ph": config.CROP_CACHE_PH_STEP,
+        "temperature": config.CROP_CACHE_TEMPERATURE_STEP,
+        "humidity": config.CROP_CACHE_HUMIDITY_STEP,
+        "rainfall": config.CROP_CACHE_RAINFALL_STEP,
+    },
+    "coarse": {"npk": 20.0, "ph": 0.5, "temperature": 2.0, "humidity": 10.0, "rainfall": 50.0},
+}
+
+
+def load_csv() -> tuple[np.ndarray, list[str]]:
+    with open(CSV_PATH, newline="") as f:
+        rows = list(csv.DictReader(f))
+    return np.array([[float(row[name]) for name in FEATURES] for row in rows]), [row["label"] for row in rows]
+
+
+class NearestCentroid:
+    def __init__(self, X: np.ndarray, labels: list[str]):
+        self.classes = sorted(set(labels))
+        y = np.array([self.classes.index(label) for label in labels])
+        self.scale = X.std(axis=0)
+        self.centroids = np.stack([X[y == c].mean(axis=0) for c in range(len(self.classes))]) / self.scale
+
+    def predict(self, x: np.ndarray) -> str:
+        return self.classes[int(np.argmin(((self.centroids - x / self.scale) ** 2).sum(axis=1)))]
+
+
+def simulate(args, X: np.ndarray, model: NearestCentroid) -> list[tuple[float, tuple]]:
+    """A day of requests: (seconds since midnight, analyze_crops arguments)."""
+    rng = np.random.default_rng(args.seed)
+    cards = X[rng.integers(len(X), size=args.blocks)]
+    weather = [(rng.uniform(24, 34), rng.uniform(50, 85)) for _ in range(args.blocks)]  # daily mean temp, humidity
+    languages = [LANGUAGES[i] for i in rng.integers(len(LANGUAGES), size=args.blocks)]
+    popularity = 1 / np.arange(1, args.blocks + 1) ** 0.8
+    popularity /= popularity.sum()
+
+    requests = []
+    for t in np.sort(rng.uniform(6 * 3600, 21 * 3600, size=args.requests)):
+        block = rng.choice(args.blocks, p=popularity)
+        n, p, k, _, _, ph, rain = cards[block]
+        n, p, k, ph = round(n), round(p), round(k), round(ph, 1)  # what's printed on the card
+        if rng.random() >= args.copy:
+            n, p, k = (max(0, v + round(rng.normal(0, 4))) for v in (n, p, k))
+            ph = round(ph + rng.normal(0, 0.1), 1)
+        rain = round(rain, -1) if rng.random() < 0.7 else round(rain + rng.normal(0, 8))
+        # OpenWeather's current conditions for the cell: warmest mid-afternoon, updated every 10 minutes
+        hour = (t // 600 * 600) / 3600
+        mean_temp, mean_humidity = weather[block]
+        temp = mean_temp + 4 * np.sin((hour - 9) / 24 * 2 * np.pi) + rng.normal(0, 0.1)
+        humidity = mean_humidity - 12 * np.sin((hour - 9) / 24 * 2 * np.pi) + rng.normal(0, 0.5)
+        values = np.array([n, p, k, temp, humidity, ph, rain])
+        requests.append((t, (model.predict(values), n, p, k, ph, rain, round(temp, 2), round(humidity), languages[block])))
+    return requests
+
+
+async def replay(requests, steps: dict, groq_ms: float, ttl: float) -> dict:
+    clock = [0.0]
+    cache_module.time.monotonic = lambda: clock[0]  # TTL on the simulated day's clock
+    cache = CropAnalysisCache(max_items=config.CROP_CACHE_MAX_ITEMS, ttl_seconds=ttl, steps=steps)
+    rankings = crop_scorer.top_crops(np.array([
+        [n, p, k, temp, humidity, ph, rain] for _, (_, n, p, k, ph, rain, temp, humidity, _) in requests
+    ]))
+    for (t, values), ranked in zip(requests, rankings):
+        clock[0] = t
+        crops = [crop["crop"] for crop in ranked]
+
+        async def fetch():
+            return {crop.lower(): {"why_suitable": "..."} for crop in crops}
+
+        await cache.get_or_fetch(cache.key(*values, crops), fetch)
+    stats = cache.stats()
+    hits = stats["hits"]
+    return {"hit_rate": stats["hit_rate"], "hits": hits, "saved_s": hits * groq_ms / 1000, "items": stats["items"]}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000, help="Requests in the simulated day")
+    parser.add_argument("--blocks", type=int, default=60)
+    parser.add_argument("--copy", type=float, default=0.6, help="Share of farmers who copy the block's soil card")
+    parser.add_argument("--groq-ms", type=float, default=7000.0, help="Typical analyze_crops latency")
+    parser.add_argument("--ttl", type=float, default=config.CROP_CACHE_TTL_SECONDS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    X, labels = load_csv()
+    model = NearestCentroid(X, labels)
+    requests = simulate(args, X, model)
+    print(f"{len(requests)} requests from {args.blocks} blocks, {args.copy:.0%} copy the soil card, "
+          f"TTL {args.ttl / 3600:.0f} h, Groq {args.groq_ms:.0f} ms per call")
+    print(f"\n{'buckets':<9} {'hit rate':>9} {'Groq calls':>11} {'saved':>9}  steps")
+    for name, steps in CONFIGS.items():
+        r = await replay(requests, steps, args.groq_ms, args.ttl)
+        print(f"{name:<9} {r['hit_rate']:>9.1%} {r['items']:>11} {r['saved_s'] / 60:>7.0f} m  {steps}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Accuracy and speed of the local crop scorer behind /api/v1/crop/analyze.
+
+    accuracy    5-fold cross-validation over Crop_classification.csv: profiles are derived
+                from 4/5 of the rows and each held-out row's true crop is looked up in the
+                ranking (top-1 / top-5), plus how often the top crop is rated Low risk
+    latency     CropScorer.top_crops for one request, and score() per row for a batch
+    prompt      size of the narrative prompt Groq now gets (the old prompt, with the full
+                22-crop table, was ~4,000 characters / ~1,200 tokens)
+
+With --live (needs GROQ_API_KEY) it also times analyze_crops end to end with the cache off.
+
+Usage:
+    python bench_crop_scorer.py
+    python bench_crop_scorer.py --live --language ta
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import numpy as np
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+
+from app.services.crop_scorer import CropScorer, crop_scorer, load_profiles_csv, risk_level  # noqa: E402
+from app.services import groq as groq_service  # noqa: E402
+
+
+def cross_validate(folds: int = 5) -> tuple[float, float, float]:
+    X, labels = load_profiles_csv()
+    labels = np.array(labels)
+    fold = np.random.default_rng(0).permutation(len(X)) % folds
+    top1 = top5 = low_risk = 0
+    for k in range(folds):
+        scorer = CropScorer(X[fold != k], list(labels[fold != k]))
+        confidence, ranking, _ = scorer.score(X[fold == k])
+        truth = np.array([scorer.labels.index(label) for label in labels[fold == k]])
+        top1 += (ranking[:, 0] == truth).sum()
+        top5 += (ranking[:, :5] == truth[:, None]).any(axis=1).sum()
+        best = confidence[np.arange(len(truth)), ranking[:, 0]]
+        low_risk += sum(risk_level(score) == "Low" for score in best)
+    return top1 / len(X), top5 / len(X), low_risk / len(X)
+
+
+def timed(fn, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--live", action="store_true", help="Also time analyze_crops with a real Groq call")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    top1, top5, low_risk = cross_validate()
+    print(f"5-fold CV on Crop_classification.csv: top-1 {top1:.1%}, top-5 {top5:.1%}, "
+          f"best crop rated Low risk {low_risk:.1%}")
+
+    sample = [90, 42, 43, 20.9, 82.0, 6.5, 203.0]  # N, P, K, temperature, humidity, ph, rainfall
+    single = timed(lambda: crop_scorer.top_crops(sample), args.repeat)
+    batch = np.random.default_rng(1).uniform([0, 5, 5, 10, 15, 4, 20], [140, 145, 205, 40, 100, 9, 300], (args.batch, 7))
+    batched = timed(lambda: crop_scorer.score(batch), 20)
+    print(f"top_crops, one request: p50 {statistics.median(single) * 1000:.0f} us, "
+          f"p99 {np.percentile(single, 99) * 1000:.0f} us")
+    print(f"score, batch of {args.batch}: {statistics.median(batched) / args.batch * 1000:.1f} us per row")
+
+    ranked = crop_scorer.top_crops(sample)[0]
+    prompt = groq_service._narrative_prompt(ranked, "rice", 90, 42, 43, 6.5, 203.0, 20.9, 82.0, args.language)
+    print(f"narrative prompt: {len(prompt)} characters (~{len(prompt) // 4} tokens)")
+    print("ranking: " + ", ".join(f"{c['crop']} {c['confidence_score']:.2f} {c['risk_level']}" for c in ranked))
+
+    if args.live:
+        groq_service.config.CROP_CACHE_ENABLED = False
+        start = time.perf_counter()
+        result = await groq_service.analyze_crops("rice", 90, 42, 43, 6.5, 203.0, 20.9, 82.0, args.language)
+        print(f"analyze_crops with Groq narrative: {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"advice for {sum(bool(c['planting_advice']) for c in result)} of {len(result)} crops")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
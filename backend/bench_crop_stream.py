@@ -0,0 +1,117 @@
+"""
+Time to first crop: /crop/analyze (whole Groq response, then parse) vs /crop/analyze/stream
+(ranking first, then each crop as soon as its JSON object is complete).
+
+Groq is a local stub (httpx MockTransport) that "generates" a realistic narrative for the
+5 ranked crops: --ttft-ms before the first token, then --tokens-per-second, with text
+in --language (Tamil costs more tokens per character than English). The stub wraps the
+array in a ```json fence like Groq sometimes does. Both paths run the real groq.py code
+with the crop cache off, and the streamed crops are checked against the blocking result.
+
+Usage:
+    python bench_crop_stream.py
+    python bench_crop_stream.py --tokens-per-second 150 --language en
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+from app.services import groq as groq_service  # noqa: E402
+from app.services.crop_scorer import crop_scorer  # noqa: E402
+
+SENTENCES = {
+    "ta": ("இந்த மண்ணில் உள்ள நைட்ரஜன் மற்றும் பாஸ்பரஸ் அளவுகள் இந்தப் பயிருக்கு ஏற்றதாக உள்ளன.", 2.5),
+    "en": ("The nitrogen and phosphorus levels in this soil are well suited to this crop.", 4.0),
+}
+INPUT = ("rice", 90, 42, 43, 6.5, 203.0, 20.9, 82.0)  # predicted crop, N, P, K, pH, rainfall, temperature, humidity
+
+
+def narrative(ranked: list[dict], sentence: str) -> str:
+    items = [
+        {
+            "crop": crop["crop"],
+            "risk_cause": sentence,
+            "why_suitable": f"{sentence} {sentence}",
+            "improvement_steps": [sentence] * 3,
+            "planting_advice": [sentence] * 4,
+        }
+        for crop in ranked
+    ]
+    return "```json\n" + json.dumps(items, ensure_ascii=False, indent=2) + "\n```"
+
+
+def stub_transport(content: str, args, chars_per_token: float) -> httpx.MockTransport:
+    chunk_chars = max(1, round(8 * chars_per_token))  # Groq sends a few tokens per event
+    token_delay = 1 / args.tokens_per_second
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if not body.get("stream"):
+            await asyncio.sleep(args.ttft_ms / 1000 + len(content) / chars_per_token * token_delay)
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+        async def events():
+            await asyncio.sleep(args.ttft_ms / 1000)
+            for i in range(0, len(content), chunk_chars):
+                await asyncio.sleep(chunk_chars / chars_per_token * token_delay)
+                delta = {"choices": [{"delta": {"content": content[i:i + chunk_chars]}}]}
+                yield f"data: {json.dumps(delta, ensure_ascii=False)}\n\n".encode()
+            yield b"data: [DONE]\n\n"
+
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=events())
+
+    return httpx.MockTransport(handler)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ttft-ms", type=float, default=350.0, help="Groq time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=250.0)
+    parser.add_argument("--language", choices=sorted(SENTENCES), default="ta")
+    args = parser.parse_args()
+
+    groq_service.config.CROP_CACHE_ENABLED = False
+    predicted, n, p, k, ph, rain, temp, humidity = INPUT
+    ranked = crop_scorer.top_crops([n, p, k, temp, humidity, ph, rain])[0]
+    sentence, chars_per_token = SENTENCES[args.language]
+    content = narrative(ranked, sentence)
+    client = httpx.AsyncClient(transport=stub_transport(content, args, chars_per_token))
+    groq_service.get_http_client = lambda upstream: client
+    print(f"narrative: {len(content)} characters (~{len(content) / chars_per_token:.0f} tokens) at "
+          f"{args.tokens_per_second:.0f} tokens/s, first token after {args.ttft_ms:.0f} ms")
+
+    start = time.perf_counter()
+    blocking = await groq_service.analyze_crops(*INPUT, language_code=args.language)
+    full_ms = (time.perf_counter() - start) * 1000
+
+    arrivals, streamed = [], None
+    start = time.perf_counter()
+    async for event, data in groq_service.stream_crop_analysis(*INPUT, language_code=args.language):
+        at = (time.perf_counter() - start) * 1000
+        if event == "ranking":
+            ranking_ms = at
+        elif event == "crop":
+            arrivals.append(at)
+        elif event == "done":
+            streamed, done_ms = data["crops"], at
+        elif event == "error":
+            raise SystemExit(f"stream failed: {data}")
+    await client.aclose()
+
+    print(f"\n/analyze         all 5 crops at {full_ms:>6.0f} ms")
+    print(f"/analyze/stream  ranking at {ranking_ms:>6.1f} ms, crops with advice at "
+          + ", ".join(f"{t:.0f}" for t in arrivals) + f" ms, done at {done_ms:.0f} ms")
+    print(f"time to first crop with advice: {full_ms:.0f} -> {arrivals[0]:.0f} ms "
+          f"({full_ms / arrivals[0]:.1f}x sooner); ranking alone: {ranking_ms:.1f} ms")
+    print(f"streamed result identical to /analyze: {streamed == blocking}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+"""
+Hit rate and accuracy of the perceptual-hash diagnosis cache in front of /analyze-crop.
+
+Builds a set of distinct leaf photos (bench_image_preprocess.synthetic_leaf, or --dir) and,
+for each, the near-duplicates a farmer actually resends: WhatsApp-style recompression,
+downscaling, a slight crop, a brightness change and a re-shot with fresh sensor noise.
+Every variant goes through the real image_preprocessor, then:
+
+    distances   pHash / dHash Hamming distance of each variant type to its original,
+                and the closest pair of *different* leaves (what must stay a miss)
+    replay      a request log where each photo is sent once, and a --resend share of all
+                requests is a random variant of an earlier photo (same query); reports hit
+                rate, false hits (matched a different leaf) and the Gemini time saved at
+                --gemini-ms per call
+
+Usage:
+    python bench_diagnosis_cache.py
+    python bench_diagnosis_cache.py --photos 40 --resend 0.5 --phash 8 --dhash 12
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import os
+import random
+import tempfile
+import time
+import numpy as np
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+
+from PIL import Image, ImageEnhance, ImageOps  # noqa: E402
+from app.services.diagnosis_cache import DiagnosisCache  # noqa: E402
+from app.services.image_preprocess import image_preprocessor  # noqa: E402
+from bench_image_preprocess import synthetic_leaf  # noqa: E402
+
+
+def _jpeg(image: Image.Image, quality: int) -> bytes:
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+def variants(data: bytes, seed: int) -> dict[str, bytes]:
+    """Near-duplicates of one photo, as they come back after being forwarded or re-taken."""
+    image = Image.open(io.BytesIO(data))
+    image.draft("RGB", (image.width // 2, image.height // 2))
+    image = ImageOps.exif_transpose(image).convert("RGB")  # Forwarded copies lose the EXIF orientation
+    w, h = image.size
+    rng = np.random.default_rng(seed)
+    noisy = np.asarray(image, dtype=np.int16) + rng.normal(0, 6, (h, w, 3)).astype(np.int16)
+    return {
+        "whatsapp": _jpeg(image.resize((1600, 1200)), 60),
+        "small": _jpeg(image.resize((w // 4, h // 4)), 75),
+        "crop 5%": _jpeg(image.crop((w // 40, h // 40, w - w // 40, h - h // 40)), 85),
+        "brighter": _jpeg(ImageEnhance.Brightness(image).enhance(1.15), 85),
+        "re-shot": _jpeg(Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8)), 85),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", help="Directory of distinct leaf photos")
+    parser.add_argument("--photos", type=int, default=20, help="Synthetic photos when no --dir")
+    parser.add_argument("--resend", type=float, default=0.3, help="Share of requests that are a resent variant")
+    parser.add_argument("--phash", type=int, default=None, help="Override DIAGNOSIS_CACHE_PHASH_DISTANCE")
+    parser.add_argument("--dhash", type=int, default=None, help="Override DIAGNOSIS_CACHE_DHASH_DISTANCE")
+    parser.add_argument("--gemini-ms", type=float, default=6000.0, help="Typical analyze_crop_disease latency")
+    args = parser.parse_args()
+
+    if args.dir:
+        names = sorted(n for n in os.listdir(args.dir) if n.lower().endswith((".jpg", ".jpeg", ".png", ".webp")))
+        originals = [open(os.path.join(args.dir, n), "rb").read() for n in names]
+    else:
+        originals = [synthetic_leaf(seed, size=(2016, 1512)) for seed in range(args.photos)]
+    print(f"{len(originals)} distinct photos, preparing variants...")
+
+    prepared = []  # per photo: {"original": PreparedImage, variant: PreparedImage, ...}
+    for i, data in enumerate(originals):
+        photo = {"original": await image_preprocessor.prepare(data)}
+        for name, variant in variants(data, seed=i).items():
+            photo[name] = await image_preprocessor.prepare(variant)
+        prepared.append(photo)
+
+    print(f"\n{'variant':<10} {'pHash max':>10} {'pHash mean':>11} {'dHash max':>10} {'dHash mean':>11}")
+    for name in prepared[0]:
+        if name == "original":
+            continue
+        p = [(ph["original"].phash ^ ph[name].phash).bit_count() for ph in prepared]
+        d = [(ph["original"].dhash ^ ph[name].dhash).bit_count() for ph in prepared]
+        print(f"{name:<10} {max(p):>10} {np.mean(p):>11.1f} {max(d):>10} {np.mean(d):>11.1f}")
+    pairs = list(itertools.combinations(range(len(prepared)), 2))
+    if pairs:
+        p = min((prepared[a]["original"].phash ^ prepared[b]["original"].phash).bit_count() for a, b in pairs)
+        d = min((prepared[a]["original"].dhash ^ prepared[b]["original"].dhash).bit_count() for a, b in pairs)
+        print(f"{'different':<10} {'min ' + str(p):>10} {'':>11} {'min ' + str(d):>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiagnosisCache(
+            path=os.path.join(tmp, "diagnoses.jsonl"), max_items=5000, ttl_seconds=7 * 24 * 3600,
+            phash_distance=args.phash if args.phash is not None else 6,
+            dhash_distance=args.dhash if args.dhash is not None else 10,
+        )
+        rng = random.Random(0)
+        log = [(photo, "original") for photo in range(len(prepared))]
+        for _ in range(round(len(prepared) * args.resend / (1 - args.resend))):
+            photo = rng.randrange(len(prepared))
+            position = rng.randint(log.index((photo, "original")) + 1, len(log))  # after its first send
+            log.insert(position, (photo, rng.choice([n for n in prepared[photo] if n != "original"])))
+        hits, false_hits, lookup_ms = 0, 0, []
+        for photo, variant in log:
+            image = prepared[photo][variant]
+            start = time.perf_counter()
+            cached = cache.lookup(image.phash, image.dhash, "What is wrong with my leaf?", "Tamil")
+            lookup_ms.append((time.perf_counter() - start) * 1000)
+            if cached is None:
+                await cache.put(image.phash, image.dhash, "What is wrong with my leaf?", "Tamil", f"diagnosis-{photo}")
+            else:
+                hits += 1
+                false_hits += cached != f"diagnosis-{photo}"
+        stats = cache.stats()
+        resends = sum(variant != "original" for _, variant in log)
+        # A different question about the same photo must not reuse the diagnosis
+        other_query = cache.lookup(prepared[0]["original"].phash, prepared[0]["original"].dhash, "Is this ready to harvest?", "Tamil")
+
+        print(f"\nthresholds pHash <= {cache.phash_distance}, dHash <= {cache.dhash_distance}; "
+              f"{len(log)} requests, {args.resend:.0%} resends")
+        print(f"hit rate {stats['hit_rate']:.1%}: {hits - false_hits} of {resends} resends served from cache, "
+              f"{false_hits} false hits; different query hit: {other_query is not None}")
+        print(f"lookup p50 {np.median(lookup_ms):.3f} ms, max {max(lookup_ms):.3f} ms with {stats['items']} entries")
+        print(f"Gemini time saved: {hits * args.gemini_ms / 1000:.0f} s ({hits} of {len(log)} calls)")
+
+        reloaded = DiagnosisCache(cache.path, 5000, 7 * 24 * 3600, cache.phash_distance, cache.dhash_distance)
+        print(f"reloaded {reloaded.stats()['items']} entries from {stats['log_lines']} log lines")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
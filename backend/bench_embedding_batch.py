@@ -0,0 +1,95 @@
+"""
+Throughput benchmark: embeddings/sec with and without batching.
+
+The Gemini call is replaced by a local stub whose latency is a fixed round trip plus
+a small per-text cost, roughly how batchEmbedContents behaves. Three scenarios, all
+through the real routes and the real concurrency limiter:
+
+    unbatched   N concurrent /embed/query calls, micro-batcher off (one upstream call each)
+    coalesced   N concurrent /embed/query calls, micro-batcher on
+    batch       one /embed/batch call with all N texts
+
+Usage:
+    python bench_embedding_batch.py --texts 400 --latency-ms 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("GEMINI_API_KEYS", "bench-key-1,bench-key-2")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")  # Every text must reach the stub
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+import app.services.gemini as gemini_module  # noqa: E402
+from app.routes import gemini  # noqa: E402
+
+service = gemini_module.gemini_service
+upstream_calls = 0
+
+
+def install_stub(latency: float, per_text: float):
+    async def stub(model, content, task_type=None, client=None, **kwargs):
+        global upstream_calls
+        upstream_calls += 1
+        await asyncio.sleep(latency + per_text * len(content))
+        return {"embedding": [[0.0] * 3072 for _ in content]}
+
+    gemini_module.genai.embed_content_async = stub
+    for clients in service._key_clients.values():
+        type(clients).generative_async_client = property(lambda self: None)
+
+
+async def run(client: httpx.AsyncClient | None, scenario: str, n: int) -> tuple[float, int]:
+    """Runs one scenario through the routes, or straight against the service when `client` is None."""
+    global upstream_calls
+    upstream_calls = 0
+    service.embedding_batcher.max_batch_size = 1 if scenario == "unbatched" else gemini_module.settings.EMBEDDING_BATCH_MAX_SIZE
+    texts = [f"{scenario} question {i} about paddy blast {client is None}" for i in range(n)]
+
+    start = time.perf_counter()
+    if client is None:
+        if scenario == "batch":
+            await service.embed_texts(texts, "RETRIEVAL_QUERY")
+        else:
+            await asyncio.gather(*(service.generate_query_embedding(text) for text in texts))
+    elif scenario == "batch":
+        response = await client.post("/api/v1/gemini/embed/batch", json={"texts": texts, "task_type": "RETRIEVAL_QUERY"})
+        assert len(response.json()["embeddings"]) == n
+    else:
+        responses = await asyncio.gather(
+            *(client.post("/api/v1/gemini/embed/query", json={"text": text}) for text in texts)
+        )
+        assert all(r.status_code == 200 for r in responses)
+    return time.perf_counter() - start, upstream_calls
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--per-text-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    install_stub(args.latency_ms / 1000, args.per_text_ms / 1000)
+    app = FastAPI()
+    app.include_router(gemini.router, prefix="/api/v1/gemini")
+    transport = httpx.ASGITransport(app=app)
+
+    print(f"{args.texts} texts, stub {args.latency_ms:.0f} ms + {args.per_text_ms:.1f} ms/text, "
+          f"concurrency limit {service.embedding_limiter.limit}")
+    print("(service = embedding calls only; http = including JSON encoding of 3072-float lists)")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        for scenario in ("unbatched", "coalesced", "batch"):
+            for level, level_client in (("service", None), ("http", client)):
+                elapsed, calls = await run(level_client, scenario, args.texts)
+                print(f"{scenario:>10} {level:>7}: {elapsed:6.2f} s  {args.texts / elapsed:8.1f} embeddings/s  "
+                      f"{calls:4d} upstream calls")
+    print(f"Batcher stats: {service.embedding_batcher.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
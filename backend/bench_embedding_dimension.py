@@ -0,0 +1,107 @@
+"""
+Recall vs latency of reduced embedding dimensions on our knowledge set.
+
+Loads the 3072-dim `knowledge_posts.embedding` vectors from Supabase (or an .npy file of
+shape [n, 3072]) and uses `questions.embedding` as queries (or a held-out sample of the
+posts). For each candidate dimension, vectors are truncated and renormalized exactly as
+EMBEDDING_DIMENSION / migrate_embedding_dimension.py do, and exact top-k search is compared
+with the 3072-dim top-k:
+
+    recall@k   fraction of the full-dimension top-k that the reduced search also returns
+    latency    per-query brute-force scan time (what an unindexed pgvector scan scales with)
+    storage    bytes per stored vector as float32 (pgvector `vector`)
+
+Usage:
+    python bench_embedding_dimension.py                      # live data from Supabase
+    python bench_embedding_dimension.py --npy knowledge.npy  # exported vectors
+    python bench_embedding_dimension.py --synthetic 20000    # wiring check only, numbers are not meaningful
+"""
+import argparse
+import os
+import statistics
+import time
+import numpy as np
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+
+from app.core.vectors import from_pgvector, truncate_embedding  # noqa: E402
+
+
+def load_column(table: str, limit: int) -> np.ndarray:
+    from app.services.supabase import get_supabase_client
+
+    supabase = get_supabase_client()
+    vectors, offset = [], 0
+    while len(vectors) < limit:
+        rows = (
+            supabase.table(table).select("embedding").not_.is_("embedding", "null")
+            .order("id").range(offset, offset + 499).execute().data
+        )
+        if not rows:
+            break
+        vectors.extend(from_pgvector(row["embedding"]) for row in rows)
+        offset += len(rows)
+    return np.stack(vectors[:limit]) if vectors else np.zeros((0, 3072), dtype=np.float32)
+
+
+def synthetic(n: int, dim: int = 3072, seed: int = 0) -> np.ndarray:
+    """Low-rank clusters with decaying per-component variance, loosely mimicking MRL-trained vectors."""
+    rng = np.random.default_rng(seed)
+    scale = 1.0 / np.sqrt(np.arange(1, dim + 1))
+    centers = rng.standard_normal((64, dim)) * scale
+    return (centers[rng.integers(0, 64, n)] + 0.5 * rng.standard_normal((n, dim)) * scale).astype(np.float32)
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> tuple[np.ndarray, list[float]]:
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        scores = corpus @ query
+        idx = np.argpartition(-scores, k)[:k]
+        results.append(idx[np.argsort(-scores[idx])])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.stack(results), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--npy", help="Corpus of 3072-dim vectors instead of Supabase")
+    parser.add_argument("--synthetic", type=int, help="Generate N synthetic vectors instead")
+    parser.add_argument("--limit", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", default="3072,1536,768,512,256")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        corpus = synthetic(args.synthetic + args.queries)
+        corpus, queries = corpus[args.queries:], corpus[:args.queries]
+    else:
+        corpus = np.load(args.npy).astype(np.float32) if args.npy else load_column("knowledge_posts", args.limit)
+        queries = np.zeros((0, corpus.shape[1]), dtype=np.float32) if args.npy else load_column("questions", args.queries)
+        if len(queries) == 0:  # Hold out a sample of the corpus as queries
+            rng = np.random.default_rng(0)
+            held_out = rng.choice(len(corpus), size=min(args.queries, len(corpus) // 10), replace=False)
+            queries = corpus[held_out]
+            corpus = np.delete(corpus, held_out, axis=0)
+    k = min(args.k, len(corpus) - 1)
+    if k < 1 or len(queries) == 0:
+        raise SystemExit("Not enough vectors to benchmark.")
+
+    dimensions = [int(d) for d in args.dimensions.split(",")]
+    full = max(dimensions)
+    truth, _ = top_k(truncate_embedding(corpus, full), truncate_embedding(queries, full), k)
+    print(f"{len(corpus)} corpus vectors, {len(queries)} queries, recall@{k} against {full} dims")
+    print(f"{'dim':>6} {'recall':>8} {'p50 ms':>8} {'p99 ms':>8} {'bytes/vec':>10} {'corpus MB':>10}")
+    for dim in dimensions:
+        found, latencies = top_k(truncate_embedding(corpus, dim), truncate_embedding(queries, dim), k)
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{dim:>6} {recall:>8.3f} {statistics.median(latencies):>8.3f} {p99:>8.3f} "
+              f"{dim * 4:>10} {len(corpus) * dim * 4 / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Load test: latency of other routes while embedding requests are in flight.
+
+Fires a burst of /api/v1/gemini/embed/query requests and pings a lightweight route every
+few milliseconds in parallel, all on one event loop (as under uvicorn). The Gemini call
+is stubbed with a fixed latency:
+
+    --mode async     the current path (embed_content_async, bounded by EMBEDDING_MAX_CONCURRENCY)
+    --mode blocking  the old path (synchronous embed_content inside an async def)
+
+With the blocking path the ping latency grows to the full embedding round trip; with the
+async path it stays flat.
+
+Usage:
+    python bench_embedding_load.py --mode async
+    python bench_embedding_load.py --mode blocking
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("GEMINI_API_KEYS", "bench-key-1,bench-key-2")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+os.environ.setdefault("EMBEDDING_BATCH_MAX_SIZE", "1")  # Measure the loop, not the batcher
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+import app.services.gemini as gemini_module  # noqa: E402
+from app.routes import gemini  # noqa: E402
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(gemini.router, prefix="/api/v1/gemini")
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def install_stub(mode: str, latency: float):
+    async def async_stub(model, content, task_type=None, client=None, **kwargs):
+        await asyncio.sleep(latency)
+        return {"embedding": [[0.0] * 3072 for _ in content]}
+
+    async def blocking_stub(model, content, task_type=None, client=None, **kwargs):
+        time.sleep(latency)  # what genai.embed_content did to the event loop
+        return {"embedding": [[0.0] * 3072 for _ in content]}
+
+    gemini_module.genai.embed_content_async = async_stub if mode == "async" else blocking_stub
+    for clients in gemini_module.gemini_service._key_clients.values():
+        type(clients).generative_async_client = property(lambda self: None)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["async", "blocking"], default="async")
+    parser.add_argument("--embeddings", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--ping-interval-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    install_stub(args.mode, args.latency_ms / 1000)
+    transport = httpx.ASGITransport(app=build_app())
+    ping_latencies: list[float] = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        embeds_done = asyncio.Event()
+
+        async def pinger():
+            # Latency is measured from when the ping was due, so event-loop stalls count
+            while not embeds_done.is_set():
+                due = time.perf_counter() + args.ping_interval_ms / 1000
+                await asyncio.sleep(args.ping_interval_ms / 1000)
+                await client.get("/ping")
+                ping_latencies.append((time.perf_counter() - due) * 1000)
+
+        async def embed(i: int):
+            await client.post("/api/v1/gemini/embed/query", json={"text": f"leaf curl in chilli {i}"})
+
+        # Baseline with nothing in flight
+        for _ in range(20):
+            start = time.perf_counter()
+            await client.get("/ping")
+            ping_latencies.append((time.perf_counter() - start) * 1000)
+        baseline = statistics.median(ping_latencies)
+        ping_latencies.clear()
+
+        ping_task = asyncio.create_task(pinger())
+        start = time.perf_counter()
+        await asyncio.gather(*(embed(i) for i in range(args.embeddings)))
+        elapsed = time.perf_counter() - start
+        embeds_done.set()
+        await ping_task
+
+    ping_latencies.sort()
+    p99 = ping_latencies[min(len(ping_latencies) - 1, int(len(ping_latencies) * 0.99))]
+    print(f"Mode: {args.mode}  embeddings: {args.embeddings}  stub latency: {args.latency_ms:.0f} ms")
+    print(f"/ping baseline p50:          {baseline:8.2f} ms")
+    print(f"/ping under load p50 / p99:  {statistics.median(ping_latencies):8.2f} / {p99:8.2f} ms  ({len(ping_latencies)} pings)")
+    print(f"Embedding burst wall time:   {elapsed:8.2f} s")
+    print(f"Limiter stats:               {gemini_module.gemini_service.embedding_limiter.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+Wire-format benchmark for embeddings: JSON number lists vs the compact base64 format.
+
+For one 3072-dim vector (and a 100-vector batch) it reports payload size, server-side
+encode time, client-side parse time (to a float32 array) and the peak Python heap
+allocated while parsing, which is where tens of thousands of boxed floats show up.
+
+Usage:
+    python bench_embedding_wire.py --dimension 3072 --batch 100
+"""
+import argparse
+import json
+import time
+import tracemalloc
+import numpy as np
+from app.core.vectors import decode_vector, encode_vector
+
+
+def encode(vectors: list[np.ndarray], fmt: str) -> bytes:
+    if fmt == "json":
+        return json.dumps({"embeddings": [v.tolist() for v in vectors]}).encode()
+    return json.dumps({"embeddings": [encode_vector(v, fmt) for v in vectors], "dtype": fmt}).encode()
+
+
+def parse(body: bytes, fmt: str) -> list[np.ndarray]:
+    payload = json.loads(body)
+    if fmt == "json":
+        return [np.asarray(v, dtype=np.float32) for v in payload["embeddings"]]
+    return [decode_vector(v, fmt) for v in payload["embeddings"]]
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dimension", type=int, default=3072)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for count in (1, args.batch):
+        vectors = [rng.standard_normal(args.dimension).astype(np.float32) for _ in range(count)]
+        print(f"\n{count} x {args.dimension}-dim vector(s)")
+        print(f"{'format':>8} {'bytes':>10} {'encode ms':>10} {'parse ms':>10} {'parse peak KB':>14} {'max abs err':>12}")
+        for fmt in ("json", "float32", "float16"):
+            body = encode(vectors, fmt)
+            encode_ms = timed(lambda: encode(vectors, fmt), args.repeat)
+            parse_ms = timed(lambda: parse(body, fmt), args.repeat)
+            tracemalloc.start()
+            parsed = parse(body, fmt)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            error = max(float(np.abs(p - v).max()) for p, v in zip(parsed, vectors))
+            print(f"{fmt:>8} {len(body):>10} {encode_ms:>10.2f} {parse_ms:>10.2f} {peak / 1024:>14.0f} {error:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
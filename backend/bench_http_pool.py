@@ -0,0 +1,73 @@
+"""
+Benchmark: cost of per-call httpx.AsyncClient (new TCP+TLS handshake per hop)
+vs. the shared pooled client on the /api/v1/speech/process path.
+
+/process makes 2-3 Sarvam hops per voice question (STT -> [transliterate] -> translate).
+This replays those hops against api.sarvam.ai. No valid key is needed: a 401/403
+still goes through DNS, TCP and TLS, which is exactly the overhead being measured.
+
+Usage:
+    python bench_http_pool.py --rounds 20
+    python bench_http_pool.py --base-url https://api.sarvam.ai --hops 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+HOP_PATHS = ["/speech-to-text", "/transliterate", "/translate"]
+
+
+async def _hop(client: httpx.AsyncClient, url: str):
+    await client.post(url, headers={"api-subscription-key": "benchmark"}, json={"input": "வணக்கம்"})
+
+
+async def per_call_clients(base_url: str, hops: int) -> float:
+    """Old behaviour: a fresh AsyncClient (and handshake) for every hop."""
+    start = time.perf_counter()
+    for path in HOP_PATHS[:hops]:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            await _hop(client, base_url + path)
+    return time.perf_counter() - start
+
+
+async def pooled_client(client: httpx.AsyncClient, base_url: str, hops: int) -> float:
+    """New behaviour: all hops share one keep-alive pool."""
+    start = time.perf_counter()
+    for path in HOP_PATHS[:hops]:
+        await _hop(client, base_url + path)
+    return time.perf_counter() - start
+
+
+def _report(name: str, samples: list[float]):
+    samples_ms = sorted(s * 1000 for s in samples)
+    p50 = statistics.median(samples_ms)
+    p95 = samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))]
+    print(f"{name:<22} mean={statistics.mean(samples_ms):8.1f} ms  p50={p50:8.1f} ms  p95={p95:8.1f} ms")
+    return p50
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="https://api.sarvam.ai")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--hops", type=int, default=3, choices=[1, 2, 3])
+    args = parser.parse_args()
+
+    print(f"Target: {args.base_url}  hops/question: {args.hops}  rounds: {args.rounds}\n")
+
+    fresh = [await per_call_clients(args.base_url, args.hops) for _ in range(args.rounds)]
+
+    async with httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_keepalive_connections=20)) as client:
+        await pooled_client(client, args.base_url, 1)  # warm the pool, as after app startup
+        pooled = [await pooled_client(client, args.base_url, args.hops) for _ in range(args.rounds)]
+
+    fresh_p50 = _report("per-call AsyncClient", fresh)
+    pooled_p50 = _report("shared pooled client", pooled)
+    saved = fresh_p50 - pooled_p50
+    print(f"\nHandshake overhead per question (p50): {saved:.1f} ms ({saved / args.hops:.1f} ms per hop)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Search latency and memory of the in-process knowledge index (app/services/knowledge_index.py).
+
+Builds a KnowledgeIndex over synthetic unit vectors (or an .npy export of
+knowledge_posts embeddings) and runs match_knowledge-style queries against it:
+
+    p50 / p99  per-query search time, as recorded by KnowledgeIndex.stats()
+    MB/100k    matrix memory scaled to 100k posts
+    recall@k   overlap with float32 exact top-k (float16 rounding / HNSW approximation)
+
+Usage:
+    python bench_knowledge_index.py                          # 100k posts, 3072 and 768 dims
+    python bench_knowledge_index.py --posts 20000 --dims 768
+    python bench_knowledge_index.py --npy knowledge.npy      # exported vectors, their own dimension
+    python bench_knowledge_index.py --hnsw                   # also HNSW (needs `pip install hnswlib`)
+"""
+import argparse
+import os
+import numpy as np
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+
+from app.core.vectors import truncate_embedding  # noqa: E402
+import app.services.knowledge_index as knowledge_index_module  # noqa: E402
+from app.services.knowledge_index import KnowledgeIndex  # noqa: E402
+
+
+def synthetic(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered vectors, so the nearest neighbours are meaningful."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((256, dim)).astype(np.float32)
+    out = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 10_000):  # chunked to keep peak memory near one copy
+        stop = min(n, start + 10_000)
+        out[start:stop] = centers[rng.integers(0, 256, stop - start)] + rng.standard_normal((stop - start, dim))
+    return out
+
+
+def build(vectors: np.ndarray, dtype: str, hnsw: bool) -> KnowledgeIndex:
+    knowledge_index_module.config.KNOWLEDGE_INDEX_HNSW = hnsw
+    knowledge_index_module.config.KNOWLEDGE_INDEX_MAX_BYTES = 2 * len(vectors) * vectors.shape[1] * np.dtype(dtype).itemsize
+    knowledge_index_module._hnswlib.cache_clear()
+    index = KnowledgeIndex(dimension=vectors.shape[1], dtype=dtype)
+    records = [{"id": str(i), "user_id": None, "original_text": "", "english_text": "", "audio_url": None}
+               for i in range(len(vectors))]
+    index._state = index._build(records, vectors.astype(index.dtype))
+    index.loaded = True
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--dims", default="3072,768")
+    parser.add_argument("--npy", help="Corpus of exported embeddings instead of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=-1.0, help="match_threshold (-1 keeps every top-k hit)")
+    parser.add_argument("--hnsw", action="store_true")
+    args = parser.parse_args()
+
+    corpora = [np.load(args.npy).astype(np.float32)] if args.npy else [None] * len(args.dims.split(","))
+    print(f"{'dim':>6} {'posts':>8} {'mode':>14} {'p50 ms':>8} {'p99 ms':>8} {'MB/100k':>8} {'recall':>7}")
+    for corpus, dim in zip(corpora, [int(d) for d in args.dims.split(",")]):
+        if corpus is None:
+            corpus = synthetic(args.posts + args.queries, dim)
+        corpus = truncate_embedding(corpus, corpus.shape[1])
+        queries, corpus = corpus[: args.queries], corpus[args.queries:]
+        modes = [("float32", False), ("float16", False)] + ([("float32", True)] if args.hnsw else [])
+        truth = None
+        for dtype, hnsw in modes:
+            index = build(corpus, dtype, hnsw)
+            if hnsw and index._state.hnsw is None:
+                print(f"{corpus.shape[1]:>6} {len(corpus):>8} {'hnsw':>14}  skipped, hnswlib is not installed")
+                continue
+            found = [{m["id"] for m in index.search(q, args.threshold, args.k)} for q in queries]
+            if truth is None:
+                truth = found
+            recall = np.mean([len(f & t) / max(len(t), 1) for f, t in zip(found, truth)])
+            stats = index.stats()
+            mode = f"{dtype}{'+hnsw' if hnsw else ''}"
+            print(f"{corpus.shape[1]:>6} {len(corpus):>8} {mode:>14} {stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f} "
+                  f"{corpus.shape[1] * index.dtype.itemsize * 100_000 / 1e6:>8.0f} {recall:>7.3f}")
+            del index
+        del corpus, queries
+
+
+if __name__ == "__main__":
+    main()
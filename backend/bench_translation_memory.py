@@ -0,0 +1,107 @@
+"""
+Benchmark: sentence-level translation memory on a replayed request log.
+
+Replays translate requests through app.services.sarvam.translate_text with the Sarvam
+call stubbed out (fixed latency, echo translation), and reports the hit rate and how
+many upstream calls were made compared with one call per request (old behaviour).
+
+Usage:
+    python bench_translation_memory.py                      # synthetic log
+    python bench_translation_memory.py --log requests.jsonl  # {"text", "source_language", "target_language"} per line
+    python bench_translation_memory.py --concurrency 32 --latency-ms 150
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+
+import app.services.sarvam as sarvam  # noqa: E402
+from app.services.translation_memory import translation_memory  # noqa: E402
+
+QUESTIONS = [
+    "My chilli leaves are curling.", "Whitefly on cotton, what to spray?", "When should I sow paddy?",
+    "Yellow spots on tomato leaves.", "How much urea for one acre of maize?", "Is neem oil safe for brinjal?",
+    "Groundnut leaves turning brown.", "Best time to irrigate sugarcane?",
+]
+ALERTS = [
+    "4+ farmers have reported Pest issues nearby. This may be a localized outbreak. Check the Map for details.",
+    "The local outbreak is growing. More farmers have reported Disease issues nearby. Check the Map for details.",
+]
+ANSWER_SENTENCES = [
+    "Spray neem oil at 5 ml per litre of water.", "Remove and burn the affected leaves.",
+    "Avoid excess nitrogen fertilizer.", "Irrigate in the early morning.", "Use yellow sticky traps.",
+    "Consult your local agriculture officer if it spreads.", "Repeat the spray after 10 days.",
+]
+LANGUAGES = ["ta-IN", "hi-IN", "te-IN", "kn-IN"]
+
+
+def synthetic_log(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    log = []
+    for _ in range(n):
+        lang = rng.choice(LANGUAGES)
+        kind = rng.random()
+        if kind < 0.4:
+            log.append({"text": rng.choice(QUESTIONS), "source_language": "en-IN", "target_language": lang})
+        elif kind < 0.55:
+            log.append({"text": rng.choice(ALERTS), "source_language": "en-IN", "target_language": lang})
+        else:
+            answer = " ".join(rng.sample(ANSWER_SENTENCES, rng.randint(2, 4)))
+            log.append({"text": answer, "source_language": "en-IN", "target_language": lang})
+    return log
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", help="JSONL request log to replay")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=120.0)
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log, encoding="utf-8") as f:
+            log = [json.loads(line) for line in f if line.strip()]
+    else:
+        log = synthetic_log(args.requests)
+
+    async def fake_upstream(text, source_language, target_language):
+        await asyncio.sleep(args.latency_ms / 1000)
+        return "\n".join(f"[{target_language}] {line}" for line in text.split("\n"))
+
+    sarvam._translate_upstream = fake_upstream
+
+    queue = list(log)
+    latencies = []
+
+    async def worker():
+        while queue:
+            req = queue.pop()
+            start = time.perf_counter()
+            await sarvam.translate_text(req["text"], req["source_language"], req["target_language"])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stats = translation_memory.stats()
+    latencies.sort()
+    print(f"Requests replayed:        {len(log)} (concurrency {args.concurrency}, stub latency {args.latency_ms:.0f} ms)")
+    print(f"Sentences looked up:      {stats['sentences']}")
+    print(f"Sentence hit rate:        {stats['hit_rate']:.1%}")
+    print(f"Coalesced in-flight:      {stats['coalesced']}")
+    print(f"Upstream calls (before):  {len(log)}")
+    print(f"Upstream calls (after):   {stats['upstream_calls']}  "
+          f"({1 - stats['upstream_calls'] / len(log):.1%} fewer)")
+    print(f"p50 latency:              {latencies[len(latencies) // 2] * 1000:.1f} ms")
+    print(f"Wall time:                {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
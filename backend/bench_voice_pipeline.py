@@ -0,0 +1,124 @@
+"""
+End-to-end latency of a spoken question: the app's client-orchestrated flow vs one
+/api/v1/voice/ask round trip.
+
+Every upstream (Sarvam STT / translate / TTS, Gemini embed / answer, match_knowledge) is a
+local stub with a fixed latency. The client flow is the sequence of hops the app makes
+today, each paying one mobile round trip (--rtt-ms) plus its payload over the uplink and
+downlink (--uplink-kbps / --downlink-kbps), with the stage latencies added in between. The
+pipeline is the real voice_pipeline.ask_events with the same stubs, plus one round trip and
+the same audio upload / answer audio download.
+
+    client, match     /speech/process, /embed/query, match_knowledge, /speech/translate, /speech/speak
+    client, no match  /speech/process, /embed/query, match_knowledge, /answer, /speech/speak
+
+Usage:
+    python bench_voice_pipeline.py
+    python bench_voice_pipeline.py --rtt-ms 600 --uplink-kbps 256
+"""
+import argparse
+import asyncio
+import os
+import time
+
+for _name in ("SARVAM_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_name, "benchmark")
+
+import numpy as np  # noqa: E402
+import app.services.voice_pipeline as pipeline  # noqa: E402
+
+# Stage latencies (ms), roughly what the upstreams take from a server in India
+STAGES = {"stt": 900, "translate": 350, "embed": 250, "retrieve": 60, "answer": 2500, "tts": 700}
+
+AUDIO_BYTES = 120_000  # ~7 s of 16 kHz mono WAV
+EMBEDDING_JSON_BYTES = 3072 * 20  # /embed/query response, sent back up again to match_knowledge
+ANSWER_AUDIO_BYTES = 400_000  # /speak WAV (base64 in the pipeline: 4/3 of that)
+
+
+def install_stubs(stages: dict, similarity: float):
+    async def wait(stage):
+        await asyncio.sleep(stages[stage] / 1000)
+
+    async def speech_to_text(audio, language_code, filename=None):
+        await wait("stt")
+        return "மிளகாய் இலை சுருட்டை நோய்"
+
+    async def translate_text(text, source_language, target_language):
+        await wait("translate")
+        return "leaf curl disease in chilli"
+
+    async def generate_query_embedding(text):
+        await wait("embed")
+        return np.ones(3072, dtype=np.float32)
+
+    async def generate_answer_cached(query, language, embedding=None):
+        await wait("answer")
+        return "பூச்சிகளைக் கட்டுப்படுத்த வேப்ப எண்ணெய் தெளிக்கவும்.", None
+
+    async def match_knowledge(embedding, threshold, count):
+        await wait("retrieve")
+        return [{"id": "post", "english_text": "Spray neem oil.", "audio_url": None, "similarity": similarity}], "index"
+
+    async def cached_text_to_speech(text, language_code):
+        await wait("tts")
+        return "key", bytes(ANSWER_AUDIO_BYTES)
+
+    pipeline.speech_to_text = speech_to_text
+    pipeline.translate_text = translate_text
+    pipeline.match_knowledge = match_knowledge
+    pipeline.cached_text_to_speech = cached_text_to_speech
+    pipeline.gemini_service.generate_query_embedding = generate_query_embedding
+    pipeline.gemini_service.generate_answer_cached = generate_answer_cached
+
+
+def transfer_ms(size: int, kbps: float) -> float:
+    return size * 8 / kbps
+
+
+def client_flow_ms(stages: dict, matched: bool, rtt: float, up: float, down: float) -> dict:
+    hops = {
+        "process": rtt + transfer_ms(AUDIO_BYTES, up) + stages["stt"] + stages["translate"],
+        "embed": rtt + stages["embed"] + transfer_ms(EMBEDDING_JSON_BYTES, down),
+        "match": rtt + transfer_ms(EMBEDDING_JSON_BYTES, up) + stages["retrieve"],
+    }
+    if matched:
+        hops["translate"] = rtt + stages["translate"]
+    else:
+        hops["answer"] = rtt + stages["answer"]
+    hops["speak"] = rtt + stages["tts"] + transfer_ms(ANSWER_AUDIO_BYTES, down)
+    return hops
+
+
+async def pipeline_ms(rtt: float, up: float, down: float) -> tuple[float, dict, dict]:
+    """Wall time of ask_events plus the one round trip, upload and base64 audio download."""
+    events = {}
+    start = time.perf_counter()
+    async for event in pipeline.ask_events(bytes(AUDIO_BYTES), "question.wav", "ta-IN"):
+        events[event["event"]] = event
+    server = (time.perf_counter() - start) * 1000
+    network = rtt + transfer_ms(AUDIO_BYTES, up) + transfer_ms(ANSWER_AUDIO_BYTES * 4 // 3, down)
+    return server + network, events["done"]["timings_ms"], {name: e.get("elapsed_ms") for name, e in events.items()}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt-ms", type=float, default=300.0)
+    parser.add_argument("--uplink-kbps", type=float, default=512.0)
+    parser.add_argument("--downlink-kbps", type=float, default=2000.0)
+    args = parser.parse_args()
+    link = (args.rtt_ms, args.uplink_kbps, args.downlink_kbps)
+
+    print(f"RTT {args.rtt_ms:.0f} ms, {args.uplink_kbps:.0f}/{args.downlink_kbps:.0f} kbps up/down; stages (ms): {STAGES}")
+    for matched in (True, False):
+        install_stubs(STAGES, similarity=0.9 if matched else 0.5)
+        hops = client_flow_ms(STAGES, matched, *link)
+        total, timings, arrivals = await pipeline_ms(*link)
+        label = "knowledge match" if matched else "no match (AI answer)"
+        print(f"\n{label}")
+        print(f"  client flow  {sum(hops.values()):>7.0f} ms  " + ", ".join(f"{k} {v:.0f}" for k, v in hops.items()))
+        print(f"  /voice/ask   {total:>7.0f} ms  server stages: " + ", ".join(f"{k} {v:.0f}" for k, v in timings.items()))
+        print("               events at (server ms): " + ", ".join(f"{k} {v:.0f}" for k, v in arrivals.items() if v is not None))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Cold start, memory and per-prediction latency: pickled scikit-learn model vs the compiled
+NumPy model (export_model.py -> crop_classifier.npz -> compiled_model.CompiledForest).
+
+Cold start and peak RSS are measured in fresh subprocesses, --runs times each, for:
+
+    model only   import + load + first predict_proba of one row
+    service      `import main` (FastAPI app + model), what Render's cold start pays
+
+Latency is predict_proba in this process for one row (what /predict does) and per row
+for a 2,048-row chunk (what /predict/batch does). Uses crop_classifier.pkl from the working
+directory, or trains a stand-in RandomForest on the CSV.
+
+Usage:
+    python bench_compiled_model.py
+    python bench_compiled_model.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from export_model import export, load_csv
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {here!r})
+import numpy as np
+row = np.array([[90, 42, 43, 20.87, 82.0, 6.5, 202.9]])
+if {what!r} == "service":
+    import main
+    main.model.predict_proba(row)
+elif {what!r} == "pickle":
+    import joblib
+    joblib.load("crop_classifier.pkl").predict_proba(row)
+else:
+    from compiled_model import CompiledForest
+    CompiledForest.load("crop_classifier.npz").predict_proba(row)
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000,
+                  "rss_mb": int(next(l for l in open("/proc/self/status") if l.startswith("VmHWM")).split()[1]) / 1024,
+                  "sklearn": "sklearn" in sys.modules}}))
+"""
+
+
+def cold_start(workdir: str, what: str, runs: int) -> tuple[float, float, bool]:
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD.format(here=HERE, what=what)],
+            cwd=workdir, capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return (statistics.median(r["ms"] for r in results), statistics.median(r["rss_mb"] for r in results),
+            results[0]["sklearn"])
+
+
+def latency_us(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="Subprocesses per cold-start measurement")
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    pickle_dir, npz_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    source = "crop_classifier.pkl" if os.path.exists("crop_classifier.pkl") else os.path.join(pickle_dir, "crop_classifier.pkl")
+    export(source, os.path.join(npz_dir, "crop_classifier.npz"), train_if_missing=True)
+    if source != os.path.join(pickle_dir, "crop_classifier.pkl"):
+        shutil.copy(source, pickle_dir)
+    print(f"pickle {os.path.getsize(os.path.join(pickle_dir, 'crop_classifier.pkl')) / 1e6:.1f} MB, "
+          f"npz {os.path.getsize(os.path.join(npz_dir, 'crop_classifier.npz')) / 1e6:.1f} MB")
+
+    print(f"\n{'cold start (median of ' + str(args.runs) + ')':<28} {'ms':>7} {'peak RSS MB':>12}  sklearn imported")
+    for label, workdir, what in (
+        ("model only, pickle", pickle_dir, "pickle"),
+        ("model only, compiled", npz_dir, "compiled"),
+        ("service, pickle", pickle_dir, "service"),
+        ("service, compiled", npz_dir, "service"),
+    ):
+        ms, rss, sklearn = cold_start(workdir, what, args.runs)
+        print(f"{label:<28} {ms:>7.0f} {rss:>12.0f}  {sklearn}")
+
+    import joblib
+    from compiled_model import CompiledForest
+
+    reference = joblib.load(os.path.join(pickle_dir, "crop_classifier.pkl"))
+    compiled = CompiledForest.load(os.path.join(npz_dir, "crop_classifier.npz"))
+    X, _ = load_csv()
+    row = X[:1]
+    chunk = X[np.random.default_rng(0).integers(len(X), size=2048)]
+    print(f"\n{'predict_proba':<28} {'pickle':>10} {'compiled':>10}")
+    print(f"{'one row (us)':<28} {latency_us(lambda: reference.predict_proba(row), args.repeat):>10.0f} "
+          f"{latency_us(lambda: compiled.predict_proba(row), args.repeat):>10.0f}")
+    print(f"{'2048-row chunk (us per row)':<28} "
+          f"{latency_us(lambda: reference.predict_proba(chunk), 20) / len(chunk):>10.1f} "
+          f"{latency_us(lambda: compiled.predict_proba(chunk), 20) / len(chunk):>10.1f}")
+    print(f"bit-identical on the CSV: {np.array_equal(reference.predict_proba(X), compiled.predict_proba(X))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Rows/sec of POST /predict (one row per call) vs POST /predict/batch (JSON rows, JSON
+columns, CSV) on the crop prediction service, in-process through FastAPI's TestClient.
+
+Uses crop_classifier.pkl from the working directory; without it, a stand-in
+RandomForestClassifier is trained on Crop_classification.csv (scikit-learn's defaults)
+and saved to a temporary directory. Rows are sampled from the CSV. Over a real network
+each /predict call also pays a round trip, so the single-row rate is additionally shown
+with --rtt-ms per call.
+
+Usage:
+    python bench_predict_batch.py
+    python bench_predict_batch.py --rows 20000 --single 500 --rtt-ms 150
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(HERE, "Crop_classification.csv")
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+
+
+def load_csv() -> tuple[np.ndarray, list[str]]:
+    with open(CSV_PATH, newline="") as f:
+        rows = list(csv.DictReader(f))
+    return np.array([[float(row[name]) for name in FEATURES] for row in rows]), [row["label"] for row in rows]
+
+
+def ensure_model():
+    """chdir to where crop_classifier.pkl is, training a stand-in first if there is none."""
+    if os.path.exists("crop_classifier.pkl"):
+        return
+    if os.path.exists(os.path.join(HERE, "crop_classifier.pkl")):
+        os.chdir(HERE)
+        return
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = load_csv()
+    os.chdir(tempfile.mkdtemp())
+    joblib.dump(RandomForestClassifier(random_state=42).fit(X, y), "crop_classifier.pkl")
+    print("No crop_classifier.pkl found: trained a stand-in RandomForestClassifier(100 trees) on the CSV")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows per batch request")
+    parser.add_argument("--single", type=int, default=300, help="Rows sent one at a time to /predict")
+    parser.add_argument("--rtt-ms", type=float, default=100.0, help="Network round trip per HTTP call")
+    args = parser.parse_args()
+
+    ensure_model()
+    sys.path.insert(0, HERE)
+    import main as service
+    from fastapi.testclient import TestClient
+
+    client = TestClient(service.app)
+    X, _ = load_csv()
+    X = X[np.random.default_rng(0).integers(len(X), size=args.rows)]
+
+    start = time.perf_counter()
+    singles = [client.post("/predict", json=dict(zip(FEATURES, row))).json() for row in X[:args.single].tolist()]
+    single_s = (time.perf_counter() - start) / args.single
+    print(f"\n{'endpoint':<22} {'rows':>7} {'rows/sec':>10}   with {args.rtt_ms:.0f} ms RTT per call")
+    print(f"{'/predict':<22} {args.single:>7} {1 / single_s:>10.0f}   {1 / (single_s + args.rtt_ms / 1000):>8.0f}")
+
+    csv_body = io.StringIO()
+    csv_body.write(",".join(FEATURES) + "\n")
+    csv_body.writelines(",".join(f"{v:g}" for v in row) + "\n" for row in X.tolist())
+    bodies = {
+        "/predict/batch JSON": {"json": [dict(zip(FEATURES, row)) for row in X.tolist()]},
+        "/predict/batch columns": {"json": {name: X[:, i].tolist() for i, name in enumerate(FEATURES)}},
+        "/predict/batch CSV": {"content": csv_body.getvalue().encode(), "headers": {"content-type": "text/csv"}},
+    }
+    for name, body in bodies.items():
+        start = time.perf_counter()
+        lines = client.post("/predict/batch", **body).text.splitlines()
+        elapsed = time.perf_counter() - start
+        assert len(lines) == args.rows
+        print(f"{name:<22} {args.rows:>7} {args.rows / elapsed:>10.0f}   {args.rows / (elapsed + args.rtt_ms / 1000):>8.0f}")
+
+    batch = [json.loads(line) for line in lines[:args.single]]
+    same = all(s["predictions"] == b["predictions"] for s, b in zip(singles, batch))
+    print(f"\nbatch top-5 identical to /predict for the first {args.single} rows: {same}")
+
+
+if __name__ == "__main__":
+    main()
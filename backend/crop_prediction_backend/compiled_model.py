@@ -0,0 +1,115 @@
+"""
+NumPy-only inference for the crop classifier, from the flat arrays export_model.py writes.
+
+Importing this module needs only numpy: no scikit-learn, no joblib, no unpickling.
+The .npz is stored uncompressed, so every array is memory-mapped straight out of the
+file instead of being read into the heap.
+"""
+
+import struct
+import zipfile
+import numpy as np
+
+# Local file header layout (PKZIP APPNOTE 4.3.7): 30 fixed bytes, then name and extra field
+_LOCAL_HEADER_SIZE = 30
+
+SMALL_BATCH_ROWS = 32
+
+
+def load_npz_mmap(path: str) -> dict:
+    """Arrays of an uncompressed .npz as read-only memory maps (compressed members are read normally)."""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            f.seek(info.header_offset)
+            header = f.read(_LOCAL_HEADER_SIZE)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            f.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            arrays[name] = np.memmap(
+                path, dtype=dtype, mode="r", offset=f.tell(), shape=shape, order="F" if fortran_order else "C"
+            )
+    return arrays
+
+
+class CompiledForest:
+    """
+    A tree ensemble (RandomForest / ExtraTrees / a single DecisionTree classifier) as flat
+    node arrays over all trees:
+
+        feature, threshold   split of each node (leaves: feature 0, never used)
+        left, right          absolute child indices; a leaf points to itself on both sides
+        value                per node class probabilities, normalized like sklearn's
+                             DecisionTreeClassifier.predict_proba
+        roots                index of each tree's root node
+        classes              class labels, in sklearn's classes_ order
+
+    All (row, tree) pairs walk down together, one level per step, until every one of them is
+    at a leaf. Results match sklearn's predict_proba bit for bit: inputs are rounded through
+    float32 as sklearn's tree code does, and tree outputs are summed in tree order before
+    dividing by the count.
+    """
+
+    def __init__(self, arrays: dict):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = np.asarray(arrays["roots"])
+        self.max_depth = int(arrays["max_depth"])
+        self.average = bool(arrays["average"])  # ensembles average their trees; a lone tree doesn't
+        self.classes_ = np.asarray(arrays["classes"])
+        self.n_features_in_ = int(arrays["n_features"])
+        self._internal = np.asarray(self.left) != np.arange(len(self.left))
+        self._children = np.stack([self.left, self.right], axis=1).ravel()  # [2n] left, [2n+1] right
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        return cls(load_npz_mmap(path))
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf index reached in every tree: (rows, trees)."""
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (rows, {self.n_features_in_}), got {X.shape}")
+        rows, trees = len(X), len(self.roots)
+        flat_X = X.ravel()
+        node = np.tile(self.roots, rows)  # one walker per (row, tree), row-major
+        row_start = np.repeat(np.arange(rows) * X.shape[1], trees)
+        active = np.flatnonzero(self._internal[node])
+        current = node[active]
+        while len(active):
+            go_right = flat_X[row_start[active] + self.feature[current]] > self.threshold[current]
+            current = self._children[2 * current + go_right]
+            node[active] = current
+            # Walkers that reached a leaf drop out, so shallow trees stop costing anything
+            internal = self._internal[current]
+            active, current = active[internal], current[internal]
+        return node.reshape(rows, trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        # Summed tree by tree, in order, like sklearn's accumulation (np.sum's pairwise order
+        # would differ in the last bits): a cumsum for a few rows, a loop over trees otherwise
+        if len(leaves) <= SMALL_BATCH_ROWS:
+            proba = self.value[leaves].cumsum(axis=1)[:, -1]
+        else:
+            proba = np.zeros((len(leaves), self.value.shape[1]))
+            for tree in range(leaves.shape[1]):
+                proba += self.value[leaves[:, tree]]
+        if self.average:
+            proba /= len(self.roots)
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
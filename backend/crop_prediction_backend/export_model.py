@@ -0,0 +1,111 @@
+"""
+Compiles crop_classifier.pkl into crop_classifier.npz for compiled_model.CompiledForest.
+
+Run this wherever scikit-learn is installed (it unpickles the model), then deploy the .npz
+next to main.py: the service then starts without importing scikit-learn or joblib.
+Supports RandomForestClassifier, ExtraTreesClassifier and DecisionTreeClassifier.
+
+Usage:
+    python export_model.py
+    python export_model.py --model crop_classifier.pkl --out crop_classifier.npz
+    python export_model.py --train-if-missing   # no .pkl yet: train one on Crop_classification.csv
+"""
+
+import argparse
+import csv
+import os
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(HERE, "Crop_classification.csv")
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+
+
+def load_csv():
+    with open(CSV_PATH, newline="") as f:
+        rows = list(csv.DictReader(f))
+    return np.array([[float(row[name]) for name in FEATURES] for row in rows]), [row["label"] for row in rows]
+
+
+def train_model(path: str):
+    """Trains a RandomForestClassifier (scikit-learn defaults) on the CSV and pickles it to `path`."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = load_csv()
+    model = RandomForestClassifier(random_state=42).fit(X, y)
+    joblib.dump(model, path)
+    return model
+
+
+def compile_model(model) -> dict:
+    """Flat node arrays for CompiledForest (see its docstring for the layout)."""
+    from sklearn.tree import DecisionTreeClassifier
+
+    if isinstance(model, DecisionTreeClassifier):
+        trees, average = [model], False
+    elif all(isinstance(tree, DecisionTreeClassifier) for tree in getattr(model, "estimators_", [None])):
+        trees, average = list(model.estimators_), True
+    else:
+        raise TypeError(f"Can't compile {type(model).__name__}: only decision trees and forests of them are supported")
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise TypeError("Multi-output classifiers are not supported")
+
+    n_classes = len(model.classes_)
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for tree in trees:
+        t = tree.tree_
+        leaf = t.children_left == -1
+        own = np.arange(t.node_count) + offset
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        proba = t.value[:, 0, :n_classes].astype(np.float64)
+        normalizer = proba.sum(axis=1)[:, None]
+        normalizer[normalizer == 0.0] = 1.0
+        features.append(np.where(leaf, 0, t.feature))
+        thresholds.append(np.where(leaf, 0.0, t.threshold))
+        lefts.append(np.where(leaf, own, t.children_left + offset))
+        rights.append(np.where(leaf, own, t.children_right + offset))
+        values.append(proba / normalizer)
+        roots.append(offset)
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+
+    return {
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.int32),
+        "right": np.concatenate(rights).astype(np.int32),
+        "value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int32),
+        "max_depth": np.array(max_depth),
+        "average": np.array(average),
+        "classes": np.asarray(model.classes_).astype(str),
+        "n_features": np.array(model.n_features_in_),
+    }
+
+
+def export(model_path: str, out_path: str, train_if_missing: bool = False) -> dict:
+    if not os.path.exists(model_path):
+        if not train_if_missing:
+            raise SystemExit(f"{model_path} not found (use --train-if-missing to train one on the CSV)")
+        print(f"{model_path} not found: training RandomForestClassifier on {os.path.basename(CSV_PATH)}")
+        model = train_model(model_path)
+    else:
+        import joblib
+
+        model = joblib.load(model_path)
+    arrays = compile_model(model)
+    np.savez(out_path, **arrays)  # Uncompressed, so CompiledForest can memory-map it
+    print(f"Wrote {out_path}: {len(arrays['roots'])} trees, {len(arrays['feature'])} nodes, "
+          f"depth {int(arrays['max_depth'])}, {os.path.getsize(out_path) / 1e6:.1f} MB")
+    return arrays
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="crop_classifier.pkl")
+    parser.add_argument("--out", default="crop_classifier.npz")
+    parser.add_argument("--train-if-missing", action="store_true")
+    args = parser.parse_args()
+    export(args.model, args.out, args.train_if_missing)
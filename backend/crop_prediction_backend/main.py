@@ -3,24 +3,40 @@ Crop Recommendation API — Updated to return Top-5 crops with probabilities.
 Deploy this as main.py on the Render crop-prediction service.
 """
 
-import joblib
+import csv
+import io
+import json
+import os
 import numpy as np
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List
 
 # ── Load model ─────────────────────────────────────────────────────────────
 
+# Written by export_model.py. When present, the service never imports scikit-learn or joblib.
+COMPILED_MODEL_PATH = "crop_classifier.npz"
+PICKLED_MODEL_PATH = "crop_classifier.pkl"
+
 try:
-    model = joblib.load("crop_classifier.pkl")
+    if os.path.exists(COMPILED_MODEL_PATH):
+        from compiled_model import CompiledForest
+        model = CompiledForest.load(COMPILED_MODEL_PATH)
+        MODEL_SOURCE = COMPILED_MODEL_PATH
+    else:
+        import joblib
+        model = joblib.load(PICKLED_MODEL_PATH)
+        MODEL_SOURCE = PICKLED_MODEL_PATH
     # Extract class labels (crop names) from the model
     CROP_LABELS: List[str] = list(model.classes_)
     HAS_PROBA = hasattr(model, "predict_proba")
-    print(f"Model loaded ✓  |  Classes: {CROP_LABELS}  |  predict_proba: {HAS_PROBA}")
+    print(f"Model loaded ✓  |  {MODEL_SOURCE}  |  Classes: {CROP_LABELS}  |  predict_proba: {HAS_PROBA}")
 except Exception as e:
     print(f"ERROR loading model: {e}")
     model = None
+    MODEL_SOURCE = None
     CROP_LABELS = []
     HAS_PROBA = False
 
@@ -39,6 +55,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Feature order the classifier was trained on, with the same bounds as CropInput
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+FEATURE_BOUNDS = np.array([(0, 200), (0, 200), (0, 250), (-10, 60), (0, 100), (0, 14), (0, 500)], dtype=float)
+TOP_K = 5
+BATCH_MAX_ROWS = 100_000
+BATCH_CHUNK_ROWS = 2048  # rows per predict_proba call; results stream out chunk by chunk
+
 # ── Schemas ──────────────────────────────────────────────────────────────────
 
 class CropInput(BaseModel):
@@ -81,7 +104,7 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "model_loaded": model is not None}
+    return {"status": "ok", "model_loaded": model is not None, "model_source": MODEL_SOURCE}
 
 
 @app.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
@@ -102,14 +125,8 @@ def predict(data: CropInput):
 
     if HAS_PROBA:
         # Get full probability distribution across all crop classes
-        probs = model.predict_proba(features)[0]
-        # Sort by probability descending
-        ranked = sorted(
-            zip(CROP_LABELS, probs),
-            key=lambda x: x[1],
-            reverse=True,
-        )
-        top5 = ranked[:5]
+        probs = model.predict_proba(features)
+        top5 = _top_k(probs)[0]
     else:
         # Fallback for models without predict_proba
         best = model.predict(features)[0]
@@ -127,3 +144,108 @@ def predict(data: CropInput):
         confidence_note="Top-5 predictions generated by the trained classifier.",
         predictions=predictions,
     )
+
+
+# ── Batch prediction ────────────────────────────────────────────────────────
+
+def _top_k(probs: np.ndarray, k: int = TOP_K) -> List[List[tuple]]:
+    """
+    Top-k (crop, probability) per row without sorting every class: a partial partition finds
+    each row's k-th largest probability (argpartition), and only the k winners are sorted. Ties are broken
+    by class order, exactly like the stable sorted(..., reverse=True) this replaces.
+    """
+    k = min(k, probs.shape[1])
+    kth_class = np.argpartition(-probs, k - 1, axis=1)[:, k - 1:k]
+    kth = np.take_along_axis(probs, kth_class, axis=1)
+    above = probs > kth
+    at = probs == kth
+    # Of the classes tied at the k-th value, keep the first ones until each row has k
+    chosen = above | (at & (np.cumsum(at, axis=1) <= k - above.sum(axis=1, keepdims=True)))
+    top = np.nonzero(chosen)[1].reshape(len(probs), k)
+    top_probs = np.take_along_axis(probs, top, axis=1)
+    order = np.argsort(-top_probs, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    top_probs = np.take_along_axis(top_probs, order, axis=1)
+    return [
+        [(CROP_LABELS[c], p) for c, p in zip(classes, row_probs)]
+        for classes, row_probs in zip(top.tolist(), top_probs.tolist())
+    ]
+
+
+def _parse_batch(body: bytes, content_type: str) -> np.ndarray:
+    """
+    Feature matrix (rows, 7) from a batch request body. Accepted shapes:
+      - JSON list of CropInput objects: [{"N": 90, "P": 42, ...}, ...]
+      - JSON columns: {"N": [90, 85, ...], "P": [42, 58, ...], ...}
+      - CSV with a header row naming the 7 features (other columns, e.g. label, are ignored)
+    """
+    try:
+        if "csv" in content_type:
+            reader = csv.reader(io.StringIO(body.decode("utf-8-sig")))
+            header = [name.strip() for name in next(reader)]
+            missing = [name for name in FEATURES if name not in header]
+            if missing:
+                raise ValueError(f"CSV header is missing {missing}")
+            columns = [header.index(name) for name in FEATURES]
+            rows = [[row[i] for i in columns] for row in reader if row]
+            return np.array(rows, dtype=float).reshape(-1, len(FEATURES))
+
+        data = json.loads(body)
+        if isinstance(data, dict):
+            missing = [name for name in FEATURES if name not in data]
+            if missing:
+                raise ValueError(f"Columns missing: {missing}")
+            X = np.column_stack([np.asarray(data[name], dtype=float) for name in FEATURES])
+        elif isinstance(data, list):
+            X = np.array([[row[name] for name in FEATURES] for row in data], dtype=float)
+        else:
+            raise ValueError("Expected a JSON list of rows or an object of columns")
+        return X.reshape(-1, len(FEATURES))
+    except (KeyError, IndexError, TypeError, StopIteration, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Malformed batch body: {e!r}")
+
+
+@app.post("/predict/batch", tags=["Prediction"])
+async def predict_batch(request: Request):
+    """
+    Top-5 crops for many rows in one call (JSON rows, JSON columns or CSV; see _parse_batch).
+    Streams newline-delimited JSON, one line per input row in input order:
+    {"row": 0, "predicted_crop": "rice", "predictions": [{"crop", "probability", "rank"}, ...]}.
+    Each chunk of BATCH_CHUNK_ROWS rows is scored with a single predict_proba call.
+    """
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    try:
+        X = _parse_batch(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(X) > BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ROWS} rows per batch.")
+    out_of_range = ~np.isfinite(X) | (X < FEATURE_BOUNDS[:, 0]) | (X > FEATURE_BOUNDS[:, 1])
+    if out_of_range.any():
+        bad_rows = np.flatnonzero(out_of_range.any(axis=1))
+        raise HTTPException(
+            status_code=422,
+            detail={"message": "Values out of range", "rows": bad_rows[:20].tolist(), "count": int(len(bad_rows))},
+        )
+
+    def lines():
+        for start in range(0, len(X), BATCH_CHUNK_ROWS):
+            chunk = X[start:start + BATCH_CHUNK_ROWS]
+            if HAS_PROBA:
+                ranked = _top_k(model.predict_proba(chunk))
+            else:
+                ranked = [[(crop, 1.0)] for crop in model.predict(chunk)]
+            yield "".join(
+                json.dumps({
+                    "row": start + i,
+                    "predicted_crop": top[0][0],
+                    "predictions": [
+                        {"crop": name, "probability": round(float(prob), 4), "rank": rank + 1}
+                        for rank, (name, prob) in enumerate(top)
+                    ],
+                }) + "\n"
+                for i, top in enumerate(ranked)
+            )
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
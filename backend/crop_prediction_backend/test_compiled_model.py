@@ -0,0 +1,54 @@
+"""
+Parity check: CompiledForest (crop_classifier.npz) vs the pickled scikit-learn model.
+
+Compiles crop_classifier.pkl into a temporary .npz (training a stand-in RandomForest on
+the CSV if there is no .pkl), then requires predict_proba to be bit-identical (and so the
+/predict top-5 too) on every row of Crop_classification.csv and on random rows across
+CropInput's full value ranges. Run it with pytest, or as a script, which exits non-zero
+on any mismatch.
+
+Usage:
+    python test_compiled_model.py
+    python -m pytest test_compiled_model.py
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import joblib
+from compiled_model import CompiledForest
+from export_model import export, load_csv
+
+
+def test_compiled_model():
+    model_path = "crop_classifier.pkl"
+    if not os.path.exists(model_path):
+        model_path = os.path.join(tempfile.mkdtemp(), "crop_classifier.pkl")
+    npz_path = os.path.join(tempfile.mkdtemp(), "crop_classifier.npz")
+    export(model_path, npz_path, train_if_missing=True)
+    reference = joblib.load(model_path)
+    compiled = CompiledForest.load(npz_path)
+
+    X, _ = load_csv()
+    rng = np.random.default_rng(0)
+    random_rows = rng.uniform([0, 0, 0, -10, 0, 0, 0], [200, 200, 250, 60, 100, 14, 500], (20_000, 7))
+    classes_match = list(compiled.classes_) == list(reference.classes_)
+    print(f"classes match: {classes_match}")
+    assert classes_match, f"classes differ: {list(compiled.classes_)} vs {list(reference.classes_)}"
+    for name, rows in (("CSV rows", X), ("random rows", random_rows), ("single row", X[:1])):
+        expected, actual = reference.predict_proba(rows), compiled.predict_proba(rows)
+        identical = np.array_equal(expected, actual)
+        labels = np.array_equal(reference.predict(rows), compiled.predict(rows))
+        print(f"{name:<12} {len(rows):>6}: predict_proba bit-identical {identical}, "
+              f"max |diff| {np.abs(expected - actual).max():.3g}, predict identical {labels}")
+        assert identical, f"{name}: predict_proba differs from scikit-learn"
+        assert labels, f"{name}: predict differs from scikit-learn"
+
+
+if __name__ == "__main__":
+    try:
+        test_compiled_model()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
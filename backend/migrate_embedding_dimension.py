@@ -0,0 +1,139 @@
+"""
+Backfills reduced-dimension embedding columns (e.g. `embedding_768`) from existing rows.
+
+Run after applying supabase/migrations/*_reduced_dimension_embeddings.sql:
+
+    --mode truncate  reads the stored 3072-dim `embedding`, keeps the first N components and
+                     renormalizes (no Gemini calls; what output_dimensionality does server-side)
+    --mode reembed   embeds `english_text` (or `original_text`) again at N dimensions via the
+                     same batched, cached path as /embed/batch
+
+Only rows whose target column is still NULL are touched, so the job is resumable: interrupt
+it and run it again. Progress (last processed id) is also checkpointed under .cache/, so rows
+that keep failing don't have to be rescanned; pass --restart to ignore the checkpoint.
+
+Usage:
+    python migrate_embedding_dimension.py --dimension 768 --mode truncate
+    python migrate_embedding_dimension.py --dimension 768 --mode reembed --table questions
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TABLES = ("knowledge_posts", "questions", "knowledge_submissions")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--mode", choices=["truncate", "reembed"], default="truncate")
+    parser.add_argument("--table", choices=TABLES, action="append", help="Default: all tables")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent row updates")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved checkpoints")
+    return parser.parse_args()
+
+
+args = parse_args()
+# Re-embedding must request the target size from Gemini, so set it before the service loads
+os.environ["EMBEDDING_DIMENSION"] = str(args.dimension)
+
+from app.core.vectors import from_pgvector, to_pgvector, truncate_embedding  # noqa: E402
+from app.services.gemini import gemini_service  # noqa: E402
+from app.services.supabase import get_supabase_client  # noqa: E402
+
+CHECKPOINT_DIR = os.path.join(".cache", "migrations")
+
+
+def checkpoint_path(table: str, column: str) -> str:
+    return os.path.join(CHECKPOINT_DIR, f"{table}.{column}.{args.mode}.json")
+
+
+def load_checkpoint(table: str, column: str) -> dict:
+    if args.restart:
+        return {}
+    try:
+        with open(checkpoint_path(table, column)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_checkpoint(table: str, column: str, state: dict):
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    tmp_path = checkpoint_path(table, column) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, checkpoint_path(table, column))
+
+
+def fetch_batch(supabase, table: str, column: str, last_id: str | None) -> list[dict]:
+    fields = "id, embedding" if args.mode == "truncate" else "id, english_text, original_text"
+    query = supabase.table(table).select(fields).is_(column, "null")
+    if args.mode == "truncate":
+        query = query.not_.is_("embedding", "null")
+    if last_id:
+        query = query.gt("id", last_id)
+    return query.order("id").limit(args.batch_size).execute().data
+
+
+async def compute_vectors(rows: list[dict]) -> dict:
+    """Returns {row id: reduced vector} for the rows that could be converted."""
+    if args.mode == "truncate":
+        return {
+            row["id"]: truncate_embedding(from_pgvector(row["embedding"]), args.dimension)
+            for row in rows
+        }
+    texts = {row["id"]: row.get("english_text") or row.get("original_text") for row in rows}
+    texts = {row_id: text for row_id, text in texts.items() if text}
+    embeddings = await gemini_service.embed_texts(list(texts.values()), "RETRIEVAL_DOCUMENT")
+    return {row_id: vector for row_id, vector in zip(texts, embeddings) if vector is not None}
+
+
+def remaining(supabase, table: str, column: str) -> int:
+    return supabase.table(table).select("id", count="exact").is_(column, "null").limit(1).execute().count or 0
+
+
+async def migrate_table(supabase, executor: ThreadPoolExecutor, table: str):
+    column = f"embedding_{args.dimension}"
+    state = load_checkpoint(table, column)
+    state.setdefault("updated", 0)
+    state.setdefault("skipped", 0)
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    print(f"{table}.{column}: {remaining(supabase, table, column)} rows to backfill"
+          + (f", resuming after {state['last_id']}" if state.get("last_id") else ""))
+
+    def update(row_id: str, vector):
+        supabase.table(table).update({column: to_pgvector(vector)}).eq("id", row_id).execute()
+
+    while True:
+        rows = await loop.run_in_executor(executor, fetch_batch, supabase, table, column, state.get("last_id"))
+        if not rows:
+            break
+        vectors = await compute_vectors(rows)
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, update, row_id, vector) for row_id, vector in vectors.items()
+        ))
+        state["updated"] += len(vectors)
+        state["skipped"] += len(rows) - len(vectors)
+        state["last_id"] = rows[-1]["id"]
+        save_checkpoint(table, column, state)
+        rate = state["updated"] / max(time.perf_counter() - start, 1e-9)
+        print(f"  {state['updated']} updated, {state['skipped']} skipped ({rate:.0f} rows/s)")
+
+    print(f"{table}.{column}: done, {remaining(supabase, table, column)} rows still NULL")
+
+
+async def main():
+    supabase = get_supabase_client()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for table in args.table or TABLES:
+            await migrate_table(supabase, executor, table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+-- Migration: reduced-dimension (768) embeddings alongside the 3072-dim ones
+--
+-- gemini-embedding-001 vectors can be truncated to their first N components and
+-- renormalized with little loss in recall. This adds an `embedding_768` column next
+-- to each `embedding vector(3072)` column, plus matching RPCs, so both can live side
+-- by side while existing rows are backfilled.
+--
+-- Rollout:
+--   1. Apply this migration.
+--   2. Backfill: python backend/migrate_embedding_dimension.py --dimension 768 --mode truncate
+--      (resumable; re-run it until it reports 0 remaining rows).
+--   3. Set EMBEDDING_DIMENSION=768 on the backend, point clients at match_knowledge_768,
+--      and write new rows' embeddings to embedding_768.
+--   4. Once nothing reads the 3072-dim columns any more, they can be dropped.
+
+-- 1. New columns
+alter table knowledge_posts add column if not exists embedding_768 vector(768);
+alter table questions add column if not exists embedding_768 vector(768);
+alter table knowledge_submissions add column if not exists embedding_768 vector(768);
+
+-- 2. match_knowledge on the 768-dim column (same result shape as match_knowledge)
+drop function if exists match_knowledge_768(vector, double precision, integer);
+
+create or replace function match_knowledge_768 (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int
+)
+returns table (
+  id uuid,
+  user_id uuid,
+  original_text text,
+  english_text text,
+  audio_url text,
+  similarity float
+)
+language plpgsql
+as $$
+begin
+  return query
+  select
+    knowledge_posts.id,
+    knowledge_posts.user_id,
+    knowledge_posts.original_text,
+    knowledge_posts.english_text,
+    knowledge_posts.audio_url,
+    (1 - (knowledge_posts.embedding_768 <=> query_embedding)) as similarity
+  from knowledge_posts
+  where 1 - (knowledge_posts.embedding_768 <=> query_embedding) > match_threshold
+  and knowledge_posts.is_verified = true -- only verified posts, as in match_knowledge
+  order by similarity desc
+  limit match_count;
+end;
+$$;
+
+-- 3. match_recent_questions on the 768-dim column (called by the backend alert webhook)
+CREATE OR REPLACE FUNCTION match_recent_questions_768(
+  query_embedding vector(768),
+  query_lat float,
+  query_lng float,
+  match_threshold float DEFAULT 0.85,
+  max_distance_km float DEFAULT 5.0,
+  days_ago int DEFAULT 30
+)
+RETURNS TABLE (
+  match_count bigint,
+  nearby_user_ids uuid[]
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_count bigint;
+  v_user_ids uuid[];
+BEGIN
+  SELECT
+    COUNT(id),
+    ARRAY_AGG(user_id) FILTER (WHERE user_id IS NOT NULL)
+  INTO
+    v_count,
+    v_user_ids
+  FROM public.questions
+  WHERE
+    created_at >= (now() - (days_ago || ' days')::interval)
+    AND 1 - (embedding_768 <=> query_embedding) > match_threshold
+    AND latitude IS NOT NULL
+    AND longitude IS NOT NULL
+    AND query_lat IS NOT NULL
+    AND query_lng IS NOT NULL
+    AND (
+      6371 * acos(
+        cos(radians(query_lat)) * cos(radians(latitude)) *
+        cos(radians(longitude) - radians(query_lng)) +
+        sin(radians(query_lat)) * sin(radians(latitude))
+      )
+    ) <= max_distance_km;
+
+  RETURN QUERY SELECT v_count, COALESCE(v_user_ids, '{}'::uuid[]);
+END;
+$$;
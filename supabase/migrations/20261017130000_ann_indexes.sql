@@ -0,0 +1,239 @@
+-- Migration: ANN indexes for match_knowledge and a spatial prefilter for match_recent_questions
+--
+-- pgvector can't build HNSW/IVFFlat indexes on vector(3072) (limit 2000 dims), so
+-- match_knowledge was a sequential scan over knowledge_posts. halfvec indexes go up to
+-- 4000 dims, so the 3072-dim columns get an HNSW index on the expression
+-- embedding::halfvec(3072). A query only uses it when it orders by exactly that
+-- expression with a LIMIT, which is how the RPCs below are written.
+--
+-- match_recent_questions counts *every* similar question nearby (not a top-k), so an ANN
+-- index can't answer it. Instead a GiST index on (longitude, latitude) narrows the rows to
+-- a bounding box around the query point before the exact Haversine distance and cosine
+-- similarity are computed.
+--
+-- Requires pgvector >= 0.7.0 (halfvec). Benchmark: supabase/benchmarks/ann_indexes.sql
+--
+-- The HNSW builds are slow once the graph outgrows maintenance_work_mem (pgvector logs a
+-- NOTICE): with the default 64MB this migration took ~18 min on 100k posts. On a large
+-- table, raise it for the session first (e.g. set maintenance_work_mem = '1GB') as far as
+-- the instance's memory allows.
+
+-- 1. Indexes
+-- Partial on is_verified: match_knowledge only ever searches verified posts
+create index if not exists knowledge_posts_embedding_hnsw_idx
+  on knowledge_posts using hnsw ((embedding::halfvec(3072)) halfvec_cosine_ops)
+  where is_verified = true;
+
+create index if not exists knowledge_posts_embedding_768_hnsw_idx
+  on knowledge_posts using hnsw (embedding_768 vector_cosine_ops)
+  where is_verified = true;
+
+create index if not exists questions_location_gist_idx
+  on questions using gist (point(longitude, latitude));
+
+create index if not exists questions_created_at_idx
+  on questions (created_at);
+
+-- 2. match_knowledge: nearest match_count verified rows via the HNSW index, then the threshold
+-- plan_cache_mode: plpgsql caches plans per connection, and a generic plan doesn't know
+-- match_count, so it estimates LIMIT as 10% of the table and picks a seq scan + sort.
+-- Custom plans see the actual LIMIT and use the index.
+drop function if exists match_knowledge(vector, double precision, integer);
+
+create or replace function match_knowledge (
+  query_embedding vector(3072),
+  match_threshold float,
+  match_count int
+)
+returns table (
+  id uuid,
+  user_id uuid,
+  original_text text,
+  english_text text,
+  audio_url text,
+  similarity float
+)
+language plpgsql
+set hnsw.ef_search = 100
+set plan_cache_mode = force_custom_plan
+as $$
+begin
+  return query
+  select
+    nearest.id,
+    nearest.user_id,
+    nearest.original_text,
+    nearest.english_text,
+    nearest.audio_url,
+    1 - nearest.distance as similarity
+  from (
+    select
+      knowledge_posts.id,
+      knowledge_posts.user_id,
+      knowledge_posts.original_text,
+      knowledge_posts.english_text,
+      knowledge_posts.audio_url,
+      (knowledge_posts.embedding::halfvec(3072) <=> query_embedding::halfvec(3072)) as distance
+    from knowledge_posts
+    where knowledge_posts.is_verified = true -- 🔒 same check as before; matches the partial index
+    order by knowledge_posts.embedding::halfvec(3072) <=> query_embedding::halfvec(3072)
+    limit match_count
+  ) nearest
+  where 1 - nearest.distance > match_threshold
+  order by nearest.distance;
+end;
+$$;
+
+drop function if exists match_knowledge_768(vector, double precision, integer);
+
+create or replace function match_knowledge_768 (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int
+)
+returns table (
+  id uuid,
+  user_id uuid,
+  original_text text,
+  english_text text,
+  audio_url text,
+  similarity float
+)
+language plpgsql
+set hnsw.ef_search = 100
+set plan_cache_mode = force_custom_plan
+as $$
+begin
+  return query
+  select
+    nearest.id,
+    nearest.user_id,
+    nearest.original_text,
+    nearest.english_text,
+    nearest.audio_url,
+    1 - nearest.distance as similarity
+  from (
+    select
+      knowledge_posts.id,
+      knowledge_posts.user_id,
+      knowledge_posts.original_text,
+      knowledge_posts.english_text,
+      knowledge_posts.audio_url,
+      (knowledge_posts.embedding_768 <=> query_embedding) as distance
+    from knowledge_posts
+    where knowledge_posts.is_verified = true
+    order by knowledge_posts.embedding_768 <=> query_embedding
+    limit match_count
+  ) nearest
+  where 1 - nearest.distance > match_threshold
+  order by nearest.distance;
+end;
+$$;
+
+-- 3. match_recent_questions: bounding-box prefilter on the GiST index, then exact checks
+CREATE OR REPLACE FUNCTION match_recent_questions(
+  query_embedding vector(3072),
+  query_lat float,
+  query_lng float,
+  match_threshold float DEFAULT 0.85,
+  max_distance_km float DEFAULT 5.0,
+  days_ago int DEFAULT 30
+)
+RETURNS TABLE (
+  match_count bigint,
+  nearby_user_ids uuid[]
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_count bigint;
+  v_user_ids uuid[];
+  -- 1 degree of latitude is ~111.045 km; a degree of longitude shrinks with cos(latitude)
+  v_lat_delta float := max_distance_km / 111.045;
+  v_lng_delta float := max_distance_km / (111.045 * greatest(cos(radians(query_lat)), 0.01));
+BEGIN
+  IF query_lat IS NULL OR query_lng IS NULL THEN
+    RETURN QUERY SELECT 0::bigint, '{}'::uuid[];
+    RETURN;
+  END IF;
+
+  SELECT
+    COUNT(id),
+    ARRAY_AGG(user_id) FILTER (WHERE user_id IS NOT NULL)
+  INTO
+    v_count,
+    v_user_ids
+  FROM public.questions
+  WHERE
+    -- 1. Bounding box (index scan on questions_location_gist_idx)
+    point(longitude, latitude) <@ box(
+      point(query_lng - v_lng_delta, query_lat - v_lat_delta),
+      point(query_lng + v_lng_delta, query_lat + v_lat_delta)
+    )
+    -- 2. Time filter
+    AND created_at >= (now() - (days_ago || ' days')::interval)
+    -- 3. Exact distance (Haversine), only for rows inside the box; least() guards acos against rounding above 1
+    AND (
+      6371 * acos(least(1.0,
+        cos(radians(query_lat)) * cos(radians(latitude)) *
+        cos(radians(longitude) - radians(query_lng)) +
+        sin(radians(query_lat)) * sin(radians(latitude))
+      ))
+    ) <= max_distance_km
+    -- 4. Embedding similarity
+    AND 1 - (embedding <=> query_embedding) > match_threshold;
+
+  RETURN QUERY SELECT v_count, COALESCE(v_user_ids, '{}'::uuid[]);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_recent_questions_768(
+  query_embedding vector(768),
+  query_lat float,
+  query_lng float,
+  match_threshold float DEFAULT 0.85,
+  max_distance_km float DEFAULT 5.0,
+  days_ago int DEFAULT 30
+)
+RETURNS TABLE (
+  match_count bigint,
+  nearby_user_ids uuid[]
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_count bigint;
+  v_user_ids uuid[];
+  v_lat_delta float := max_distance_km / 111.045;
+  v_lng_delta float := max_distance_km / (111.045 * greatest(cos(radians(query_lat)), 0.01));
+BEGIN
+  IF query_lat IS NULL OR query_lng IS NULL THEN
+    RETURN QUERY SELECT 0::bigint, '{}'::uuid[];
+    RETURN;
+  END IF;
+
+  SELECT
+    COUNT(id),
+    ARRAY_AGG(user_id) FILTER (WHERE user_id IS NOT NULL)
+  INTO
+    v_count,
+    v_user_ids
+  FROM public.questions
+  WHERE
+    point(longitude, latitude) <@ box(
+      point(query_lng - v_lng_delta, query_lat - v_lat_delta),
+      point(query_lng + v_lng_delta, query_lat + v_lat_delta)
+    )
+    AND created_at >= (now() - (days_ago || ' days')::interval)
+    AND (
+      6371 * acos(least(1.0,
+        cos(radians(query_lat)) * cos(radians(latitude)) *
+        cos(radians(longitude) - radians(query_lng)) +
+        sin(radians(query_lat)) * sin(radians(latitude))
+      ))
+    ) <= max_distance_km
+    AND 1 - (embedding_768 <=> query_embedding) > match_threshold;
+
+  RETURN QUERY SELECT v_count, COALESCE(v_user_ids, '{}'::uuid[]);
+END;
+$$;